@@ -0,0 +1,54 @@
+from redis.asyncio import Redis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, TimeoutError
+
+
+class AsyncRedisConn:
+    """
+    Asyncio counterpart of RedisConn built on redis.asyncio.
+
+    Creating the object does not touch the network, call connect() inside a running
+    event loop to verify the node.
+
+    Args:
+        config_dict: A dictionary containing the Redis connection details.
+    """
+
+    def __init__(self, config_dict):
+        """
+        Args:
+            config_dict: RedisConfig = dict(
+                host = str
+                password = str
+                port = int
+                db = int
+            )
+        """
+        self.redis = Redis(
+            **config_dict,
+            retry=Retry(ExponentialBackoff(cap=5.12, base=0.1), retries=5),
+            retry_on_timeout=True,
+            retry_on_error=[ConnectionError, TimeoutError],
+        )
+
+    async def connect(self) -> Redis:
+        """
+        Ping the node and return the client.
+        """
+        if not await self.check_connection():
+            raise Exception("Connection error")
+        return self.redis
+
+    async def check_connection(self):
+        """
+        Check if the connection is successful
+        """
+        return await self.redis.ping()
+
+    @property
+    def client(self) -> Redis:
+        """
+        Returns the Redis client object.
+        """
+        return self.redis
@@ -0,0 +1,109 @@
+import asyncio
+
+from .config import master_config, redis_replica_redis_configs
+from .async_conn import AsyncRedisConn, Redis
+from .utils import register_fork_handler
+
+
+class AsyncRedisController:
+    """
+    Asyncio counterpart of RedisController. Connections are opened by connect(),
+    which pings the master and every replica concurrently.
+    """
+
+    def __init__(self, master_redis_config, replica_redis_configs: list):
+        self.master_redis_config = master_redis_config
+        self.replica_redis_configs = replica_redis_configs
+        self.__master_node = None
+        self.__conn_pool: list = []
+        self.__active_reader: int = 0
+        self.__connect_lock = asyncio.Lock()
+        register_fork_handler(self)
+
+    def reset_after_fork(self) -> None:
+        """
+        Forget the connections inherited from the parent process, the child connects
+        again on connect(). Called in the child after os.fork().
+        """
+        self.__master_node, self.__conn_pool = None, []
+        self.__active_reader = 0
+        self.__connect_lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self.__master_node is not None
+
+    async def connect(self) -> None:
+        """
+        Create connections to the master and all replicas concurrently. Calling it
+        again on a connected controller is a no-op.
+        """
+        async with self.__connect_lock:
+            if self.connected:
+                return
+            if not self.master_redis_config:
+                raise Exception("No master configs are given to create a connection")
+            if not self.replica_redis_configs:
+                raise Exception("No replica configs are given to create connections")
+            configs = [self.master_redis_config, *self.replica_redis_configs]
+            results = await asyncio.gather(
+                *(AsyncRedisConn(config).connect() for config in configs),
+                return_exceptions=True,
+            )
+            for config, result in zip(configs, results):
+                if isinstance(result, BaseException):
+                    print(
+                        f"Redis Connection Error {config['host']} raised error : ",
+                        result,
+                    )
+            master_node, replicas = results[0], results[1:]
+            if isinstance(master_node, BaseException):
+                raise Exception("Master node connection could not be created.")
+            self.__conn_pool = [r for r in replicas if not isinstance(r, BaseException)]
+            if not self.__conn_pool:
+                raise Exception(
+                    "No replicas are created for the pool. Check the configurations."
+                )
+            self.__master_node = master_node
+
+    async def close(self) -> None:
+        """
+        Close the master and replica clients.
+        """
+        for client in [self.__master_node, *self.__conn_pool]:
+            if client is not None:
+                await client.aclose()
+        self.__master_node, self.__conn_pool = None, []
+
+    @property
+    def read_cli(self) -> Redis:
+        """
+        Ask for read client from the pool distributed in a round-robin fashion.
+        Returns:
+            Redis_Client: An asyncio Redis client for read operations.
+        """
+        if not self.__conn_pool:
+            raise Exception("No replica connections are available, await connect()")
+        active_connection = self.__conn_pool[self.__active_reader]
+        self.__active_reader = (self.__active_reader + 1) % len(self.__conn_pool)
+        return active_connection
+
+    @property
+    def write_cli(self) -> Redis:
+        """
+        Ask for write client from the pool. Master node is used for write operations.
+        Returns:
+            Redis_Client: An asyncio Redis client for write operations.
+        """
+        if self.__master_node is None:
+            raise Exception("Master connection is not available, await connect()")
+        return self.__master_node
+
+
+"""
+Controller for asyncio applications. Nothing is connected at import time, await
+async_redis_controller.connect() on application startup.
+"""
+async_redis_controller = AsyncRedisController(
+    master_redis_config=master_config, replica_redis_configs=redis_replica_redis_configs
+)
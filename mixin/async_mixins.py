@@ -0,0 +1,355 @@
+import asyncio
+from fnmatch import fnmatchcase
+
+from typing import Union, Optional, Iterable, List, Tuple
+from .async_controller import AsyncRedisController, async_redis_controller
+from .schemas import RedisSchema
+from .rows import MultipleRows, RedisRow
+from .errors import RedisValueError
+from .scripts import REMOVE_MISSING_SCRIPT
+from .utils import achunked, chunked, get_expiry_time
+
+
+class AsyncRedisClient:
+    """
+    Asyncio counterpart of RedisClient with the same schema and row API.
+    """
+
+    __controller: AsyncRedisController = None
+    __schema: RedisSchema = None
+    __scan_count: int = 1000
+    __fetch_chunk_size: int = 500
+    __max_concurrency: int = 8
+    __remove_script = None
+
+    def __init__(
+        self,
+        controller: AsyncRedisController,
+        scan_count: int = 1000,
+        fetch_chunk_size: int = 500,
+        max_concurrency: int = 8,
+    ):
+        """
+        Args:
+            controller: AsyncRedisController object which serves read and write clients
+            scan_count: COUNT hint sent with every SCAN call while finding keys
+            fetch_chunk_size: Number of keys fetched with a single MGET call
+            max_concurrency: Maximum number of MGET calls in flight for a single find
+                and of pipelines in flight for a single store_many
+        """
+        if scan_count < 1 or fetch_chunk_size < 1 or max_concurrency < 1:
+            raise ValueError(
+                "scan_count, fetch_chunk_size and max_concurrency must be positive."
+            )
+        self.__controller = controller
+        self.__scan_count = scan_count
+        self.__fetch_chunk_size = fetch_chunk_size
+        self.__max_concurrency = max_concurrency
+
+    def set_schema(self, schema: RedisSchema) -> None:
+        """
+        Args:
+            schema: RedisSchema object to change schema of redis key pattern
+        """
+        self.__schema = schema
+
+    def check_schema(self) -> None:
+        """
+        Check if schema is declared. If not raise an exception.
+        """
+        if not self.__schema:
+            raise Exception(
+                "Declare schema first. Redis Controller needs a schema to match key patterns."
+            )
+
+    async def __fetch_chunk(
+        self, read_cli, json_keys: list, semaphore, fields: Optional[List[str]] = None
+    ) -> list:
+        async with semaphore:
+            if not self.__schema.hashed:
+                return list(zip(json_keys, await read_cli.mget(json_keys)))
+            pipeline = read_cli.pipeline(transaction=False)
+            for json_key in json_keys:
+                if fields:
+                    pipeline.hmget(json_key, fields)
+                else:
+                    pipeline.hgetall(json_key)
+            values = await pipeline.execute()
+        if fields:
+            values = [
+                {f: v for f, v in zip(fields, row) if v is not None} for row in values
+            ]
+        return list(zip(json_keys, values))
+
+    async def find(
+        self,
+        keys_dict: dict,
+        scan_count: Optional[int] = None,
+        fetch_chunk_size: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Optional[MultipleRows]:
+        """
+        Args:
+            keys_dict:  {
+                "DynamicKey": "KeyToFind",
+            }
+            scan_count: Optional COUNT hint for SCAN, defaults to client setting
+            fetch_chunk_size: Optional number of keys per MGET, defaults to client setting
+            fields: Hash storage only, read just these fields of every row (HMGET)
+        Returns:
+            Returns a MultipleRows object
+        """
+        self.check_schema()
+        if fields and not self.__schema.hashed:
+            raise RedisValueError("Reading fields requires a schema with hash storage.")
+        await self.__controller.connect()
+        # Pin a single replica for the whole query, scan and fetch must see the same node
+        read_cli = self.__controller.read_cli
+        chunk_size = fetch_chunk_size or self.__fetch_chunk_size
+        semaphore = asyncio.Semaphore(self.__max_concurrency)
+        exact_key = self.__schema.exact_key(keys_dict)
+        index_keys, match_key = [], None
+        if self.__schema.indexed and exact_key is None:
+            # Values with glob characters are matched against the members
+            index_keys, match_key = self.__schema.index_lookup(keys_dict)
+        if exact_key is not None:
+            # Every dynamic key is given, a single GET instead of a SCAN
+            tasks = [self.__fetch_chunk(read_cli, [exact_key], semaphore, fields)]
+        elif index_keys:
+            members = await read_cli.sinter(index_keys)
+            if match_key is not None:
+                members = [m for m in members if fnmatchcase(m.decode(), match_key)]
+            chunks = chunked(members, chunk_size)
+            tasks = [self.__fetch_chunk(read_cli, keys, semaphore, fields) for keys in chunks]
+        else:
+            match_key: str = self.__schema.merge_key(key_dict=keys_dict)
+            json_rows = read_cli.scan_iter(
+                match=match_key, count=scan_count or self.__scan_count
+            )
+            # Fetches start while SCAN is still walking the keyspace
+            tasks = [
+                asyncio.ensure_future(self.__fetch_chunk(read_cli, keys, semaphore, fields))
+                async for keys in achunked(json_rows, chunk_size)
+            ]
+        pairs, missing_keys = [], []
+        for fetched in await asyncio.gather(*tasks):
+            for json_key, row in fetched:
+                if not row:
+                    if not fields:
+                        missing_keys.append(json_key)
+                    continue
+                pairs.append((json_key, row))
+        if index_keys and missing_keys:
+            await self.remove_from_indexes(keys=missing_keys)
+        return MultipleRows(schema=self.__schema, pairs=pairs)
+
+    async def get_many(
+        self,
+        keys_dicts: List[dict],
+        fetch_chunk_size: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> MultipleRows:
+        """
+        Read rows of many exact keys with concurrent MGET calls and no SCAN.
+        Args:
+            keys_dicts: List of keys dicts, each giving every dynamic key
+            fetch_chunk_size: Optional number of keys per MGET, defaults to client setting
+            fields: Hash storage only, read just these fields of every row (HMGET)
+        Returns:
+            MultipleRows of the existing rows, in the order of keys_dicts
+        """
+        self.check_schema()
+        if fields and not self.__schema.hashed:
+            raise RedisValueError("Reading fields requires a schema with hash storage.")
+        json_keys = [self.__schema.build_key(key_dict) for key_dict in keys_dicts]
+        await self.__controller.connect()
+        read_cli = self.__controller.read_cli
+        semaphore = asyncio.Semaphore(self.__max_concurrency)
+        chunks = chunked(json_keys, fetch_chunk_size or self.__fetch_chunk_size)
+        fetched = await asyncio.gather(
+            *[self.__fetch_chunk(read_cli, keys, semaphore, fields) for keys in chunks]
+        )
+        return MultipleRows(
+            schema=self.__schema,
+            pairs=[(key, row) for pairs in fetched for key, row in pairs if row],
+        )
+
+    async def remove_from_indexes(self, keys: list) -> None:
+        """
+        Drop full keys of rows that no longer exist from every index set and range
+        set they belong to. The master checks that the row is absent and removes the members in one
+        script call, a row missing on a replica may still live on the master.
+        Args:
+            keys: List of full Redis keys
+        """
+        self.check_schema()
+        await self.__controller.connect()
+        write_cli = self.__controller.write_cli
+        if self.__remove_script is None:
+            self.__remove_script = write_cli.register_script(REMOVE_MISSING_SCRIPT)
+        pipeline = write_cli.pipeline(transaction=False)
+        range_keys = [self.__schema.range_key(key) for key in self.__schema.range_keys]
+        for key in keys:
+            index_keys = []
+            if self.__schema.indexed:
+                index_keys = self.__schema.index_keys(self.__schema.parse_key(key))
+            if index_keys or range_keys:
+                await self.__remove_script(
+                    keys=[key] + index_keys + range_keys, client=pipeline
+                )
+        await pipeline.execute()
+
+    def dynamic_key_list_to_dict(self, dynamic_keys: list[str]) -> dict:
+        """
+        Args:
+            dynamic_keys: List of dynamic keys
+        Returns:
+            Dictionary of dynamic keys
+        """
+        self.check_schema()
+        if len(dynamic_keys) != len(self.__schema.dynamics):
+            raise Exception("Number of dynamic keys does not match schema.")
+        return {
+            self.__schema.dynamics[ix]: dynamic_keys[ix]
+            for ix, _ in enumerate(self.__schema.dynamics)
+        }
+
+    async def store(
+        self,
+        keys: Union[list[str], str],
+        value: Union[dict, bytes, list, str],
+        expires_at: Optional[dict] = None,
+    ) -> RedisRow:
+        """
+        Args:
+            keys:
+            value:
+            expires_at: Optional[dict]
+            {
+                "days": int,
+                "hours": int,
+                "minutes": int,
+                "seconds": int,
+            }
+        Returns:
+            RedisRow object or raises an exception
+        """
+        self.check_schema()
+        await self.__controller.connect()
+        redis_row, key_dict = self.build_row(keys=keys, value=value)
+        pipeline = self.__controller.write_cli.pipeline(
+            transaction=self.__schema.indexed
+            or self.__schema.ranged
+            or self.__schema.hashed
+        )
+        self.__queue_row(pipeline, redis_row, key_dict, expires_at)
+        await pipeline.execute()
+        return redis_row
+
+    async def store_many(
+        self,
+        rows: Iterable[Tuple],
+        chunk_size: Optional[int] = None,
+        transaction: bool = False,
+        return_rows: bool = True,
+    ) -> Union[List[RedisRow], int]:
+        """
+        Store many rows with pipelined writes, up to max_concurrency chunks are in
+        flight. Chunks are built while the rows are consumed, a chunk writing a key
+        of a chunk still in flight waits for it, so writes of a key commit in input
+        order.
+        Args:
+            rows: Iterable of (keys, value) or (keys, value, expires_at) tuples
+            chunk_size: Optional number of rows per pipeline, defaults to fetch_chunk_size
+            transaction: Wrap every chunk in MULTI/EXEC
+            return_rows: Return created RedisRow objects, otherwise only the count
+        Returns:
+            List of RedisRow objects or number of stored rows
+        """
+        self.check_schema()
+        await self.__controller.connect()
+        # Pipeline task -> keys it writes
+        in_flight = {}
+
+        async def wait_for(tasks) -> None:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                del in_flight[task]
+                task.result()
+
+        stored_rows, stored_count = [], 0
+        try:
+            for chunk in chunked(rows, chunk_size or self.__fetch_chunk_size):
+                pipeline = self.__controller.write_cli.pipeline(transaction=transaction)
+                chunk_keys = set()
+                for row in chunk:
+                    keys, value, expires_at = (tuple(row) + (None,))[:3]
+                    redis_row, key_dict = self.build_row(keys=keys, value=value)
+                    self.__queue_row(pipeline, redis_row, key_dict, expires_at)
+                    chunk_keys.add(redis_row.key)
+                    if return_rows:
+                        stored_rows.append(redis_row)
+                while True:
+                    earlier = [
+                        task
+                        for task, task_keys in in_flight.items()
+                        if not task_keys.isdisjoint(chunk_keys)
+                    ]
+                    if not earlier:
+                        break
+                    await wait_for(earlier)
+                while len(in_flight) >= self.__max_concurrency:
+                    await wait_for(list(in_flight))
+                in_flight[asyncio.ensure_future(pipeline.execute())] = chunk_keys
+                stored_count += len(chunk)
+            while in_flight:
+                await wait_for(list(in_flight))
+        finally:
+            # Let the other chunks finish when one failed
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+        return stored_rows if return_rows else stored_count
+
+    def build_row(
+        self, keys: Union[list[str], str], value: Union[dict, bytes, list, str]
+    ) -> Tuple[RedisRow, dict]:
+        """
+        Args:
+            keys: Dynamic key values in schema order
+            value: Value to store
+        Returns:
+            RedisRow with key and value set, and the dynamic key dictionary
+        """
+        redis_row = RedisRow(schema=self.__schema, delimiter=self.__schema.delimiter)
+        key_dict = self.dynamic_key_list_to_dict(dynamic_keys=keys)
+        redis_row.set_key(key_dict=key_dict)
+        redis_row.feed(value=value)
+        return redis_row, key_dict
+
+    def __queue_row(
+        self,
+        pipeline,
+        redis_row: RedisRow,
+        key_dict: dict,
+        expires_at: Optional[dict] = None,
+    ) -> None:
+        """
+        Queue SET (with expiry) and index and range set maintenance of a row. Hash
+        rows replace the previous hash: DEL, HSET and EXPIRE.
+        """
+        expiry = get_expiry_time(expiry_kwargs=expires_at) if expires_at else None
+        if self.__schema.hashed:
+            pipeline.delete(redis_row.key)
+            pipeline.hset(name=redis_row.key, mapping=redis_row.value)
+            if expiry:
+                pipeline.expire(redis_row.key, expiry)
+        else:
+            pipeline.set(name=redis_row.key, value=redis_row.value, ex=expiry or None)
+        if self.__schema.indexed:
+            for index_key in self.__schema.index_keys(key_dict):
+                pipeline.sadd(index_key, redis_row.key)
+        for range_key, score in self.__schema.range_entries(key_dict):
+            pipeline.zadd(range_key, {redis_row.key: score})
+
+
+async_redis_client = AsyncRedisClient(controller=async_redis_controller)
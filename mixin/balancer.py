@@ -0,0 +1,218 @@
+"""
+Replica balancing
+Node state and pluggable strategies used by RedisController to pick a replica.
+
+This module provides:
+    - ReplicaNode: a replica client with health, outstanding requests, EWMA latency
+      and replication lag
+    - RoundRobinBalancer, LeastOutstandingBalancer, PowerOfTwoBalancer strategies
+"""
+
+import time
+import random
+import threading
+
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, List, Optional
+
+from redis import Redis
+from redis.exceptions import ConnectionError, TimeoutError
+
+
+class ReplicaNode:
+    """
+    A replica client and the statistics balancers decide on.
+
+    Attributes:
+        client: Redis client, None while the replica could not be connected
+        config: Connection config of the replica, used to reconnect it
+        healthy: False once health checks failed, the node gets no traffic
+        probed_at: Monotonic time of the last connection attempt or ejection, an
+            unavailable node is probed again retry_interval seconds later
+        outstanding: Requests currently running on the node
+        latency: Exponentially weighted moving average of request latency (seconds)
+        lag: Replication lag behind the master in bytes of replication stream
+        offset: Last known replication offset processed by the node
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        client: Optional[Redis] = None,
+        alpha: float = 0.3,
+        max_failures: int = 3,
+    ):
+        """
+        Args:
+            config: Connection config of the replica
+            client: Connected Redis client or None
+            alpha: Weight of the newest sample in the latency EWMA
+            max_failures: Consecutive connection failures before the node is ejected
+        """
+        self.config = config
+        self.client = client
+        self.healthy = client is not None
+        self.outstanding = 0
+        self.latency = 0.0
+        self.lag = 0
+        self.offset = 0
+        self.failures = 0
+        self.max_failures = max_failures
+        self.probed_at = time.monotonic()
+        self.__probing = False
+        self.__alpha = alpha
+        self.__lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return f"{self.config.get('host')}:{self.config.get('port')}"
+
+    @property
+    def available(self) -> bool:
+        return self.client is not None and self.healthy
+
+    def mark_success(self) -> None:
+        """
+        Reset failures and re-admit the node.
+        """
+        self.failures = 0
+        self.healthy = self.client is not None
+
+    def mark_failure(self) -> None:
+        """
+        Count a failure, eject the node once max_failures is reached.
+        """
+        self.failures += 1
+        if self.failures >= self.max_failures:
+            if self.healthy:
+                self.probed_at = time.monotonic()
+            self.healthy = False
+
+    def claim_probe(self, retry_interval: float) -> bool:
+        """
+        Half-open state of an unavailable node: once retry_interval seconds passed
+        since it was ejected or last probed, one caller may probe it.
+        Args:
+            retry_interval: Seconds between two probes
+        Returns:
+            bool: True if the caller must probe the node and call end_probe after
+        """
+        if self.available:
+            return False
+        with self.__lock:
+            now = time.monotonic()
+            if self.__probing or now - self.probed_at < retry_interval:
+                return False
+            self.__probing, self.probed_at = True, now
+        return True
+
+    def end_probe(self) -> None:
+        with self.__lock:
+            self.__probing = False
+            self.probed_at = time.monotonic()
+
+    def observe(self, elapsed: float) -> None:
+        """
+        Add a latency sample to the EWMA.
+        Args:
+            elapsed: Seconds the request took
+        """
+        with self.__lock:
+            if self.latency == 0.0:
+                self.latency = elapsed
+            else:
+                self.latency += self.__alpha * (elapsed - self.latency)
+
+    @contextmanager
+    def track(self) -> Iterator[Redis]:
+        """
+        Count a request as outstanding and record its latency.
+        Example:
+            >>> with node.track() as read_cli:
+            >>>     read_cli.mget(keys)
+        """
+        with self.__lock:
+            self.outstanding += 1
+        started = time.perf_counter()
+        try:
+            yield self.client
+        except (ConnectionError, TimeoutError):
+            self.mark_failure()
+            raise
+        else:
+            self.failures = 0
+        finally:
+            self.observe(time.perf_counter() - started)
+            with self.__lock:
+                self.outstanding -= 1
+
+    def track_iter(self, iterable: Iterable[Any]) -> Iterator[Any]:
+        """
+        Yield from a lazy iterable, tracking every item as one request, e.g. the
+        SCAN calls behind scan_iter.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.track():
+                item = next(iterator, StopIteration)
+            if item is StopIteration:
+                return
+            yield item
+
+
+class Balancer:
+    """
+    Strategy choosing one node out of the candidates given by the controller.
+    """
+
+    def choose(self, nodes: List[ReplicaNode]) -> ReplicaNode:
+        raise NotImplementedError
+
+
+class RoundRobinBalancer(Balancer):
+    """
+    Hand out nodes in turn.
+    """
+
+    def __init__(self):
+        self.__counter = 0
+        self.__lock = threading.Lock()
+
+    def choose(self, nodes: List[ReplicaNode]) -> ReplicaNode:
+        with self.__lock:
+            node = nodes[self.__counter % len(nodes)]
+            self.__counter += 1
+        return node
+
+
+class LeastOutstandingBalancer(Balancer):
+    """
+    Pick the node with the fewest requests in flight, ties broken by latency.
+    """
+
+    def choose(self, nodes: List[ReplicaNode]) -> ReplicaNode:
+        return min(nodes, key=lambda node: (node.outstanding, node.latency))
+
+
+class PowerOfTwoBalancer(Balancer):
+    """
+    Power of two choices on EWMA latency: sample two nodes at random and keep the
+    one with the lower latency weighted by its outstanding requests. Avoids herding
+    on the single fastest node while steering away from slow ones.
+    """
+
+    def choose(self, nodes: List[ReplicaNode]) -> ReplicaNode:
+        if len(nodes) == 1:
+            return nodes[0]
+        first, second = random.sample(nodes, 2)
+        return min(
+            (first, second),
+            key=lambda node: node.latency * (node.outstanding + 1),
+        )
+
+
+balancers = {
+    "round_robin": RoundRobinBalancer,
+    "least_outstanding": LeastOutstandingBalancer,
+    "power_of_two": PowerOfTwoBalancer,
+}
@@ -0,0 +1,272 @@
+"""
+Write-behind buffer
+Coalesce writes in memory and send them to Redis in periodic pipelined batches.
+
+This module provides:
+    - WriteBuffer: pending rows keyed by full Redis key (last write wins), flushed
+      by a background thread when max_rows rows are pending or every flush_interval
+      seconds, blocking writers while max_pending rows wait. Rows failing
+      max_attempts flushes are dropped and handed to on_drop
+
+Buffered rows are not visible to find until they are flushed and are lost if the
+process dies before a flush. Buffers flush on close and at interpreter exit.
+"""
+
+import atexit
+import threading
+import time
+import weakref
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .metrics import get_registry
+from .utils import register_fork_handler
+
+_buffers: "weakref.WeakSet" = weakref.WeakSet()
+
+
+class WriteBuffer:
+    """
+    Example:
+        >>> redis_client.set_write_buffer(WriteBuffer(max_rows=500, flush_interval=0.05))
+        >>> for _ in range(1000):
+        >>>     redis_client.store(keys=["counter"], value={"hits": next_value()})
+        >>> redis_client.write_buffer.flush()  # one SET reached Redis
+    """
+
+    def __init__(
+        self,
+        max_rows: int = 500,
+        flush_interval: float = 0.1,
+        max_pending: int = 10000,
+        put_timeout: Optional[float] = None,
+        max_attempts: Optional[int] = 5,
+        on_drop: Optional[Callable[[List[Any]], None]] = None,
+    ):
+        """
+        Args:
+            max_rows: Pending rows that trigger a flush, also rows per pipeline
+            flush_interval: Seconds between flushes of a partially filled buffer
+            max_pending: Pending rows at which writers block until a flush made room
+            put_timeout: Seconds a blocked writer waits before raising, None waits
+                as long as it takes
+            max_attempts: Failed flushes after which a row is dropped, None retries
+                forever
+            on_drop: Called with the dropped rows (dead letter), e.g. to log or
+                persist them elsewhere
+        """
+        if max_rows < 1 or flush_interval <= 0 or max_pending < max_rows:
+            raise ValueError(
+                "max_rows and flush_interval must be positive, max_pending at least max_rows."
+            )
+        if max_attempts is not None and max_attempts < 1:
+            raise ValueError("max_attempts must be positive.")
+        self.__max_rows = max_rows
+        self.__flush_interval = flush_interval
+        self.__max_pending = max_pending
+        self.__put_timeout = put_timeout
+        self.__max_attempts = max_attempts
+        self.__on_drop = on_drop
+        # Failed flushes of pending rows, by key
+        self.__attempts: Dict[str, int] = {}
+        self.__flush_rows: Optional[Callable[[List[Any]], None]] = None
+        self.__pending: OrderedDict = OrderedDict()
+        self.__thread: Optional[threading.Thread] = None
+        self.__failing = False
+        self.__stats = dict(
+            puts=0, coalesced=0, flushed=0, flushes=0, errors=0, dropped=0
+        )
+        self.__reset_locks()
+        _buffers.add(self)
+        register_fork_handler(self)
+
+    def __reset_locks(self) -> None:
+        self.__lock = threading.Lock()
+        self.__changed = threading.Condition(self.__lock)
+        self.__flush_lock = threading.Lock()
+        self.__stop = threading.Event()
+
+    @property
+    def pending(self) -> int:
+        return len(self.__pending)
+
+    @property
+    def stats(self) -> dict:
+        """
+        Returns:
+            Counters of puts, coalesced puts, flushed rows, flushes, errors, dropped
+            rows and pending
+        """
+        return dict(self.__stats, pending=len(self.__pending))
+
+    @property
+    def running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def start(self, flush_rows: Callable[[List[Any]], None]) -> "WriteBuffer":
+        """
+        Start the flush thread, called by RedisClient.set_write_buffer.
+        Args:
+            flush_rows: Callable writing a list of pending rows in one round trip
+        """
+        self.__flush_rows = flush_rows
+        if not self.running:
+            self.__stop.clear()
+            self.__thread = threading.Thread(
+                target=self.__run, name="redis-write-buffer", daemon=True
+            )
+            self.__thread.start()
+        return self
+
+    def put(self, key: str, row: Any) -> None:
+        """
+        Queue a row, replacing a pending row of the same key. Blocks while the
+        buffer holds max_pending rows.
+        Args:
+            key: Full Redis key of the row
+            row: Row as passed to flush_rows
+        """
+        with self.__changed:
+            if key in self.__pending:
+                self.__pending[key] = row
+                self.__attempts.pop(key, None)
+                self.__stats["puts"] += 1
+                self.__stats["coalesced"] += 1
+                get_registry().increment("write_buffer_coalesced_total")
+                return
+            deadline = None
+            if self.__put_timeout is not None:
+                deadline = time.monotonic() + self.__put_timeout
+            while len(self.__pending) >= self.__max_pending:
+                self.__changed.notify_all()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise Exception(
+                        f"Write buffer is full, {self.__max_pending} rows wait for a flush."
+                    )
+                self.__changed.wait(remaining)
+            self.__pending[key] = row
+            self.__stats["puts"] += 1
+            if len(self.__pending) >= self.__max_rows:
+                self.__changed.notify_all()
+
+    def flush(self) -> int:
+        """
+        Write every pending row now.
+        Returns:
+            int: Number of flushed rows
+        """
+        flushed = 0
+        with self.__flush_lock:
+            while True:
+                with self.__changed:
+                    batch = self.__take()
+                if not batch or not self.__write(batch):
+                    return flushed
+                flushed += len(batch)
+
+    def __take(self) -> List[Tuple[str, Any]]:
+        """
+        Remove at most max_rows pending rows, oldest first. Caller holds the lock.
+        """
+        batch = []
+        while self.__pending and len(batch) < self.__max_rows:
+            batch.append(self.__pending.popitem(last=False))
+        if batch:
+            self.__changed.notify_all()
+        return batch
+
+    def __write(self, batch: List[Tuple[str, Any]]) -> bool:
+        try:
+            self.__flush_rows([row for _, row in batch])
+        except Exception as e:
+            print("Redis write buffer flush raised error : ", e)
+            get_registry().increment("errors_total", source="write_buffer")
+            self.__stats["errors"] += 1
+            dropped = []
+            with self.__changed:
+                # Keep rows for the next flush unless a newer write replaced them
+                for key, row in batch:
+                    if key in self.__pending:
+                        continue
+                    attempts = self.__attempts.get(key, 0) + 1
+                    if self.__max_attempts and attempts >= self.__max_attempts:
+                        self.__attempts.pop(key, None)
+                        dropped.append(row)
+                        continue
+                    self.__attempts[key] = attempts
+                    self.__pending[key] = row
+            if dropped:
+                self.__drop(dropped)
+            self.__failing = True
+            return False
+        if self.__attempts:
+            with self.__changed:
+                for key, _ in batch:
+                    self.__attempts.pop(key, None)
+        self.__failing = False
+        self.__stats["flushed"] += len(batch)
+        self.__stats["flushes"] += 1
+        return True
+
+    def __drop(self, rows: List[Any]) -> None:
+        print(
+            f"Redis write buffer dropped {len(rows)} rows after "
+            f"{self.__max_attempts} failed flushes"
+        )
+        get_registry().increment("write_buffer_dropped_total", len(rows))
+        self.__stats["dropped"] += len(rows)
+        if self.__on_drop is None:
+            return
+        try:
+            self.__on_drop(rows)
+        except Exception as e:
+            print("Redis write buffer on_drop raised error : ", e)
+            get_registry().increment("errors_total", source="write_buffer")
+
+    def __run(self) -> None:
+        while not self.__stop.is_set():
+            with self.__changed:
+                if len(self.__pending) < self.__max_rows:
+                    self.__changed.wait(self.__flush_interval)
+            if self.__pending:
+                self.flush()
+            if self.__failing:
+                # Redis is failing, back off instead of spinning on the same rows
+                self.__stop.wait(self.__flush_interval)
+
+    def close(self, timeout: Optional[float] = 5.0) -> int:
+        """
+        Stop the flush thread and write the remaining rows.
+        Returns:
+            int: Number of rows flushed on close
+        """
+        self.__stop.set()
+        with self.__changed:
+            self.__changed.notify_all()
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+            self.__thread = None
+        if self.__flush_rows is None:
+            return 0
+        return self.flush()
+
+    def reset_after_fork(self) -> None:
+        """
+        The flush thread does not survive fork, the child flushes its own rows only.
+        """
+        self.__reset_locks()
+        self.__pending = OrderedDict()
+        self.__attempts = {}
+        self.__thread = None
+        if self.__flush_rows is not None:
+            self.start(self.__flush_rows)
+
+
+def _flush_all() -> None:
+    for write_buffer in list(_buffers):
+        write_buffer.close()
+
+
+atexit.register(_flush_all)
@@ -0,0 +1,454 @@
+"""
+Near Cache
+In-process cache in front of RedisClient reads.
+
+This module provides:
+    - NearCache: bounded LRU with TTL keyed by full Redis key and by find pattern
+    - TrackingInvalidator: server-assisted invalidation with CLIENT TRACKING (BCAST)
+    - KeyspaceInvalidator: invalidation through keyspace notifications
+    - track_nodes: one TrackingInvalidator per node a controller reads from
+"""
+
+import time
+import threading
+
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from redis import Redis
+from redis.exceptions import ConnectionError, TimeoutError
+
+from .metrics import get_registry
+
+INVALIDATE_CHANNEL = "__redis__:invalidate"
+_GLOB_CHARS = frozenset("*?[\\")
+
+
+def _as_text(key: Union[bytes, str]) -> str:
+    return key.decode() if isinstance(key, bytes) else str(key)
+
+
+def _literal_prefix(pattern: str) -> str:
+    for ix, char in enumerate(pattern):
+        if char in _GLOB_CHARS:
+            return pattern[:ix]
+    return pattern
+
+
+class NearCache:
+    """
+    Bounded LRU cache with per-entry TTL.
+
+    Entries are either single rows (full key -> raw value) or find results
+    (match pattern -> list of (key, raw value)). Invalidating a key drops its own
+    entry and every cached pattern the key matches, so new and changed rows show up
+    in the next find.
+
+    A generation counter guards against filling the cache with a read that raced
+    with a write: readers take generation before going to Redis and the put is
+    ignored if any invalidation happened in between. This only holds when the
+    invalidations come from the node the value was read from, a replica applies a
+    write after the master does. Track every node reads go to (see track_nodes).
+
+    Patterns are indexed by their literal prefix (the category up to the first
+    glob), an invalidated key is matched only against patterns whose prefix it
+    starts with.
+    """
+
+    def __init__(
+        self, max_entries: int = 10000, ttl: float = 60.0, stale_ttl: float = 0.0
+    ):
+        """
+        Args:
+            max_entries: Maximum number of keys and patterns kept in memory
+            ttl: Seconds an entry is served before it is read from Redis again
+            stale_ttl: Seconds after ttl a find result is still served while one
+                background read refreshes it (stale-while-revalidate), 0 disables it
+        """
+        if max_entries < 1 or ttl <= 0 or stale_ttl < 0:
+            raise ValueError("max_entries and ttl must be positive, stale_ttl not negative.")
+        self.__max_entries = max_entries
+        self.__ttl = ttl
+        self.__stale_ttl = stale_ttl
+        self.__entries: OrderedDict = OrderedDict()
+        # Literal prefix -> patterns, and how many prefixes have each length
+        self.__patterns: Dict[str, Dict[str, None]] = {}
+        self.__prefix_lengths: Dict[int, int] = {}
+        self.__lock = threading.Lock()
+        self.__generation = 0
+        self.__stats = dict(
+            hits=0, stale_hits=0, misses=0, evictions=0, expirations=0, invalidations=0
+        )
+
+    @property
+    def generation(self) -> int:
+        return self.__generation
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Counters of hits, stale hits, misses, evictions, expirations,
+            invalidations and size
+        """
+        with self.__lock:
+            return dict(self.__stats, size=len(self.__entries))
+
+    def __get(
+        self, entry_key: Tuple[str, str], allow_stale: bool = False
+    ) -> Tuple[Any, bool]:
+        """
+        Returns:
+            Cached value or None, and whether the value is past its ttl
+        """
+        with self.__lock:
+            entry = self.__entries.get(entry_key)
+            if entry is None:
+                self.__stats["misses"] += 1
+                return None, False
+            expires_at, value = entry
+            now = time.monotonic()
+            if expires_at < now:
+                # Expired entries are kept for the stale window
+                if allow_stale and now <= expires_at + self.__stale_ttl:
+                    self.__entries.move_to_end(entry_key)
+                    self.__stats["stale_hits"] += 1
+                    return value, True
+                if now > expires_at + self.__stale_ttl:
+                    self.__drop(entry_key)
+                    self.__stats["expirations"] += 1
+                self.__stats["misses"] += 1
+                return None, False
+            self.__entries.move_to_end(entry_key)
+            self.__stats["hits"] += 1
+            return value, False
+
+    def __put(self, entry_key: Tuple[str, str], value: Any, generation: int) -> None:
+        with self.__lock:
+            if generation != self.__generation:
+                return
+            self.__entries[entry_key] = (time.monotonic() + self.__ttl, value)
+            self.__entries.move_to_end(entry_key)
+            if entry_key[0] == "pattern":
+                self.__add_pattern(entry_key[1])
+            while len(self.__entries) > self.__max_entries:
+                oldest_key = next(iter(self.__entries))
+                self.__drop(oldest_key)
+                self.__stats["evictions"] += 1
+
+    def __add_pattern(self, pattern: str) -> None:
+        prefix = _literal_prefix(pattern)
+        bucket = self.__patterns.get(prefix)
+        if bucket is None:
+            bucket = self.__patterns[prefix] = {}
+            self.__prefix_lengths[len(prefix)] = (
+                self.__prefix_lengths.get(len(prefix), 0) + 1
+            )
+        bucket[pattern] = None
+
+    def __drop(self, entry_key: Tuple[str, str]) -> None:
+        if self.__entries.pop(entry_key, None) is None or entry_key[0] != "pattern":
+            return
+        prefix = _literal_prefix(entry_key[1])
+        bucket = self.__patterns.get(prefix)
+        if bucket is None:
+            return
+        bucket.pop(entry_key[1], None)
+        if not bucket:
+            del self.__patterns[prefix]
+            self.__prefix_lengths[len(prefix)] -= 1
+            if not self.__prefix_lengths[len(prefix)]:
+                del self.__prefix_lengths[len(prefix)]
+
+    def __matching_patterns(self, key: str) -> List[str]:
+        matched = []
+        for length in self.__prefix_lengths:
+            if length > len(key):
+                continue
+            bucket = self.__patterns.get(key[:length])
+            if bucket:
+                matched += [p for p in bucket if fnmatchcase(key, p)]
+        return matched
+
+    def get(self, key: Union[bytes, str]) -> Optional[bytes]:
+        """
+        Args:
+            key: Full Redis key
+        Returns:
+            Cached raw value or None
+        """
+        return self.__get(("key", _as_text(key)))[0]
+
+    def set(self, key: Union[bytes, str], value: bytes, generation: int) -> None:
+        """
+        Args:
+            key: Full Redis key
+            value: Raw value read from Redis
+            generation: Cache generation taken before the value was read
+        """
+        self.__put(("key", _as_text(key)), value, generation)
+
+    def get_pattern(self, pattern: str) -> Optional[List[Tuple[bytes, bytes]]]:
+        """
+        Args:
+            pattern: Match pattern built by RedisSchema.merge_key
+        Returns:
+            Cached list of (key, raw value) pairs or None
+        """
+        return self.__get(("pattern", pattern))[0]
+
+    def get_stale_pattern(
+        self, pattern: str
+    ) -> Tuple[Optional[List[Tuple[bytes, bytes]]], bool]:
+        """
+        Like get_pattern, also serving a result up to stale_ttl seconds past its ttl.
+        Args:
+            pattern: Match pattern built by RedisSchema.merge_key
+        Returns:
+            Cached list of (key, raw value) pairs or None, and True if the list is
+            stale and should be refreshed
+        """
+        return self.__get(("pattern", pattern), allow_stale=True)
+
+    def set_pattern(
+        self, pattern: str, rows: List[Tuple[bytes, bytes]], generation: int
+    ) -> None:
+        """
+        Args:
+            pattern: Match pattern built by RedisSchema.merge_key
+            rows: List of (key, raw value) pairs found for the pattern
+            generation: Cache generation taken before the rows were read
+        """
+        self.__put(("pattern", pattern), rows, generation)
+
+    def invalidate(self, key: Union[bytes, str]) -> None:
+        """
+        Drop a key and every cached pattern matching it.
+        Args:
+            key: Full Redis key
+        """
+        key = _as_text(key)
+        with self.__lock:
+            self.__generation += 1
+            self.__stats["invalidations"] += 1
+            self.__drop(("key", key))
+            for pattern in self.__matching_patterns(key):
+                self.__drop(("pattern", pattern))
+
+    def clear(self) -> None:
+        """
+        Drop every entry, used when invalidation messages may have been lost.
+        """
+        with self.__lock:
+            self.__generation += 1
+            self.__stats["invalidations"] += len(self.__entries)
+            self.__entries.clear()
+            self.__patterns.clear()
+            self.__prefix_lengths.clear()
+
+
+class TrackingInvalidator:
+    """
+    Invalidate a NearCache with Redis client-side tracking in broadcasting mode.
+
+    A dedicated connection subscribes to __redis__:invalidate and a second one turns
+    on CLIENT TRACKING ... REDIRECT <subscriber> BCAST for the given prefixes, so
+    every change of a matching key on the node is pushed to this process. Replicas
+    push the writes they apply through replication as well, so track the master and
+    every replica that serves reads (see track_nodes). On any connection loss the
+    cache is cleared.
+    """
+
+    def __init__(
+        self,
+        cache: NearCache,
+        redis: Redis,
+        prefixes: Optional[List[str]] = None,
+        reconnect_interval: float = 1.0,
+    ):
+        """
+        Args:
+            cache: NearCache to invalidate
+            redis: Redis client of the node to track
+            prefixes: Key prefixes to track (e.g. schema category), all keys if None
+            reconnect_interval: Seconds to wait before reconnecting after an error
+        """
+        self.__cache = cache
+        self.__pool = redis.connection_pool
+        self.__prefixes = prefixes or []
+        self.__reconnect_interval = reconnect_interval
+        self.__subscriber = None
+        self.__tracker = None
+        self.__stopped = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def start(self) -> "TrackingInvalidator":
+        try:
+            self.__connect()
+        except (ConnectionError, TimeoutError, OSError) as e:
+            # The thread keeps reconnecting until the node answers
+            print("Redis near cache tracking error : ", e)
+            get_registry().increment("errors_total", source="near_cache_tracking")
+            self.__disconnect()
+        self.__thread = threading.Thread(
+            target=self.__run, name="redis-near-cache-tracking", daemon=True
+        )
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.__stopped.set()
+        if self.__thread is not None:
+            self.__thread.join()
+        self.__disconnect()
+
+    def __make_connection(self):
+        # Dedicated RESP2 connections, so the redirected invalidation messages are
+        # read as plain pub/sub replies whatever protocol the pool speaks.
+        # Maintenance notifications (redis-py >= 7) require RESP3, leave them out.
+        connection_kwargs = {
+            key: value
+            for key, value in self.__pool.connection_kwargs.items()
+            if not key.startswith("maint_notifications")
+        }
+        connection_kwargs["protocol"] = 2
+        connection = self.__pool.connection_class(**connection_kwargs)
+        connection.connect()
+        return connection
+
+    def __connect(self) -> None:
+        subscriber = self.__make_connection()
+        subscriber.send_command("CLIENT", "ID")
+        client_id = subscriber.read_response()
+        subscriber.send_command("SUBSCRIBE", INVALIDATE_CHANNEL)
+        subscriber.read_response()
+        tracker = self.__make_connection()
+        arguments = ["CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST"]
+        for prefix in self.__prefixes:
+            arguments += ["PREFIX", prefix]
+        tracker.send_command(*arguments)
+        tracker.read_response()
+        self.__subscriber, self.__tracker = subscriber, tracker
+
+    def __disconnect(self) -> None:
+        for connection in (self.__subscriber, self.__tracker):
+            if connection is not None:
+                connection.disconnect()
+        self.__subscriber = self.__tracker = None
+
+    def __handle(self, response) -> None:
+        if not isinstance(response, list) or len(response) < 3:
+            return
+        if _as_text(response[0]) != "message":
+            return
+        keys = response[2]
+        if keys is None:  # FLUSHALL / FLUSHDB
+            self.__cache.clear()
+            return
+        for key in keys:
+            self.__cache.invalidate(key)
+
+    def __run(self) -> None:
+        while not self.__stopped.is_set():
+            try:
+                if self.__subscriber is None:
+                    self.__connect()
+                    # Invalidations sent while disconnected are lost
+                    self.__cache.clear()
+                if self.__subscriber.can_read(timeout=0.5):
+                    self.__handle(self.__subscriber.read_response())
+            except (ConnectionError, TimeoutError, OSError) as e:
+                print("Redis near cache tracking error : ", e)
+                get_registry().increment("errors_total", source="near_cache_tracking")
+                self.__cache.clear()
+                self.__disconnect()
+                self.__stopped.wait(self.__reconnect_interval)
+
+
+class KeyspaceInvalidator:
+    """
+    Invalidate a NearCache with keyspace notifications, for servers where client
+    tracking is not available. Requires notify-keyspace-events to include K and the
+    event classes of the written types (e.g. "KA"), set configure=True to apply it.
+    """
+
+    def __init__(
+        self,
+        cache: NearCache,
+        redis: Redis,
+        prefixes: Optional[List[str]] = None,
+        configure: bool = False,
+    ):
+        """
+        Args:
+            cache: NearCache to invalidate
+            redis: Redis client of the node to subscribe (master node)
+            prefixes: Key prefixes to watch (e.g. schema category), all keys if None
+            configure: Run CONFIG SET notify-keyspace-events KA on the node
+        """
+        self.__cache = cache
+        self.__redis = redis
+        self.__prefixes = prefixes or [""]
+        self.__configure = configure
+        self.__db = redis.connection_pool.connection_kwargs.get("db", 0)
+        self.__thread = None
+
+    def __handle(self, message: dict) -> None:
+        channel = _as_text(message["channel"])
+        self.__cache.invalidate(channel.split(":", 1)[1])
+
+    def __on_error(self, error, pubsub, thread) -> None:
+        # Notifications sent while disconnected are lost, get_message reconnects
+        print("Redis near cache keyspace error : ", error)
+        get_registry().increment("errors_total", source="near_cache_keyspace")
+        self.__cache.clear()
+        time.sleep(0.5)
+
+    def start(self) -> "KeyspaceInvalidator":
+        if self.__configure:
+            self.__redis.config_set("notify-keyspace-events", "KA")
+        pubsub = self.__redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(
+            **{
+                f"__keyspace@{self.__db}__:{prefix}*": self.__handle
+                for prefix in self.__prefixes
+            }
+        )
+        self.__thread = pubsub.run_in_thread(
+            sleep_time=0.5, daemon=True, exception_handler=self.__on_error
+        )
+        return self
+
+    def stop(self) -> None:
+        if self.__thread is not None:
+            self.__thread.stop()
+            self.__thread.join()
+
+
+def track_nodes(
+    cache: NearCache,
+    controller,
+    prefixes: Optional[List[str]] = None,
+    reconnect_interval: float = 1.0,
+) -> List[TrackingInvalidator]:
+    """
+    Start a TrackingInvalidator on the master and on every replica of a controller,
+    so a value read from any node is invalidated by that node. Replicas that are not
+    reachable yet are tracked once they answer.
+    Args:
+        cache: NearCache to invalidate
+        controller: RedisController the cached client reads from
+        prefixes: Key prefixes to track (e.g. schema category), all keys if None
+        reconnect_interval: Seconds to wait before reconnecting after an error
+    Returns:
+        [TrackingInvalidator]: Started invalidators, stop them when the cache is dropped
+    """
+    clients = [controller.write_cli] + [
+        node.client if node.client is not None else Redis(**node.config)
+        for node in controller.nodes
+    ]
+    return [
+        TrackingInvalidator(cache, client, prefixes, reconnect_interval).start()
+        for client in clients
+    ]
@@ -0,0 +1,178 @@
+"""
+Redis Compression
+Optional compression stage of the value encode/decode path.
+
+Payloads are compressed only above a size threshold and get a small header, so
+compressed and plain values (e.g. written before compression was enabled) can live
+side by side and both decode.
+
+    header = b"\\x00RC" + codec id (1 byte)
+
+JSON and MessagePack payloads of a document never start with a NUL byte, so the
+header can not collide with an uncompressed value.
+"""
+
+import zlib
+
+from typing import Any, Dict, Optional, Union
+from .errors import RedisValueError
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - optional dependency
+    lz4_frame = None
+
+MAGIC = b"\x00RC"
+HEADER_SIZE = len(MAGIC) + 1
+
+
+class Codec:
+    """
+    Compression algorithm identified by a one byte id in the payload header.
+    """
+
+    name: str = ""
+    codec_id: int = 0
+
+    def compress(self, payload: bytes, level: Optional[int] = None) -> bytes:
+        raise NotImplementedError
+
+    def decompress(self, payload: bytes) -> bytes:
+        raise NotImplementedError
+
+
+class ZlibCodec(Codec):
+    name, codec_id = "zlib", 1
+
+    def compress(self, payload: bytes, level: Optional[int] = None) -> bytes:
+        return zlib.compress(payload, -1 if level is None else level)
+
+    def decompress(self, payload: bytes) -> bytes:
+        return zlib.decompress(payload)
+
+
+class ZstdCodec(Codec):
+    name, codec_id = "zstd", 2
+
+    def __init__(self):
+        if zstandard is None:
+            raise RedisValueError("zstd compression requires the zstandard package.")
+
+    def compress(self, payload: bytes, level: Optional[int] = None) -> bytes:
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress(
+            payload
+        )
+
+    def decompress(self, payload: bytes) -> bytes:
+        return zstandard.ZstdDecompressor().decompress(payload)
+
+
+class Lz4Codec(Codec):
+    name, codec_id = "lz4", 3
+
+    def __init__(self):
+        if lz4_frame is None:
+            raise RedisValueError("lz4 compression requires the lz4 package.")
+
+    def compress(self, payload: bytes, level: Optional[int] = None) -> bytes:
+        return lz4_frame.compress(payload, compression_level=level or 0)
+
+    def decompress(self, payload: bytes) -> bytes:
+        return lz4_frame.decompress(payload)
+
+
+codecs = {codec.name: codec for codec in (ZlibCodec, ZstdCodec, Lz4Codec)}
+codecs_by_id = {codec.codec_id: codec for codec in codecs.values()}
+
+
+def is_compressed(payload: bytes) -> bool:
+    return payload[: len(MAGIC)] == MAGIC and len(payload) >= HEADER_SIZE
+
+
+def decompress_payload(payload: bytes) -> bytes:
+    """
+    Strip the header and decompress, return plain payloads unchanged.
+    Args:
+        payload: Bytes read from Redis
+    Returns:
+        bytes: Serialized value
+    """
+    if not is_compressed(payload):
+        return payload
+    codec_class = codecs_by_id.get(payload[len(MAGIC)])
+    if codec_class is None:
+        raise RedisValueError(f"Unknown compression codec id: {payload[len(MAGIC)]}")
+    return codec_class().decompress(payload[HEADER_SIZE:])
+
+
+class Compressor:
+    """
+    Compresses payloads larger than threshold with a codec and keeps statistics.
+
+    Attributes:
+        compressed: Number of payloads stored compressed
+        skipped: Number of payloads below threshold or not shrinking
+        bytes_in: Serialized bytes of compressed payloads
+        bytes_out: Stored bytes of compressed payloads, header included
+    """
+
+    def __init__(
+        self,
+        codec: Union[str, Codec] = "zlib",
+        threshold: int = 1024,
+        level: Optional[int] = None,
+    ):
+        """
+        Args:
+            codec: zlib, zstd, lz4 or a Codec object
+            threshold: Payloads shorter than this many bytes are stored plain
+            level: Codec specific compression level, codec default if None
+        """
+        if isinstance(codec, str):
+            if codec not in codecs:
+                raise RedisValueError(f"Unknown compression codec: {codec}")
+            codec = codecs[codec]()
+        self.codec = codec
+        self.threshold = threshold
+        self.level = level
+        self.__header = MAGIC + bytes([codec.codec_id])
+        self.compressed = self.skipped = self.bytes_in = self.bytes_out = 0
+
+    def compress(self, payload: bytes) -> bytes:
+        """
+        Args:
+            payload: Serialized value
+        Returns:
+            bytes: Header and compressed payload, or the payload unchanged
+        """
+        if len(payload) < self.threshold:
+            self.skipped += 1
+            return payload
+        compressed = self.__header + self.codec.compress(payload, self.level)
+        if len(compressed) >= len(payload):
+            self.skipped += 1
+            return payload
+        self.compressed += 1
+        self.bytes_in += len(payload)
+        self.bytes_out += len(compressed)
+        return compressed
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Counters and ratio (serialized bytes / stored bytes of compressed values)
+        """
+        return dict(
+            codec=self.codec.name,
+            compressed=self.compressed,
+            skipped=self.skipped,
+            bytes_in=self.bytes_in,
+            bytes_out=self.bytes_out,
+            ratio=self.bytes_in / self.bytes_out if self.bytes_out else 1.0,
+        )
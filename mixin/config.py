@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -22,6 +23,25 @@ class Configs(BaseSettings):
     REP_2_DB: int = 0
     REP_2_USER: str = "default"
 
+    BALANCER: str = "round_robin"
+    MAX_REPLICATION_LAG: Optional[int] = None
+    HEALTH_CHECK_INTERVAL: float = 0
+    REPLICA_RETRY_INTERVAL: float = 5
+    MASTER_RETRY_INTERVAL: float = 5
+    CONSISTENCY: str = "eventual"
+    READ_AFTER_WRITE_MS: int = 1000
+    WAIT_REPLICAS: Optional[int] = None
+    WAIT_TIMEOUT_MS: int = 100
+
+    MASTER_POOL_MAX_CONNECTIONS: int = 50
+    REPLICA_POOL_MAX_CONNECTIONS: int = 50
+    POOL_BLOCKING: bool = True
+    POOL_TIMEOUT: float = 5
+    POOL_HEALTH_CHECK_INTERVAL: int = 0
+    SOCKET_TIMEOUT: Optional[float] = None
+    SOCKET_CONNECT_TIMEOUT: Optional[float] = None
+    SOCKET_KEEPALIVE: bool = True
+
     model_config = SettingsConfigDict(env_prefix="REDIS_", env_file="../.env")
 
     @property
@@ -61,3 +81,17 @@ master_config = dict(
     db=redis_configs.DB,
     username=redis_configs.MASTER_USER,
 )
+pool_config = dict(
+    blocking=redis_configs.POOL_BLOCKING,
+    timeout=redis_configs.POOL_TIMEOUT,
+    socket_timeout=redis_configs.SOCKET_TIMEOUT,
+    socket_connect_timeout=redis_configs.SOCKET_CONNECT_TIMEOUT,
+    socket_keepalive=redis_configs.SOCKET_KEEPALIVE,
+    health_check_interval=redis_configs.POOL_HEALTH_CHECK_INTERVAL,
+)
+master_pool_config = dict(
+    pool_config, max_connections=redis_configs.MASTER_POOL_MAX_CONNECTIONS
+)
+replica_pool_config = dict(
+    pool_config, max_connections=redis_configs.REPLICA_POOL_MAX_CONNECTIONS
+)
@@ -1,8 +1,103 @@
-from redis import Redis
+import time
+
+from queue import LifoQueue
+from typing import Optional
+from redis import Redis, ConnectionPool, BlockingConnectionPool
 from redis.retry import Retry
 from redis.backoff import ExponentialBackoff
 from redis.exceptions import ConnectionError, TimeoutError, AuthenticationError
 
+from .metrics import get_registry
+
+
+class PoolStatsMixin:
+    """
+    Adds acquisition counters and the time spent waiting for a free connection to a
+    redis-py connection pool. Connecting a new connection does not count as wait.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.acquired = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        super().__init__(*args, **kwargs)
+
+    def get_connection(self, *args, **kwargs):
+        connection = super().get_connection(*args, **kwargs)
+        self.acquired += 1
+        return connection
+
+    def record_wait(self, waited: float) -> None:
+        self.wait_time_total += waited
+        self.wait_time_max = max(self.wait_time_max, waited)
+
+    def connection_counts(self) -> tuple:
+        """
+        Returns:
+            (in_use, idle) connection counts
+        """
+        raise NotImplementedError
+
+    @property
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: in_use, idle, max_connections, acquired and wait time in seconds
+        """
+        in_use, idle = self.connection_counts()
+        return dict(
+            in_use=in_use,
+            idle=idle,
+            max_connections=self.max_connections,
+            acquired=self.acquired,
+            wait_time_total=self.wait_time_total,
+            wait_time_max=self.wait_time_max,
+            wait_time_avg=self.wait_time_total / self.acquired if self.acquired else 0.0,
+        )
+
+
+class StatsConnectionPool(PoolStatsMixin, ConnectionPool):
+    """
+    ConnectionPool raising an error once max_connections are in use.
+    """
+
+    def connection_counts(self) -> tuple:
+        return len(self._in_use_connections), len(self._available_connections)
+
+
+class _TimedLifoQueue(LifoQueue):
+    """
+    LifoQueue of a blocking pool, reports how long every get blocked to on_wait.
+    """
+
+    on_wait = None
+
+    def get(self, block=True, timeout=None):
+        started = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            if self.on_wait is not None:
+                self.on_wait(time.perf_counter() - started)
+
+
+class StatsBlockingConnectionPool(PoolStatsMixin, BlockingConnectionPool):
+    """
+    BlockingConnectionPool waiting up to timeout seconds for a free connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("queue_class", _TimedLifoQueue)
+        super().__init__(*args, **kwargs)
+
+    def reset(self):
+        super().reset()
+        self.pool.on_wait = self.record_wait
+
+    def connection_counts(self) -> tuple:
+        idle = sum(1 for connection in list(self.pool.queue) if connection is not None)
+        return len(self._connections) - idle, idle
+
 
 class RedisConn:
     """
@@ -10,12 +105,13 @@ class RedisConn:
 
     Args:
         config_dict: A dictionary containing the Redis connection details.
+        pool_config: A dictionary containing the connection pool settings.
 
     Returns:
-        Creates a Redis connection object.
+        Creates a Redis connection object backed by its own connection pool.
     """
 
-    def __init__(self, config_dict):
+    def __init__(self, config_dict, pool_config: Optional[dict] = None):
         """
         Args:
             config_dict: RedisConfig = dict(
@@ -24,23 +120,62 @@ class RedisConn:
                 port = int
                 db = int
             )
+            pool_config: PoolConfig = dict(
+                max_connections = int
+                blocking = bool            # wait for a free connection instead of raising
+                timeout = float            # seconds to wait when blocking
+                socket_timeout = float
+                socket_connect_timeout = float
+                socket_keepalive = bool
+                health_check_interval = int
+            )
         """
+        self.config_dict = dict(config_dict)
+        self.pool_config = dict(pool_config or {})
         try:
-            self.redis = Redis(
-                **config_dict,
-                retry=Retry(ExponentialBackoff(cap=5.12, base=0.1), retries=5),
-                retry_on_timeout=True,
-                retry_on_error=[ConnectionError, TimeoutError],
-            )
+            self.redis = self.create_client()
         except AuthenticationError as e:
             print(f"Redis Authentication error: {e}")
+            get_registry().increment("errors_total", source="authentication")
         except ConnectionError as e:
             print(f"Redis Connection error: {e}")
+            get_registry().increment("errors_total", source="connection")
         except Exception as e:
             print(f"Redis Error: {e}")
+            get_registry().increment("errors_total", source="connection")
         if not self.check_connection():
             raise Exception("Connection error")
 
+    def create_pool(self) -> ConnectionPool:
+        """
+        Build the connection pool of the node from config_dict and pool_config.
+        Returns:
+            StatsConnectionPool or StatsBlockingConnectionPool
+        """
+        pool_config = dict(self.pool_config)
+        blocking = pool_config.pop("blocking", True)
+        timeout = pool_config.pop("timeout", 5)
+        pool_kwargs = {k: v for k, v in pool_config.items() if v is not None}
+        if blocking:
+            pool_class, pool_kwargs["timeout"] = StatsBlockingConnectionPool, timeout
+        else:
+            pool_class = StatsConnectionPool
+        return pool_class(
+            **self.config_dict,
+            **pool_kwargs,
+            retry=Retry(ExponentialBackoff(cap=5.12, base=0.1), retries=5),
+            retry_on_timeout=True,
+            retry_on_error=[ConnectionError, TimeoutError],
+        )
+
+    def create_client(self) -> Redis:
+        """
+        Returns:
+            Redis client using a new connection pool
+        """
+        self.pool = self.create_pool()
+        return Redis(connection_pool=self.pool)
+
     def check_connection(self):
         """
         Check if the connection is successful
@@ -55,11 +190,23 @@ class RedisConn:
             port: Port number of the Redis server.
             db: Database number to connect to.
         Returns:
-            Set new config to redis and creates a new connection. Returns the Redis client object.
+            Set new config to redis and creates a new connection with the same pool
+            settings. Returns the Redis client object.
         """
-        self.redis = Redis(host=host, password=password, port=port, db=db)
+        old_pool = getattr(self, "pool", None)
+        self.config_dict.update(host=host, password=password, port=port, db=db)
+        self.redis = self.create_client()
+        if old_pool is not None:
+            old_pool.disconnect()
         return self.redis
 
+    @property
+    def stats(self) -> dict:
+        """
+        Returns the connection pool statistics of the node.
+        """
+        return self.pool.stats
+
     @property
     def client(self) -> Redis:
         """
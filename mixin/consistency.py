@@ -0,0 +1,74 @@
+"""
+Read-your-writes consistency
+Write state of the current session, used by RedisController to route reads.
+
+This module provides:
+    - WriteSession: time and master replication offset of the last write
+    - session: context manager scoping writes and reads to a fresh session
+    - current_session / ensure_session: access to the session of the running context
+
+Sessions live in a ContextVar, so every thread and every asyncio task that sets
+its own session only sees its own writes. Without an explicit session a session is
+created on the first write of the current context.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+consistency_modes = ("eventual", "master_window", "offset", "wait")
+
+
+class WriteSession:
+    """
+    Attributes:
+        last_write_at: time.monotonic() of the last write that must be read from master
+        offset: Master replication offset right after the last write
+    """
+
+    __slots__ = ("last_write_at", "offset")
+
+    def __init__(self):
+        self.last_write_at: float = 0.0
+        self.offset: int = 0
+
+
+_current_session: ContextVar[Optional[WriteSession]] = ContextVar(
+    "redis_write_session", default=None
+)
+
+
+def current_session() -> Optional[WriteSession]:
+    """
+    Returns:
+        WriteSession of the running context, None if nothing was written yet
+    """
+    return _current_session.get()
+
+
+def ensure_session() -> WriteSession:
+    """
+    Returns:
+        WriteSession of the running context, created if missing
+    """
+    write_session = _current_session.get()
+    if write_session is None:
+        write_session = WriteSession()
+        _current_session.set(write_session)
+    return write_session
+
+
+@contextmanager
+def session() -> Iterator[WriteSession]:
+    """
+    Scope read-your-writes to a block, e.g. one web request.
+    Example:
+        >>> with session():
+        >>>     redis_client.store(keys=[...], value={...})
+        >>>     redis_client.find(keys_dict={...})  # sees the stored row
+    """
+    token = _current_session.set(WriteSession())
+    try:
+        yield _current_session.get()
+    finally:
+        _current_session.reset(token)
@@ -1,18 +1,219 @@
-from .config import master_config, redis_replica_redis_configs
+import sys
+import time
+import threading
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple, Union
+
+from redis.client import Pipeline
+from .config import (
+    master_config,
+    redis_replica_redis_configs,
+    redis_configs,
+    master_pool_config,
+    replica_pool_config,
+)
 from .conn import RedisConn, Redis
+from .balancer import Balancer, ReplicaNode, balancers
+from .consistency import (
+    WriteSession,
+    consistency_modes,
+    current_session,
+    ensure_session,
+)
+from .metrics import get_registry
+from .utils import register_fork_handler
 
 
-class RedisController:
+class WritePipeline(Pipeline):
+    """
+    Pipeline of a WriteBatch. Appends INFO replication to read the master offset
+    in the same round trip and, when the batch holds a connection, runs on it and
+    leaves it checked out after execute.
+    """
+
+    def __init__(self, batch: "WriteBatch", client: Redis, transaction: bool):
+        super().__init__(
+            client.connection_pool, client.response_callbacks, transaction, None
+        )
+        self.__batch = batch
+        self.connection = batch.connection
+
+    def reset(self) -> None:
+        # The connection of the batch goes back to the pool when the batch ends
+        held = self.connection is not None and self.connection is self.__batch.connection
+        if held:
+            self.connection = None
+        super().reset()
+        if held:
+            self.connection = self.__batch.connection
+
+    def execute(self, raise_on_error: bool = True) -> list:
+        if not self.command_stack:
+            return super().execute(raise_on_error)
+        read_offset = self.__batch.read_offset
+        if read_offset:
+            self.info("replication")
+        results = super().execute(raise_on_error)
+        self.__batch.executed = True
+        if not read_offset:
+            return results
+        offset = results[-1].get("master_repl_offset", 0)
+        self.__batch.offset = max(self.__batch.offset, offset)
+        return results[:-1]
 
-    __master_node = None
-    __conn_pool: list = []
-    __active_reader: int = 0
 
-    def __init__(self, master_redis_config, replica_redis_configs: list):
+class WriteBatch:
+    """
+    Write pipelines of one client call, see RedisController.write_batch.
+
+    Attributes:
+        offset: Highest master replication offset read after a pipeline
+        executed: True once a pipeline of the batch was executed
+    """
+
+    def __init__(self, client: Redis, read_offset: bool = False, connection=None):
+        self.__client = client
+        self.read_offset = read_offset
+        self.connection = connection
+        self.offset = 0
+        self.executed = False
+
+    def pipeline(self, transaction: bool = False) -> WritePipeline:
+        return WritePipeline(self, self.__client, transaction)
+
+
+class RedisController:
+    """
+    Master and replica clients of a master-replica setup. Nothing is connected
+    until the first use (or an explicit connect()), nodes are then connected
+    concurrently. A forked child process drops the inherited clients and connects
+    again on its first use.
+    """
+
+    def __init__(
+        self,
+        master_redis_config,
+        replica_redis_configs: list,
+        balancer: Union[str, Balancer] = "round_robin",
+        max_replication_lag: Optional[int] = None,
+        health_check_interval: float = 0,
+        replica_retry_interval: float = 5.0,
+        master_retry_interval: float = 5.0,
+        master_pool_config: Optional[dict] = None,
+        replica_pool_config: Optional[dict] = None,
+        consistency: str = "eventual",
+        read_after_write_ms: int = 1000,
+        wait_replicas: Optional[int] = None,
+        wait_timeout_ms: int = 100,
+        lazy: bool = True,
+    ):
+        """
+        Args:
+            master_redis_config: Connection config of the master node
+            replica_redis_configs: Connection configs of the replica nodes, empty to
+                serve reads from the master
+            balancer: Replica selection strategy, one of round_robin, least_outstanding,
+                power_of_two or a Balancer object
+            max_replication_lag: Replicas lagging more bytes behind the master are only
+                used when no other replica is available
+            health_check_interval: Seconds between background health checks, 0 disables
+            replica_retry_interval: Seconds until an ejected or unreachable replica is
+                probed again in the background on the next read, so it rejoins the
+                pool without health checks
+            master_retry_interval: Seconds writes fail fast after the master could
+                not be connected, before one of them tries to connect it again
+            master_pool_config: Connection pool settings of the master, see RedisConn
+            replica_pool_config: Connection pool settings of every replica
+            consistency: How reads see the writes of the same session (see
+                consistency.session):
+                eventual: reads go to any replica
+                master_window: reads go to master for read_after_write_ms after a write
+                offset: reads go to replicas that reached the master offset of the
+                    last write, to master while none has
+                wait: like offset, and writes block until wait_replicas replicas
+                    caught up; on timeout reads fall back to master_window
+            read_after_write_ms: Milliseconds reads are served by master after a write
+            wait_replicas: Replicas a write waits for in wait mode, all when None
+            wait_timeout_ms: Maximum milliseconds a write waits in wait mode
+            lazy: Connect on first use, False connects in the constructor
+        """
+        if consistency not in consistency_modes:
+            raise Exception(
+                f"Unknown consistency: {consistency}, choose one of "
+                f"{', '.join(consistency_modes)}"
+            )
         self.master_redis_config = master_redis_config
         self.replica_redis_configs = replica_redis_configs
-        self.set_master_node()
-        self.set_all_replicas()
+        self.master_pool_config = master_pool_config
+        self.replica_pool_config = replica_pool_config
+        self.__master_node: Optional[Redis] = None
+        self.__nodes: List[ReplicaNode] = []
+        self.__balancer = balancers[balancer]() if isinstance(balancer, str) else balancer
+        self.__max_replication_lag = max_replication_lag
+        self.__consistency = consistency
+        self.__server_version: Optional[Tuple[int, ...]] = None
+        self.__read_after_write = read_after_write_ms / 1000
+        self.__wait_replicas = wait_replicas
+        self.__wait_timeout = wait_timeout_ms / 1000
+        self.__master_read_node: Optional[ReplicaNode] = None
+        self.__health_check_stop = threading.Event()
+        self.__health_check_thread: Optional[threading.Thread] = None
+        self.__health_check_interval = health_check_interval
+        self.__replica_retry_interval = replica_retry_interval
+        self.__master_retry_interval = master_retry_interval
+        self.__master_retry_at = 0.0
+        self.__master_future: Optional[Future] = None
+        self.__connected = False
+        self.__connect_lock = threading.Lock()
+        register_fork_handler(self)
+        if not lazy:
+            self.connect()
+
+    @property
+    def connected(self) -> bool:
+        return self.__connected
+
+    def connect(self) -> None:
+        """
+        Connect the master and every replica concurrently. Returns once at least one
+        replica answered, replicas still connecting join the pool when they are
+        ready. The master connects in the background, writes wait for it, reads do
+        not. A master that did not answer is connected again by a later write.
+        Calling it again on a connected controller is a no-op.
+        """
+        if self.__connected:
+            return
+        with self.__connect_lock:
+            if self.__connected:
+                return
+            executor = ThreadPoolExecutor(
+                max_workers=len(self.replica_redis_configs or []) + 1,
+                thread_name_prefix="redis-connect",
+            )
+            try:
+                self.__master_future = executor.submit(self.set_master_node)
+                self.set_all_replicas(executor=executor)
+            finally:
+                executor.shutdown(wait=False)
+            self.__connected = True
+        if self.__health_check_interval:
+            self.start_health_checks(interval=self.__health_check_interval)
+
+    def reset_after_fork(self) -> None:
+        """
+        Forget the connections inherited from the parent process, the child connects
+        on its first use. Called in the child after os.fork().
+        """
+        self.__connect_lock = threading.Lock()
+        self.__connected = False
+        self.__master_node = self.__master_read_node = None
+        self.__master_future = None
+        self.__master_retry_at = 0.0
+        self.__nodes = []
+        self.__health_check_stop = threading.Event()
+        self.__health_check_thread = None
 
     def set_master_node(self):
         """
@@ -23,63 +224,391 @@ class RedisController:
         if not self.master_redis_config:
             raise Exception("No master configs are given to create a connection")
         try:
-            master_node = RedisConn(self.master_redis_config).client
+            master_node = RedisConn(
+                self.master_redis_config, pool_config=self.master_pool_config
+            ).client
             if master_node.ping():
                 self.__master_node = master_node
+                self.__master_read_node = ReplicaNode(
+                    config=self.master_redis_config, client=master_node
+                )
         except Exception as e:
             print(
                 f"Redis Connection Error {self.master_redis_config['host']} raised error : ",
                 e,
             )
+            get_registry().increment("errors_total", source="connection")
+            self.__master_retry_at = time.monotonic() + self.__master_retry_interval
 
-    def set_all_replicas(self):
+    def set_all_replicas(self, executor: Optional[ThreadPoolExecutor] = None):
         """
-        Create connections to all the replicas given in the configuration.
+        Create connections to all the replicas given in the configuration, in
+        parallel. Returns once one replica is connected, slower ones are attached in
+        the background. Replicas that cannot be connected are kept and retried by the
+        health checks. Without replica configs reads are served by the master.
+        Args:
+            executor: Executor to connect on, a temporary one if not given
         Returns:
             None
         """
         if not self.replica_redis_configs:
-            raise Exception("No replica configs are given to create connections")
-        for replica_config in self.replica_redis_configs:
-            replica_redis_cli = None
-            try:
+            self.__nodes = []
+            return
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(
+                max_workers=len(self.replica_redis_configs),
+                thread_name_prefix="redis-connect",
+            )
+        futures = {
+            executor.submit(self.connect_replica, replica_config): ReplicaNode(
+                config=replica_config
+            )
+            for replica_config in self.replica_redis_configs
+        }
+        if own_executor:
+            executor.shutdown(wait=False)
+        nodes = list(futures.values())
+        for future, node in futures.items():
+            future.add_done_callback(
+                lambda done, node=node: self.__attach_replica(node, done.result())
+            )
+        pending = set(futures)
+        while pending and not any(node.available for node in nodes):
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                self.__attach_replica(futures[future], future.result())
+        self.__nodes = nodes
+        if not any(node.available for node in nodes):
+            raise Exception(
+                "No replicas are created for the pool. Check the configurations."
+            )
 
-                replica_redis_cli = RedisConn(replica_config).client
-            except Exception as e:
-                print(
-                    f"Redis Connection Error {replica_config['host']} raised error : ",
-                    e,
-                )
+    @staticmethod
+    def __attach_replica(node: ReplicaNode, client: Optional[Redis]) -> None:
+        if client is not None and node.client is None:
+            node.client = client
+            node.mark_success()
+
+    def connect_replica(self, replica_config: dict) -> Optional[Redis]:
+        """
+        Args:
+            replica_config: Connection config of a replica
+        Returns:
+            Redis_Client: Connected client or None if the replica is not reachable
+        """
+        try:
+            replica_redis_cli = RedisConn(
+                replica_config, pool_config=self.replica_pool_config
+            ).client
             # If replica node is connected successfully, add it to the pool
             if replica_redis_cli.ping():
-                self.__conn_pool.append(replica_redis_cli)
+                return replica_redis_cli
+        except Exception as e:
+            print(
+                f"Redis Connection Error {replica_config['host']} raised error : ",
+                e,
+            )
+            get_registry().increment("errors_total", source="connection")
+        return None
+
+    def check_replicas(self) -> None:
+        """
+        Run one round of health checks: reconnect missing replicas, ping every replica
+        to refresh its latency and read INFO replication to measure its lag. Nodes
+        failing repeatedly are ejected and re-admitted once they answer again.
+        """
+        self.connect()
+        master_offset = None
+        try:
+            master_offset = self.write_cli.info("replication").get("master_repl_offset")
+        except Exception as e:
+            print("Redis health check error on master : ", e)
+            get_registry().increment("errors_total", source="health_check")
+        for node in self.__nodes:
+            if node.client is None:
+                node.client = self.connect_replica(node.config)
+                if node.client is None:
+                    continue
+            try:
+                started = time.perf_counter()
+                node.client.ping()
+                node.observe(time.perf_counter() - started)
+                info = node.client.info("replication")
+            except Exception as e:
+                print(f"Redis health check error on {node.name} : ", e)
+                get_registry().increment("errors_total", source="health_check")
+                node.mark_failure()
+                continue
+            if info.get("master_link_status", "up") != "up":
+                node.lag = sys.maxsize
+            elif master_offset is not None and "slave_repl_offset" in info:
+                node.lag = max(0, master_offset - info["slave_repl_offset"])
+            node.offset = info.get("slave_repl_offset", node.offset)
+            node.mark_success()
+
+    def start_health_checks(self, interval: float = 5.0) -> None:
+        """
+        Run check_replicas periodically on a daemon thread.
+        Args:
+            interval: Seconds between two rounds
+        """
+        if self.__health_check_thread is not None:
+            return
+        self.__health_check_stop.clear()
+
+        def run():
+            while not self.__health_check_stop.wait(interval):
+                self.check_replicas()
+
+        self.__health_check_thread = threading.Thread(
+            target=run, name="redis-replica-health-check", daemon=True
+        )
+        self.__health_check_thread.start()
+
+    def stop_health_checks(self) -> None:
+        if self.__health_check_thread is None:
+            return
+        self.__health_check_stop.set()
+        self.__health_check_thread.join()
+        self.__health_check_thread = None
+
+    def select_replica(self) -> ReplicaNode:
+        """
+        Pick a replica with the configured balancer. Unhealthy replicas are skipped,
+        lagging replicas are used only when every healthy replica lags. Unavailable
+        replicas whose retry interval passed are probed in the background. A
+        controller without replicas reads from the master.
+        Returns:
+            ReplicaNode: Node whose client serves the next read
+        """
+        self.connect()
         if not self.replica_redis_configs:
+            return self.master_node
+        for node in self.__nodes:
+            if node.claim_probe(self.__replica_retry_interval):
+                threading.Thread(
+                    target=self.__probe_replica,
+                    args=(node,),
+                    name="redis-replica-probe",
+                    daemon=True,
+                ).start()
+        candidates = [node for node in self.__nodes if node.available]
+        write_session = current_session()
+        if self.__consistency != "eventual" and write_session is not None:
+            if time.monotonic() - write_session.last_write_at < self.__read_after_write:
+                return self.master_node
+            if write_session.offset:
+                candidates = [
+                    node
+                    for node in candidates
+                    if self.__caught_up(node, write_session.offset)
+                ]
+                if not candidates:
+                    return self.master_node
+        if not candidates:
+            raise Exception("No replica connections are available")
+        if self.__max_replication_lag is not None:
+            candidates = [
+                node for node in candidates if node.lag <= self.__max_replication_lag
+            ] or candidates
+        return self.__balancer.choose(candidates)
+
+    def __probe_replica(self, node: ReplicaNode) -> None:
+        """
+        Reconnect an unreachable replica or ping an ejected one, re-admitting it
+        when it answers.
+        """
+        try:
+            if node.client is None:
+                self.__attach_replica(node, self.connect_replica(node.config))
+                return
+            node.client.ping()
+            node.mark_success()
+        except Exception as e:
+            print(f"Redis replica probe error on {node.name} : ", e)
+            get_registry().increment("errors_total", source="replica_probe")
+        finally:
+            node.end_probe()
+
+    @staticmethod
+    def __caught_up(node: ReplicaNode, offset: int) -> bool:
+        """
+        Check a replica processed the replication stream up to offset. The known
+        offset is refreshed from the replica only while it is behind.
+        """
+        if node.offset < offset:
+            try:
+                info = node.client.info("replication")
+                node.offset = info.get("slave_repl_offset", node.offset)
+            except Exception as e:
+                print(f"Redis replication offset error on {node.name} : ", e)
+                get_registry().increment("errors_total", source="replication_offset")
+                return False
+        return node.offset >= offset
+
+    @contextmanager
+    def write_batch(
+        self, sessions: Optional[List[WriteSession]] = None
+    ) -> Iterator["WriteBatch"]:
+        """
+        Group the write pipelines of one client call and remember the write in the
+        session once they executed, so the next reads of the session see it. Each
+        pipeline reads the master offset in its own round trip. In wait mode the
+        pipelines share one connection and a single WAIT follows the last of them.
+        Args:
+            sessions: Sessions the write belongs to when it is not written from
+                their context (write buffer flushes), the current session if None
+        Returns:
+            WriteBatch creating the pipelines of the call
+        """
+        write_cli = self.write_cli
+        consistency = self.__consistency
+        connection = None
+        if consistency == "wait":
+            # WAIT only counts the writes sent on its own connection
+            connection = write_cli.connection_pool.get_connection()
+        batch = WriteBatch(
+            write_cli, read_offset=consistency in ("offset", "wait"), connection=connection
+        )
+        try:
+            yield batch
+            if consistency == "eventual" or not batch.executed:
+                return
+            if sessions is None:
+                sessions = [ensure_session()]
+            if consistency == "wait":
+                acknowledged = self.__wait_for_replicas(connection)
+            else:
+                acknowledged = consistency == "offset"
+            for write_session in sessions:
+                # Replicas at or past the offset have the write
+                write_session.offset = max(write_session.offset, batch.offset)
+                if not acknowledged:
+                    write_session.last_write_at = time.monotonic()
+        finally:
+            if connection is not None:
+                write_cli.connection_pool.release(connection)
+
+    def __wait_for_replicas(self, connection) -> bool:
+        """
+        WAIT until wait_replicas replicas (every available one if None) acknowledged
+        the writes sent on connection, at most wait_timeout_ms.
+        Returns:
+            bool: False if the timeout passed first
+        """
+        if self.__wait_replicas is None:
+            needed = sum(1 for node in self.__nodes if node.available)
+        else:
+            needed = self.__wait_replicas
+        if needed < 1:
+            return True
+        # WAIT with timeout 0 blocks forever
+        timeout_ms = max(1, int(self.__wait_timeout * 1000))
+        connection.send_command("WAIT", needed, timeout_ms)
+        return connection.read_response() >= needed
+
+    @property
+    def consistency(self) -> str:
+        return self.__consistency
+
+    @property
+    def server_version(self) -> Tuple[int, ...]:
+        """
+        Version of the Redis servers, read once from a replica.
+        Returns:
+            (major, minor, patch)
+        """
+        if self.__server_version is None:
+            version = str(self.read_cli.info("server").get("redis_version", "0"))
+            self.__server_version = tuple(
+                int(part) for part in version.split(".") if part.isdigit()
+            )
+        return self.__server_version
+
+    def __ensure_master(self) -> None:
+        """
+        Wait for the master connecting in the background, connect it again if it was
+        not reachable, raise if it still is not. After a failed attempt callers fail
+        fast for master_retry_interval seconds, then a single caller tries again.
+        """
+        self.connect()
+        if self.__master_node is not None:
+            return
+        master_future = self.__master_future
+        if master_future is not None:
+            master_future.result()
+        with self.__connect_lock:
+            retry = (
+                self.__master_node is None
+                and time.monotonic() >= self.__master_retry_at
+            )
+            if retry:
+                # Callers arriving during the attempt fail fast instead of queueing
+                self.__master_retry_at = time.monotonic() + self.__master_retry_interval
+        if retry:
+            self.set_master_node()
+        if self.__master_node is None:
             raise Exception(
-                "No replicas are created for the pool. Check the configurations."
+                f"Redis master {self.master_redis_config.get('host')}:"
+                f"{self.master_redis_config.get('port')} is not reachable"
             )
 
+    @property
+    def master_node(self) -> ReplicaNode:
+        """
+        Master wrapped as a node, serves reads that must see the latest writes.
+        Returns:
+            ReplicaNode: Node whose client is the master client
+        """
+        self.__ensure_master()
+        return self.__master_read_node
+
     @property
     def read_cli(self) -> Redis:
         """
-        Ask for read client from the pool distributed in a round-robin fashion.
+        Ask for read client from the pool distributed by the configured balancer.
         Returns:
             Redis_Client: A Redis client for read operations.
         """
-        if not self.__conn_pool:
-            raise Exception("No replica connections are available")
+        return self.select_replica().client
 
-        total_length = len(self.__conn_pool)
-        # If there is only one replica, return the same connection
-        if total_length == 1:
-            return self.__conn_pool[0]
-        elif self.__active_reader + 1 < total_length:
-            active_connection = self.__conn_pool[self.__active_reader]
-            self.__active_reader += 1
-            return active_connection
-        else:
-            active_connection = self.__conn_pool[self.__active_reader]
-            self.__active_reader = 0
-            return active_connection
+    @property
+    def nodes(self) -> List[ReplicaNode]:
+        """
+        Replica nodes in configuration order, used to pin a node by its index.
+        Returns:
+            [ReplicaNode]: Copy of the replica node list
+        """
+        self.connect()
+        return list(self.__nodes)
+
+    @property
+    def replicas(self) -> list:
+        """
+        Replica clients in configuration order, None for unreachable replicas.
+        Returns:
+            [Redis_Client]: Replica clients
+        """
+        self.connect()
+        return [node.client for node in self.__nodes]
+
+    def pool_stats(self) -> dict:
+        """
+        Connection pool statistics of every node.
+        Returns:
+            dict: {"master": {...}, "replicas": {"host:port": {...}}}
+        """
+        self.connect()
+        master_pool = getattr(self.__master_node, "connection_pool", None)
+        return {
+            "master": getattr(master_pool, "stats", {}),
+            "replicas": {
+                node.name: getattr(node.client.connection_pool, "stats", {})
+                for node in self.__nodes
+                if node.client is not None
+            },
+        }
 
     @property
     def write_cli(self) -> Redis:
@@ -88,13 +617,26 @@ class RedisController:
         Returns:
             Redis_Client: A Redis client for write operations.
         """
+        self.__ensure_master()
         return self.__master_node
 
 
 """
 Create a RedisController object to manage the master-replica setup. Singleton pattern is used to ensure only one
-instance of the controller is created.
+instance of the controller is created. It connects on first use, importing the module opens no connection.
 """
 redis_controller = RedisController(
-    master_redis_config=master_config, replica_redis_configs=redis_replica_redis_configs
+    master_redis_config=master_config,
+    replica_redis_configs=redis_replica_redis_configs,
+    balancer=redis_configs.BALANCER,
+    max_replication_lag=redis_configs.MAX_REPLICATION_LAG,
+    health_check_interval=redis_configs.HEALTH_CHECK_INTERVAL,
+    replica_retry_interval=redis_configs.REPLICA_RETRY_INTERVAL,
+    master_retry_interval=redis_configs.MASTER_RETRY_INTERVAL,
+    master_pool_config=master_pool_config,
+    replica_pool_config=replica_pool_config,
+    consistency=redis_configs.CONSISTENCY,
+    read_after_write_ms=redis_configs.READ_AFTER_WRITE_MS,
+    wait_replicas=redis_configs.WAIT_REPLICAS,
+    wait_timeout_ms=redis_configs.WAIT_TIMEOUT_MS,
 )
@@ -0,0 +1,111 @@
+"""
+Single-flight
+Share one execution between identical concurrent calls.
+
+This module provides:
+    - SingleFlight: callers of do() with the same key wait for the call already in
+      flight instead of starting their own, refresh() runs a call in the background
+      unless one is in flight already
+
+Used by RedisClient to collapse identical finds, so a popular pattern whose cache
+entry expired is read from Redis once instead of once per caller.
+"""
+
+import threading
+
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .metrics import get_registry
+
+
+class _Call:
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Example:
+        >>> flight = SingleFlight()
+        >>> rows = flight.do(("users", "users:*"), lambda: read_rows("users:*"))
+    """
+
+    def __init__(self):
+        self.__calls: Dict[Hashable, _Call] = {}
+        self.__lock = threading.Lock()
+        self.__stats = dict(calls=0, shared=0, refreshes=0)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Counters of executed calls, callers served by another call and refreshes
+        """
+        with self.__lock:
+            return dict(self.__stats, in_flight=len(self.__calls))
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn, or wait for the call of the same key already in flight and share its
+        result. An exception of the call is raised in every waiting caller.
+        Args:
+            key: Identity of the call, e.g. schema category and match pattern
+            fn: Callable without arguments
+        Returns:
+            Result of fn
+        """
+        with self.__lock:
+            call = self.__calls.get(key)
+            owner = call is None
+            if owner:
+                call = self.__calls[key] = _Call()
+                self.__stats["calls"] += 1
+            else:
+                self.__stats["shared"] += 1
+        if owner:
+            return self.__run(key, call, fn)
+        get_registry().increment("single_flight_shared_total")
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def __run(self, key: Hashable, call: _Call, fn: Callable[[], Any]) -> Any:
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.__lock:
+                self.__calls.pop(key, None)
+            call.done.set()
+
+    def refresh(self, key: Hashable, fn: Callable[[], Any]) -> bool:
+        """
+        Run fn in a background thread unless a call of the same key is in flight.
+        Errors are printed, callers keep the result they already have.
+        Returns:
+            bool: True if a refresh was started
+        """
+        with self.__lock:
+            if key in self.__calls:
+                return False
+            call = self.__calls[key] = _Call()
+            self.__stats["refreshes"] += 1
+
+        def run() -> None:
+            try:
+                self.__run(key, call, fn)
+            except Exception as e:
+                print("Redis background refresh raised error : ", e)
+                get_registry().increment("errors_total", source="refresh")
+
+        threading.Thread(target=run, name="redis-refresh", daemon=True).start()
+        return True
@@ -0,0 +1,327 @@
+"""
+Metrics
+Latency histograms and counters of RedisClient operations.
+
+This module provides:
+    - Metrics: no-op recorder used while instrumentation is disabled
+    - MetricsRegistry: thread-safe histograms and counters with hook callbacks,
+      Prometheus text export and optional OpenTelemetry spans
+    - get_registry / set_registry: the process wide recorder the library reports to
+
+Recorded metrics (prefixed with the registry namespace):
+    operation_seconds{operation, node}: store, store_many, update_fields, delete,
+        expire, persist, find, sharded_find, find_page, scan, fetch and filter calls
+        per node (master or replica host:port). Finds answered without a read are
+        labeled near_cache or single_flight
+    rows_scanned_total{operation} / rows_returned_total{operation}: keys listed by
+        SCAN, an index, a range set or the filter script, and rows sent back
+    bytes_read_total{node} / bytes_written_total{node}
+    serialization_seconds{direction, serializer}: encode and decode of payloads
+    errors_total{source}: errors that are otherwise only printed
+    write_buffer_coalesced_total / write_buffer_dropped_total: buffered writes
+        replaced by a newer one, rows dropped after max_attempts failed flushes
+"""
+
+import time
+import threading
+
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+    0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Metrics:
+    """
+    Recorder interface, every call is a no-op. Kept as the registry while metrics
+    are disabled so instrumented code costs a method call only.
+    """
+
+    enabled: bool = False
+
+    def increment(self, name: str, amount: float = 1, **labels) -> None:
+        pass
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        pass
+
+    def timer(self, name: str, **labels):
+        return nullcontext()
+
+
+class Histogram:
+    """
+    Cumulative bucket counts, sum and count of observed values.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def percentile(self, percent: float) -> float:
+        """
+        Upper bound of the bucket holding the percentile, an estimate.
+        """
+        rank, seen = percent / 100 * self.count, 0
+        for ix, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.buckets[ix] if ix < len(self.buckets) else float("inf")
+        return 0.0
+
+
+class MetricsRegistry(Metrics):
+    """
+    In-process metrics store.
+
+    Example:
+        >>> registry = MetricsRegistry()
+        >>> set_registry(registry)
+        >>> redis_client.find(keys_dict={...})
+        >>> print(registry.to_prometheus())
+    """
+
+    enabled: bool = True
+
+    def __init__(
+        self,
+        namespace: str = "redis_mixin",
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+        tracer: Optional[Any] = None,
+    ):
+        """
+        Args:
+            namespace: Prefix of every exported metric name
+            buckets: Upper bounds of histogram buckets in seconds
+            tracer: Optional OpenTelemetry tracer, timed Redis operations become spans
+        """
+        self.__namespace = namespace
+        self.__buckets = tuple(sorted(buckets))
+        self.__tracer = tracer
+        self.__histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.__counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.__hooks: List[Callable[[str, str, float, dict], None]] = []
+        self.__lock = threading.Lock()
+
+    def add_hook(self, callback: Callable[[str, str, float, dict], None]) -> None:
+        """
+        Call back on every recorded value, e.g. to forward to another system.
+        Args:
+            callback: callback(kind, name, value, labels), kind is counter or histogram
+        """
+        self.__hooks.append(callback)
+
+    def set_tracer(self, tracer: Optional[Any]) -> None:
+        """
+        Args:
+            tracer: OpenTelemetry tracer, see opentelemetry_tracer, None disables spans
+        """
+        self.__tracer = tracer
+
+    def increment(self, name: str, amount: float = 1, **labels) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self.__lock:
+            series = self.__counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+        for hook in self.__hooks:
+            hook("counter", name, amount, labels)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self.__lock:
+            series = self.__histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.__buckets)
+            histogram.observe(value)
+        for hook in self.__hooks:
+            hook("histogram", name, value, labels)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """
+        Observe the duration of the block, count it in errors_total if it raises.
+        """
+        span = None
+        # Spans for Redis operations only, not for every payload decode
+        if self.__tracer is not None and "operation" in labels:
+            span = self.__tracer.start_as_current_span(
+                f"{self.__namespace}.{labels['operation']}",
+                attributes={k: str(v) for k, v in labels.items()},
+            )
+            span.__enter__()
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.increment("errors_total", source=labels.get("operation", name))
+            if span is not None:
+                span.__exit__(type(e), e, e.__traceback__)
+                span = None
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+            if span is not None:
+                span.__exit__(None, None, None)
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__histograms.clear()
+            self.__counters.clear()
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: {"counters": {name: [{labels, value}]},
+                   "histograms": {name: [{labels, count, sum, p50, p90, p99}]}}
+        """
+        with self.__lock:
+            return {
+                "counters": {
+                    name: [
+                        {"labels": dict(key), "value": value}
+                        for key, value in series.items()
+                    ]
+                    for name, series in self.__counters.items()
+                },
+                "histograms": {
+                    name: [
+                        {
+                            "labels": dict(key),
+                            "count": histogram.count,
+                            "sum": histogram.sum,
+                            "p50": histogram.percentile(50),
+                            "p90": histogram.percentile(90),
+                            "p99": histogram.percentile(99),
+                        }
+                        for key, histogram in series.items()
+                    ]
+                    for name, series in self.__histograms.items()
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        with self.__lock:
+            for name, series in sorted(self.__counters.items()):
+                full_name = f"{self.__namespace}_{name}"
+                lines.append(f"# TYPE {full_name} counter")
+                for key, value in series.items():
+                    lines.append(f"{full_name}{_format_labels(key)} {_format_value(value)}")
+            for name, series in sorted(self.__histograms.items()):
+                full_name = f"{self.__namespace}_{name}"
+                lines.append(f"# TYPE {full_name} histogram")
+                for key, histogram in series.items():
+                    cumulative = 0
+                    for ix, count in enumerate(histogram.counts):
+                        cumulative += count
+                        le = (
+                            _format_value(histogram.buckets[ix])
+                            if ix < len(histogram.buckets)
+                            else "+Inf"
+                        )
+                        bucket_key = key + (("le", le),)
+                        lines.append(
+                            f"{full_name}_bucket{_format_labels(bucket_key)} {cumulative}"
+                        )
+                    labels = _format_labels(key)
+                    lines.append(f"{full_name}_sum{labels} {_format_value(histogram.sum)}")
+                    lines.append(f"{full_name}_count{labels} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def timed_iter(iterable: Any, name: str, **labels) -> Iterator[Any]:
+    """
+    Yield from iterable, observing the time every item took to produce, e.g. the
+    SCAN calls behind each chunk of keys.
+    """
+    registry = get_registry()
+    if not registry.enabled:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            registry.observe(name, time.perf_counter() - started, **labels)
+            return
+        registry.observe(name, time.perf_counter() - started, **labels)
+        yield item
+
+
+def payload_size(value: Any) -> int:
+    """
+    Bytes of a payload as sent to or read from Redis, a field dict for hash rows.
+    """
+    if isinstance(value, dict):
+        return sum(len(v) for v in value.values() if v is not None)
+    return len(value) if value else 0
+
+
+def opentelemetry_tracer(name: str = "python-redis-mixin") -> Any:
+    """
+    Returns:
+        Tracer of the globally configured OpenTelemetry tracer provider
+    """
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        raise Exception("Tracing requires the opentelemetry-api package.")
+    return trace.get_tracer(name)
+
+
+_registry: Metrics = Metrics()
+
+
+def get_registry() -> Metrics:
+    """
+    Returns:
+        Metrics recorder the library reports to, a no-op one unless set_registry ran
+    """
+    return _registry
+
+
+def set_registry(registry: Optional[Metrics]) -> Metrics:
+    """
+    Args:
+        registry: MetricsRegistry to record to, None disables metrics
+    Returns:
+        Metrics: The active recorder
+    """
+    global _registry
+    _registry = registry if registry is not None else Metrics()
+    return _registry
@@ -1,41 +1,118 @@
-from typing import Union, Optional, Dict
+import json
+import time
+import base64
+
+from fnmatch import fnmatchcase
+from typing import Any, Callable, Union, Optional, Dict, Iterable, Iterator, List, Tuple
+from redis.commands.core import Script
 from .controller import RedisController, redis_controller
 from .schemas import RedisSchema
 from .rows import MultipleRows, RedisRow
+from .balancer import ReplicaNode
+from .cache import NearCache
+from .buffer import WriteBuffer
+from .flight import SingleFlight
+from .consistency import WriteSession, ensure_session
+from .scripts import (
+    FILTER_SCRIPT,
+    NO_WRITES_FLAG,
+    REMOVE_MISSING_SCRIPT,
+    UPDATE_EXISTING_SCRIPT,
+    encode_filters,
+)
+from .errors import RedisKeyError, RedisValueError
+from .metrics import get_registry, payload_size, timed_iter
+from .utils import RateLimiter, chunked, get_expiry_time, set_expiry_time
 
 
 class RedisClient:
 
     __controller: RedisController = None
     __schema: RedisSchema = None
+    __scan_count: int = 1000
+    __fetch_chunk_size: int = 500
+    __near_cache: Optional[NearCache] = None
+    __filter_script: Optional[Script] = None
+    __remove_script: Optional[Script] = None
+    __update_script: Optional[Script] = None
+    __write_buffer: Optional[WriteBuffer] = None
 
-    def __init__(self, controller: RedisController):
+    def __init__(
+        self,
+        controller: RedisController,
+        scan_count: int = 1000,
+        fetch_chunk_size: int = 500,
+        near_cache: Optional[NearCache] = None,
+        write_buffer: Optional[WriteBuffer] = None,
+        single_flight: bool = False,
+    ):
+        """
+        Args:
+            controller: RedisController object which serves read and write clients
+            scan_count: COUNT hint sent with every SCAN call while finding keys
+            fetch_chunk_size: Number of keys fetched with a single MGET call
+            near_cache: Optional NearCache serving repeated finds from memory
+            write_buffer: Optional WriteBuffer coalescing store calls into
+                periodic pipelined flushes
+            single_flight: Identical concurrent finds share one read from Redis.
+                A caller joining a find in flight may miss writes made after that
+                find started
+        """
+        if scan_count < 1 or fetch_chunk_size < 1:
+            raise ValueError("scan_count and fetch_chunk_size must be positive.")
         self.__controller = controller
+        self.__scan_count = scan_count
+        self.__fetch_chunk_size = fetch_chunk_size
+        self.__near_cache = near_cache
+        self.__single_flight = single_flight
+        self.__flight = SingleFlight()
+        if write_buffer is not None:
+            self.set_write_buffer(write_buffer)
 
     @classmethod
     def get_expiry_time(cls, expiry_kwargs: Dict[str, int]) -> int:
         """Calculate expiry time in seconds from kwargs."""
-        time_multipliers = {"days": 86400, "hours": 3600, "minutes": 60, "seconds": 1}
-        return sum(
-            int(expiry_kwargs.get(unit, 0)) * multiplier
-            for unit, multiplier in time_multipliers.items()
-        )
+        return get_expiry_time(expiry_kwargs=expiry_kwargs)
 
     @classmethod
     def set_expiry_time(cls, expiry_seconds: int) -> Dict[str, int]:
         """Convert total seconds back into a dictionary of time units."""
-        time_multipliers = {"days": 86400, "hours": 3600, "minutes": 60, "seconds": 1}
-        result = {}
-        for unit, multiplier in time_multipliers.items():
-            if expiry_seconds >= multiplier:
-                result[unit], expiry_seconds = divmod(expiry_seconds, multiplier)
-        return result
+        return set_expiry_time(expiry_seconds=expiry_seconds)
+
+    @property
+    def near_cache(self) -> Optional[NearCache]:
+        return self.__near_cache
+
+    def set_near_cache(self, near_cache: Optional[NearCache]) -> None:
+        """
+        Args:
+            near_cache: NearCache object to put in front of reads, None to disable it
+        """
+        self.__near_cache = near_cache
+
+    @property
+    def write_buffer(self) -> Optional[WriteBuffer]:
+        return self.__write_buffer
+
+    def set_write_buffer(self, write_buffer: Optional[WriteBuffer]) -> None:
+        """
+        Args:
+            write_buffer: WriteBuffer to send store calls through, None writes every
+                store immediately again. A replaced buffer is flushed and closed
+        """
+        if self.__write_buffer is not None and self.__write_buffer is not write_buffer:
+            self.__write_buffer.close()
+        self.__write_buffer = write_buffer
+        if write_buffer is not None:
+            write_buffer.start(self.__write_buffered)
 
     def set_schema(self, schema: RedisSchema) -> None:
         """
         Args:
             schema: RedisSchema object to change schema of redis key pattern
         """
+        if self.__schema is not None:
+            self.__flush_buffer()
         self.__schema = schema
 
     def check_schema(self) -> None:
@@ -47,30 +124,778 @@ class RedisClient:
                 "Declare schema first. Redis Controller needs a schema to match key patterns."
             )
 
-    def find(self, keys_dict: dict) -> Optional[MultipleRows]:
+    def check_fields(self, fields: Optional[List[str]]) -> None:
+        """
+        Field projections need rows stored as hashes. If not raise an exception.
+        """
+        if fields and not self.__schema.hashed:
+            raise RedisValueError("Reading fields requires a schema with hash storage.")
+
+    def __index_members(self, read_cli, keys_dict: dict) -> Optional[set]:
+        """
+        Full keys matching keys_dict from the indexes. Values with glob characters
+        are not looked up as index sets, members are matched against them instead.
+        Args:
+            read_cli: Client of the node to read the indexes from
+            keys_dict: Dictionary of keys
+        Returns:
+            set: Matching full keys, None if the schema is not indexed or no value is
+                literal so the caller must SCAN
+        """
+        if not self.__schema.indexed:
+            return None
+        index_keys, match_key = self.__schema.index_lookup(keys_dict)
+        if not index_keys:
+            return None
+        members = read_cli.sinter(index_keys)
+        if match_key is not None:
+            members = {m for m in members if fnmatchcase(m.decode(), match_key)}
+        return members
+
+    def find(
+        self,
+        keys_dict: dict,
+        scan_count: Optional[int] = None,
+        fetch_chunk_size: Optional[int] = None,
+        lazy: bool = False,
+        fields: Optional[List[str]] = None,
+        filters: Optional[Union[dict, list]] = None,
+    ) -> Optional[MultipleRows]:
         """
         Args:
             keys_dict:  {
                 "DynamicKey": "KeyToFind",
             }
+            scan_count: Optional COUNT hint for SCAN, defaults to client setting
+            fetch_chunk_size: Optional number of keys per MGET, defaults to client setting
+            lazy: Return MultipleRows that fetches rows only as they are consumed
+            fields: Hash storage only, read just these fields of every row (HMGET)
+            filters: Keep only rows whose top-level JSON fields match, evaluated in
+                Redis by a Lua script. {"Location": "UK"} or a list of
+                (field, operator, value), see scripts.FILTER_OPERATORS
         Returns:
-            Returns a RedisRow object or None
+            Returns a MultipleRows object
         """
+        if lazy:
+            pairs = self.__iter_pairs(
+                keys_dict, scan_count, fetch_chunk_size, fields, filters
+            )
+            return MultipleRows(schema=self.__schema, pairs=pairs)
+        registry = get_registry()
+        started = time.perf_counter()
         self.check_schema()
+        self.check_fields(fields)
+        cached_rows = self.__cached_pairs(
+            keys_dict, scan_count, fetch_chunk_size, fields, filters
+        )
+        if cached_rows is not None:
+            registry.observe(
+                "operation_seconds",
+                time.perf_counter() - started,
+                operation="find",
+                node="near_cache",
+            )
+            return MultipleRows(schema=self.__schema, pairs=cached_rows)
+
+        read_by = []
+
+        def read() -> list:
+            # Picked only when rows are read, so the timer is labeled with the node
+            # that serves them
+            node = self.__controller.select_replica()
+            read_by.append(node)
+            with registry.timer("operation_seconds", operation="find", node=node.name):
+                return list(
+                    self.__iter_uncached(
+                        keys_dict, scan_count, fetch_chunk_size, fields, filters, node
+                    )
+                )
+
+        if not self.__single_flight:
+            return MultipleRows(schema=self.__schema, pairs=read())
+        # MultipleRows copies the shared list, callers do not see each other
+        found = self.__flight.do(self.__flight_key(keys_dict, fields, filters), read)
+        if not read_by:
+            # Joined the read of another caller
+            registry.observe(
+                "operation_seconds",
+                time.perf_counter() - started,
+                operation="find",
+                node="single_flight",
+            )
+        return MultipleRows(schema=self.__schema, pairs=found)
+
+    def __flight_key(
+        self,
+        keys_dict: dict,
+        fields: Optional[List[str]] = None,
+        filters: Optional[Union[dict, list]] = None,
+    ) -> tuple:
+        """
+        Identity of a find, equal for finds returning the same rows.
+        """
+        self.check_schema()
+        return (
+            self.__schema.category,
+            self.__schema.merge_key(key_dict=keys_dict),
+            tuple(fields or ()),
+            json.dumps(filters, sort_keys=True, default=str) if filters else None,
+        )
+
+    def iter_find(
+        self,
+        keys_dict: dict,
+        scan_count: Optional[int] = None,
+        fetch_chunk_size: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        filters: Optional[Union[dict, list]] = None,
+    ) -> Iterator[RedisRow]:
+        """
+        Yield rows matching keys_dict as SCAN batches arrive.
+        Args:
+            keys_dict:  {
+                "DynamicKey": "KeyToFind",
+            }
+            scan_count: Optional COUNT hint for SCAN, defaults to client setting
+            fetch_chunk_size: Optional number of keys per MGET, defaults to client setting
+            fields: Hash storage only, read just these fields of every row (HMGET)
+            filters: Keep only rows matching the filters, evaluated in Redis
+        Returns:
+            Iterator of RedisRow objects
+        """
+        for json_key, row in self.__iter_pairs(
+            keys_dict, scan_count, fetch_chunk_size, fields, filters
+        ):
+            yield self.make_row(key=json_key, value=row)
+
+    def __iter_pairs(
+        self,
+        keys_dict: dict,
+        scan_count: Optional[int] = None,
+        fetch_chunk_size: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        filters: Optional[Union[dict, list]] = None,
+    ) -> Iterator[Tuple[bytes, bytes]]:
+        self.check_schema()
+        self.check_fields(fields)
+        cached_rows = self.__cached_pairs(
+            keys_dict, scan_count, fetch_chunk_size, fields, filters
+        )
+        if cached_rows is not None:
+            yield from cached_rows
+            return
+        yield from self.__iter_uncached(
+            keys_dict, scan_count, fetch_chunk_size, fields, filters
+        )
+
+    def __cached_pairs(
+        self,
+        keys_dict: dict,
+        scan_count: Optional[int],
+        fetch_chunk_size: Optional[int],
+        fields: Optional[List[str]],
+        filters: Optional[Union[dict, list]],
+    ) -> Optional[list]:
+        """
+        Rows of the pattern from the near cache, None on a miss. A stale hit is
+        served while a background read refreshes it.
+        """
+        # Projections are partial rows and filtered finds partial results, both stay
+        # out of the near cache
+        if self.__near_cache is None or fields or filters:
+            return None
         match_key: str = self.__schema.merge_key(key_dict=keys_dict)
-        list_of_rows, json_rows = [], self.__controller.read_cli.scan_iter(
-            match=match_key
+        cached_rows, stale = self.__near_cache.get_stale_pattern(match_key)
+        if cached_rows is not None and stale:
+            self.__revalidate(keys_dict, scan_count, fetch_chunk_size)
+        return cached_rows
+
+    def __iter_uncached(
+        self,
+        keys_dict: dict,
+        scan_count: Optional[int] = None,
+        fetch_chunk_size: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        filters: Optional[Union[dict, list]] = None,
+        node: Optional[ReplicaNode] = None,
+    ) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Read matching rows from a replica, filtered in Redis if filters are given.
+        """
+        if filters:
+            yield from self.__iter_filtered(
+                keys_dict, filters, scan_count, fetch_chunk_size, node
+            )
+            return
+        match_key: str = self.__schema.merge_key(key_dict=keys_dict)
+        near_cache = self.__near_cache if not fields else None
+        yield from self.__read_pairs(
+            keys_dict, match_key, scan_count, fetch_chunk_size, fields, near_cache, node
         )
-        json_rows_list = list(json_rows)
-        for json_key in json_rows_list:
-            redis_row = RedisRow(schema=self.__schema, delimiter=self.__schema.delimiter)
-            row = self.__controller.read_cli.get(name=json_key)
+
+    def __revalidate(
+        self,
+        keys_dict: dict,
+        scan_count: Optional[int],
+        fetch_chunk_size: Optional[int],
+    ) -> None:
+        """
+        Refresh a stale near cache result in the background, once per pattern.
+        Finds of the pattern that miss the cache meanwhile join the refresh.
+        """
+        match_key: str = self.__schema.merge_key(key_dict=keys_dict)
+        self.__flight.refresh(
+            self.__flight_key(keys_dict),
+            lambda: list(
+                self.__read_pairs(
+                    keys_dict, match_key, scan_count, fetch_chunk_size, None,
+                    self.__near_cache,
+                )
+            ),
+        )
+
+    def __read_pairs(
+        self,
+        keys_dict: dict,
+        match_key: str,
+        scan_count: Optional[int],
+        fetch_chunk_size: Optional[int],
+        fields: Optional[List[str]],
+        near_cache: Optional[NearCache],
+        node: Optional[ReplicaNode] = None,
+    ) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Read matching rows from a replica, filling the near cache if given.
+        """
+        generation = near_cache.generation if near_cache is not None else 0
+        # Pin a single replica for the whole query, scan and fetch must see the same node
+        node = node or self.__controller.select_replica()
+        exact_key = self.__schema.exact_key(keys_dict)
+        members = None
+        if exact_key is None and self.__schema.indexed:
+            with node.track() as read_cli, get_registry().timer(
+                "operation_seconds", operation="scan", node=node.name
+            ):
+                members = self.__index_members(read_cli, keys_dict)
+        chunk_size = fetch_chunk_size or self.__fetch_chunk_size
+        if exact_key is not None:
+            # Every dynamic key is given, a single GET instead of a SCAN
+            chunks = [[exact_key]]
+        elif members is not None:
+            chunks = chunked(members, chunk_size)
+        else:
+            json_rows = node.client.scan_iter(
+                match=match_key, count=scan_count or self.__scan_count
+            )
+            chunks = timed_iter(
+                node.track_iter(chunked(json_rows, chunk_size)),
+                "operation_seconds",
+                operation="scan",
+                node=node.name,
+            )
+        found_rows = []
+        registry = get_registry()
+        for json_keys in chunks:
+            if registry.enabled:
+                registry.increment("rows_scanned_total", len(json_keys), operation="find")
+            fetched_rows = self.__fetch(node, json_keys, members is not None, fields)
+            if near_cache is not None:
+                found_rows.extend(fetched_rows)
+            yield from fetched_rows
+        # Only a fully consumed iteration is a complete result for the pattern, cached
+        # as one entry so its rows do not push other patterns out of the LRU
+        if near_cache is not None:
+            near_cache.set_pattern(match_key, found_rows, generation)
+
+    def check_filters(self) -> None:
+        """
+        Filters are evaluated on plain JSON payloads in Redis. If the schema stores
+        anything else raise an exception.
+        """
+        schema = self.__schema
+        if schema.hashed or schema.compressor is not None:
+            raise RedisValueError("Filters require string storage without compression.")
+        if schema.serializer.name not in ("json", "orjson"):
+            raise RedisValueError("Filters require a JSON serializer.")
+
+    def __get_filter_script(self) -> Script:
+        """
+        Register the filter script once, EVALSHA reloads it on NOSCRIPT. Scripts
+        run on replicas, registering needs no master.
+        """
+        if self.__filter_script is None:
+            flags = NO_WRITES_FLAG if self.__controller.server_version >= (7,) else ""
+            self.__filter_script = self.__controller.read_cli.register_script(
+                flags + FILTER_SCRIPT
+            )
+        return self.__filter_script
+
+    def __iter_filtered(
+        self,
+        keys_dict: dict,
+        filters: Union[dict, list],
+        scan_count: Optional[int] = None,
+        fetch_chunk_size: Optional[int] = None,
+        node: Optional[ReplicaNode] = None,
+    ) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Yield (key, value) pairs of matching rows, filtered by the Lua script. Every
+        call handles one SCAN batch or one chunk of index members, so the script
+        never blocks the server for long and only matching rows are sent back.
+        """
+        self.check_filters()
+        packed = encode_filters(filters)
+        script = self.__get_filter_script()
+        registry = get_registry()
+        node = node or self.__controller.select_replica()
+        exact_key = self.__schema.exact_key(keys_dict)
+        members = [exact_key] if exact_key is not None else None
+        if members is None:
+            members = self.__index_members(node.client, keys_dict)
+        if members is not None:
+            for json_keys in chunked(members, fetch_chunk_size or self.__fetch_chunk_size):
+                with node.track() as read_cli, registry.timer(
+                    "operation_seconds", operation="filter", node=node.name
+                ):
+                    result = script(keys=json_keys, args=["keys", packed], client=read_cli)
+                yield from self.__filtered_pairs(node, result)
+            return
+        match_key: str = self.__schema.merge_key(key_dict=keys_dict)
+        cursor = 0
+        while True:
+            with node.track() as read_cli, registry.timer(
+                "operation_seconds", operation="filter", node=node.name
+            ):
+                result = script(
+                    args=["scan", packed, cursor, match_key, scan_count or self.__scan_count],
+                    client=read_cli,
+                )
+            yield from self.__filtered_pairs(node, result)
+            cursor = int(result[0])
+            if cursor == 0:
+                return
+
+    @staticmethod
+    def __filtered_pairs(node: ReplicaNode, result: list) -> list:
+        pairs = list(zip(result[2::2], result[3::2]))
+        registry = get_registry()
+        if registry.enabled:
+            registry.increment("rows_scanned_total", result[1], operation="filter")
+            registry.increment("rows_returned_total", len(pairs), operation="filter")
+            registry.increment(
+                "bytes_read_total", sum(len(v) for _, v in pairs), node=node.name
+            )
+        return pairs
+
+    def find_page(
+        self,
+        keys_dict: dict,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        scan_count: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Tuple[MultipleRows, Optional[str]]:
+        """
+        Return at most limit rows and an opaque cursor to resume from.
+        SCAN cursors are only valid on the node that issued them, so the cursor pins
+        the replica of the first page.
+        Args:
+            keys_dict:  {
+                "DynamicKey": "KeyToFind",
+            }
+            cursor: Cursor returned by the previous page, None for the first page
+            limit: Maximum number of rows in the page
+            scan_count: Optional COUNT hint for SCAN, defaults to client setting
+            fields: Hash storage only, read just these fields of every row (HMGET)
+        Returns:
+            MultipleRows of the page and the next cursor, None when exhausted
+        """
+        with get_registry().timer("operation_seconds", operation="find_page"):
+            return self.__find_page(keys_dict, cursor, limit, scan_count, fields)
+
+    def __find_page(
+        self,
+        keys_dict: dict,
+        cursor: Optional[str],
+        limit: int,
+        scan_count: Optional[int],
+        fields: Optional[List[str]],
+    ) -> Tuple[MultipleRows, Optional[str]]:
+        self.check_schema()
+        self.check_fields(fields)
+        if limit < 1:
+            raise ValueError("limit must be positive.")
+        # Index -1 pins the master, chosen for reads right after a write
+        replicas = self.__controller.nodes
+        if cursor is None:
+            node = self.__controller.select_replica()
+            node_ix = replicas.index(node) if node in replicas else -1
+            scan_cursor, skip = 0, 0
+        else:
+            node_ix, scan_cursor, skip = self.decode_cursor(cursor)
+            if not -1 <= node_ix < len(replicas):
+                raise RedisKeyError("Cursor belongs to a replica that is not available.")
+            node = replicas[node_ix] if node_ix >= 0 else self.__controller.master_node
+            if not node.available:
+                raise RedisKeyError("Cursor belongs to a replica that is not available.")
+        exact_key = self.__schema.exact_key(keys_dict)
+        if exact_key is not None:
+            rows = self.__fetch(node, [exact_key], False, fields)
+            return MultipleRows(schema=self.__schema, pairs=rows), None
+        with node.track() as read_cli:
+            members = self.__index_members(read_cli, keys_dict)
+        if members is not None:
+            # Sorted so offsets stay stable between pages
+            members = sorted(members)
+            page_keys = members[skip : skip + limit]
+            rows = self.__fetch(node, page_keys, True, fields)
+            next_cursor = None
+            if skip + limit < len(members):
+                next_cursor = self.encode_cursor(node_ix, 0, skip + limit)
+            return MultipleRows(schema=self.__schema, pairs=rows), next_cursor
+        match_key: str = self.__schema.merge_key(key_dict=keys_dict)
+        rows = []
+        while True:
+            with node.track() as read_cli:
+                next_scan_cursor, json_keys = read_cli.scan(
+                    cursor=scan_cursor,
+                    match=match_key,
+                    count=scan_count or self.__scan_count,
+                )
+            json_keys = json_keys[skip:]
+            get_registry().increment(
+                "rows_scanned_total", len(json_keys), operation="find_page"
+            )
+            taken = json_keys[: limit - len(rows)]
+            rows.extend(self.__fetch(node, taken, False, fields))
+            if len(taken) < len(json_keys):
+                # Batch is larger than the page, resume inside the same batch
+                next_cursor = self.encode_cursor(node_ix, scan_cursor, skip + len(taken))
+                break
+            scan_cursor, skip = next_scan_cursor, 0
+            if scan_cursor == 0:
+                next_cursor = None
+                break
+            if len(rows) >= limit:
+                next_cursor = self.encode_cursor(node_ix, scan_cursor, 0)
+                break
+        return MultipleRows(schema=self.__schema, pairs=rows), next_cursor
+
+    @staticmethod
+    def encode_cursor(node: int, scan_cursor: int, skip: int) -> str:
+        """
+        Pack replica index, SCAN cursor and offset inside the batch into a cursor.
+        """
+        payload = json.dumps([node, scan_cursor, skip]).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[int, int, int]:
+        """
+        Unpack a cursor created by encode_cursor.
+        """
+        try:
+            node, scan_cursor, skip = json.loads(base64.urlsafe_b64decode(cursor))
+            return int(node), int(scan_cursor), int(skip)
+        except (ValueError, TypeError) as e:
+            raise RedisKeyError(f"Invalid cursor: {cursor}") from e
+
+    def get_many(
+        self,
+        keys_dicts: List[dict],
+        fetch_chunk_size: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> MultipleRows:
+        """
+        Read rows of many exact keys with MGET (pipelined HGETALL/HMGET for hash
+        storage), one round trip per chunk and no SCAN.
+        Args:
+            keys_dicts: List of keys dicts, each giving every dynamic key
+            fetch_chunk_size: Optional number of keys per MGET, defaults to client setting
+            fields: Hash storage only, read just these fields of every row (HMGET)
+        Returns:
+            MultipleRows of the existing rows, in the order of keys_dicts
+        """
+        self.check_schema()
+        self.check_fields(fields)
+        json_keys = [self.__schema.build_key(key_dict) for key_dict in keys_dicts]
+        node = self.__controller.select_replica()
+        pairs = []
+        with get_registry().timer("operation_seconds", operation="get_many"):
+            for chunk in chunked(json_keys, fetch_chunk_size or self.__fetch_chunk_size):
+                pairs.extend(self.__fetch(node, chunk, False, fields))
+        return MultipleRows(schema=self.__schema, pairs=pairs)
+
+    def exists(self, keys_dicts: List[dict]) -> List[bool]:
+        """
+        Check many exact keys with pipelined EXISTS, values are not transferred.
+        Args:
+            keys_dicts: List of keys dicts, each giving every dynamic key
+        Returns:
+            [bool]: Whether each row exists, in the order of keys_dicts
+        """
+        self.check_schema()
+        json_keys = [self.__schema.build_key(key_dict) for key_dict in keys_dicts]
+        node = self.__controller.select_replica()
+        found = []
+        for chunk in chunked(json_keys, self.__fetch_chunk_size):
+            with node.track() as read_cli, get_registry().timer(
+                "operation_seconds", operation="exists", node=node.name
+            ):
+                pipeline = read_cli.pipeline(transaction=False)
+                for json_key in chunk:
+                    pipeline.exists(json_key)
+                found.extend(bool(result) for result in pipeline.execute())
+        return found
+
+    def count(self, keys_dict: dict, scan_count: Optional[int] = None) -> int:
+        """
+        Count rows matching keys_dict without reading them: EXISTS for an exact key,
+        SINTER of the indexes for an indexed schema (may include expired rows until
+        clean_indexes ran), SCAN otherwise.
+        Args:
+            keys_dict:  {
+                "DynamicKey": "KeyToCount",
+            }
+            scan_count: Optional COUNT hint for SCAN, defaults to client setting
+        Returns:
+            int: Number of matching rows
+        """
+        self.check_schema()
+        node = self.__controller.select_replica()
+        exact_key = self.__schema.exact_key(keys_dict)
+        with node.track() as read_cli, get_registry().timer(
+            "operation_seconds", operation="count", node=node.name
+        ):
+            if exact_key is not None:
+                return read_cli.exists(exact_key)
+            members = self.__index_members(read_cli, keys_dict)
+            if members is not None:
+                return len(members)
+            return sum(
+                1
+                for _ in read_cli.scan_iter(
+                    match=self.__schema.merge_key(key_dict=keys_dict),
+                    count=scan_count or self.__scan_count,
+                )
+            )
+
+    def find_range(
+        self,
+        keys_dict: dict,
+        key: str,
+        min: Any = None,
+        max: Any = None,
+        limit: Optional[int] = None,
+        reverse: bool = False,
+        fetch_chunk_size: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        min_exclusive: bool = False,
+        max_exclusive: bool = False,
+    ) -> MultipleRows:
+        """
+        Rows whose range key lies between min and max, ordered by it, read with
+        ZRANGEBYSCORE from the range set instead of a SCAN. Other dynamic keys of
+        keys_dict narrow the result like in find. Members whose row is gone (e.g.
+        expired) are dropped from the range set as they are met.
+        Args:
+            keys_dict:  {
+                "DynamicKey": "KeyToFind",
+            }
+            key: Range key of the schema, e.g. CREATED_AT
+            min: Lowest value (inclusive), None for no lower bound
+            max: Highest value (inclusive), None for no upper bound
+            limit: Optional maximum number of rows
+            reverse: Highest values first
+            fetch_chunk_size: Optional number of members per ZRANGEBYSCORE and MGET
+            fields: Hash storage only, read just these fields of every row (HMGET)
+            min_exclusive: Leave out rows whose value equals min
+            max_exclusive: Leave out rows whose value equals max
+        Returns:
+            MultipleRows ordered by the range key
+        """
+        self.check_schema()
+        self.check_fields(fields)
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be positive.")
+        range_key = self.__schema.range_key(key)
+        low = "-inf" if min is None else self.__schema.range_score(key, min)
+        high = "+inf" if max is None else self.__schema.range_score(key, max)
+        # ZRANGEBYSCORE takes "(" for an exclusive bound
+        if min is not None and min_exclusive:
+            low = f"({low}"
+        if max is not None and max_exclusive:
+            high = f"({high}"
+        keys_dict = dict(self.__schema.clean_key_dict_input(keys_dict))
+        keys_dict.pop(str(key).upper(), None)
+        # Other dynamic keys are matched on the members, no lookup per row
+        match_key = self.__schema.merge_key(key_dict=keys_dict) if keys_dict else None
+        chunk_size = fetch_chunk_size or self.__fetch_chunk_size
+        node = self.__controller.select_replica()
+        pairs, missing_keys, offset = [], [], 0
+        with get_registry().timer(
+            "operation_seconds", operation="find_range", node=node.name
+        ):
+            while limit is None or len(pairs) < limit:
+                with node.track() as read_cli:
+                    if reverse:
+                        members = read_cli.zrevrangebyscore(
+                            range_key, high, low, start=offset, num=chunk_size
+                        )
+                    else:
+                        members = read_cli.zrangebyscore(
+                            range_key, low, high, start=offset, num=chunk_size
+                        )
+                offset += len(members)
+                exhausted = len(members) < chunk_size
+                get_registry().increment(
+                    "rows_scanned_total", len(members), operation="find_range"
+                )
+                if match_key is not None:
+                    members = [
+                        m for m in members if fnmatchcase(m.decode(), match_key)
+                    ]
+                fetched_rows = self.__fetch(node, members, False, fields)
+                if not fields and len(fetched_rows) < len(members):
+                    found_keys = {json_key for json_key, _ in fetched_rows}
+                    missing_keys.extend(m for m in members if m not in found_keys)
+                pairs.extend(fetched_rows)
+                if exhausted:
+                    break
+        # Removed after paging, removing while paging would shift the offsets
+        if missing_keys:
+            self.remove_from_indexes(keys=missing_keys)
+        return MultipleRows(schema=self.__schema, pairs=pairs[:limit])
+
+    def __fetch(
+        self,
+        node: ReplicaNode,
+        json_keys: list,
+        indexed: bool,
+        fields: Optional[List[str]] = None,
+    ) -> list:
+        """
+        MGET keys and return (key, value) pairs of existing rows. Keys that vanished
+        since they were listed are dropped from the indexes when they came from one.
+        Hash rows are read with pipelined HGETALL, or HMGET when fields are given.
+        """
+        if not json_keys:
+            return []
+        registry = get_registry()
+        with node.track() as read_cli, registry.timer(
+            "operation_seconds", operation="fetch", node=node.name
+        ):
+            if not self.__schema.hashed:
+                values = read_cli.mget(json_keys)
+            else:
+                pipeline = read_cli.pipeline(transaction=False)
+                for json_key in json_keys:
+                    if fields:
+                        pipeline.hmget(json_key, fields)
+                    else:
+                        pipeline.hgetall(json_key)
+                values = pipeline.execute()
+        found_rows, missing_keys = [], []
+        for json_key, row in zip(json_keys, values):
+            if fields:
+                # Missing fields and missing rows look alike, skip without cleanup
+                row = {f: v for f, v in zip(fields, row) if v is not None}
+                if row:
+                    found_rows.append((json_key, row))
+                continue
             if not row:
+                missing_keys.append(json_key)
                 continue
-            redis_row.feed(value=row)
-            redis_row.set_key_value(key=json_key)
-            list_of_rows.append(redis_row)
-        return MultipleRows(rows=list_of_rows)
+            found_rows.append((json_key, row))
+        if indexed and missing_keys:
+            self.remove_from_indexes(keys=missing_keys)
+        if registry.enabled:
+            registry.increment("rows_returned_total", len(found_rows), operation="find")
+            registry.increment(
+                "bytes_read_total",
+                sum(payload_size(row) for _, row in found_rows),
+                node=node.name,
+            )
+        return found_rows
+
+    def make_row(self, key: bytes, value: Union[bytes, dict]) -> RedisRow:
+        """
+        Args:
+            key: Full Redis key as read from Redis
+            value: Raw value as read from Redis
+        Returns:
+            RedisRow object of the current schema
+        """
+        redis_row = RedisRow(schema=self.__schema, delimiter=self.__schema.delimiter)
+        redis_row.set_raw_value(value=value)
+        redis_row.set_key_value(key=key)
+        return redis_row
+
+    def remove_from_indexes(self, keys: list) -> None:
+        """
+        Drop full keys of rows that no longer exist from every index set and range
+        set they belong to. Used to clean up index members of rows that expired or
+        were deleted. A row missing on a replica may still live on the master, so the
+        master checks that the row is absent and removes the members in one script
+        call.
+        Args:
+            keys: List of full Redis keys
+        """
+        self.check_schema()
+        script = self.__get_remove_script()
+        range_keys = [self.__schema.range_key(key) for key in self.__schema.range_keys]
+        pipeline = self.__controller.write_cli.pipeline(transaction=False)
+        for key in keys:
+            index_keys = []
+            if self.__schema.indexed:
+                index_keys = self.__schema.index_keys(self.__schema.parse_key(key))
+            if index_keys or range_keys:
+                script(keys=[key] + index_keys + range_keys, client=pipeline)
+        pipeline.execute()
+
+    def __get_remove_script(self) -> Script:
+        """
+        Register the index cleanup script once, EVALSHA reloads it on NOSCRIPT.
+        """
+        if self.__remove_script is None:
+            write_cli = self.__controller.write_cli
+            self.__remove_script = write_cli.register_script(REMOVE_MISSING_SCRIPT)
+        return self.__remove_script
+
+    def __queue_index_removal(self, pipeline, keys: list) -> None:
+        range_keys = [self.__schema.range_key(key) for key in self.__schema.range_keys]
+        for key in keys:
+            if self.__schema.indexed:
+                for index_key in self.__schema.index_keys(self.__schema.parse_key(key)):
+                    pipeline.srem(index_key, key)
+            for range_key in range_keys:
+                pipeline.zrem(range_key, key)
+
+    def clean_indexes(self, scan_count: Optional[int] = None) -> int:
+        """
+        Walk every index set of the schema and remove members whose row no longer
+        exists (e.g. expired by TTL).
+        Args:
+            scan_count: Optional COUNT hint for SCAN/SSCAN, defaults to client setting
+        Returns:
+            int: Number of removed index members
+        """
+        self.check_schema()
+        write_cli, removed = self.__controller.write_cli, 0
+        script = self.__get_remove_script()
+        count = scan_count or self.__scan_count
+        for index_key in write_cli.scan_iter(
+            match=self.__schema.index_pattern, count=count
+        ):
+            for members in chunked(
+                write_cli.sscan_iter(index_key, count=count), self.__fetch_chunk_size
+            ):
+                # A row stored between a separate EXISTS and SREM would lose its member
+                pipeline = write_cli.pipeline(transaction=False)
+                for member in members:
+                    script(keys=[member, index_key], client=pipeline)
+                removed += sum(pipeline.execute())
+        return removed
 
     def dynamic_key_list_to_dict(self, dynamic_keys: list[str]) -> dict:
         """
@@ -105,21 +930,348 @@ class RedisClient:
                 "seconds": int,
             }
         Returns:
-            RedisRow object or raises an exception
+            RedisRow object or raises an exception. With a write buffer the row is
+            written later, find does not see it before the buffer is flushed. The
+            flush records the write in the session of the caller, so reads of the
+            session see it once it is flushed
+        """
+        self.check_schema()
+        redis_row, key_dict = self.build_row(keys=keys, value=value)
+        if self.__write_buffer is not None:
+            # Last write wins, the row reaches Redis with the next flush
+            write_session = None
+            if self.__controller.consistency != "eventual":
+                write_session = ensure_session()
+            self.__write_buffer.put(
+                redis_row.key, (redis_row, key_dict, expires_at, write_session)
+            )
+            self.__invalidate([redis_row])
+            return redis_row
+        with self.__controller.write_batch() as batch:
+            pipeline = batch.pipeline(
+                transaction=self.__schema.indexed
+                or self.__schema.ranged
+                or self.__schema.hashed
+            )
+            self.__queue_row(pipeline, redis_row, key_dict, expires_at)
+            with get_registry().timer(
+                "operation_seconds", operation="store", node="master"
+            ):
+                pipeline.execute()
+        self.__count_written([redis_row])
+        self.__invalidate([redis_row])
+        return redis_row
+
+    def update_fields(self, keys: Union[list[str], str], fields: dict) -> int:
+        """
+        Write some fields of a hash row with HSET, other fields and the expiry stay
+        as they are. The row must exist, checked and written atomically, so an
+        update never creates a partial row without expiry.
+        Args:
+            keys: Dynamic key values in schema order
+            fields: {"Location": "DE"}
+        Returns:
+            int: Number of fields that did not exist before
+        """
+        self.check_schema()
+        self.__flush_buffer()
+        if not self.__schema.hashed:
+            raise RedisValueError("update_fields requires a schema with hash storage.")
+        key_dict = self.dynamic_key_list_to_dict(dynamic_keys=keys)
+        key = self.__schema.build_key(key_dict)
+        mapping = self.__schema.encode_value(fields)
+        args = [item for pair in mapping.items() for item in pair]
+        script = self.__get_update_script()
+        with self.__controller.write_batch() as batch:
+            pipeline = batch.pipeline(transaction=False)
+            script(keys=[key], args=args, client=pipeline)
+            with get_registry().timer(
+                "operation_seconds", operation="update_fields", node="master"
+            ):
+                added = pipeline.execute()[0]
+        if added < 0:
+            raise RedisKeyError(f"Row {key} does not exist.")
+        get_registry().increment(
+            "bytes_written_total", payload_size(mapping), node="master"
+        )
+        if self.__near_cache is not None:
+            self.__near_cache.invalidate(key)
+        return added
+
+    def __get_update_script(self) -> Script:
+        """
+        Register the field update script once, EVALSHA reloads it on NOSCRIPT.
+        """
+        if self.__update_script is None:
+            write_cli = self.__controller.write_cli
+            self.__update_script = write_cli.register_script(UPDATE_EXISTING_SCRIPT)
+        return self.__update_script
+
+    def store_many(
+        self,
+        rows: Iterable[Tuple],
+        chunk_size: Optional[int] = None,
+        transaction: bool = False,
+        return_rows: bool = True,
+    ) -> Union[List[RedisRow], int]:
+        """
+        Store many rows with pipelined writes, one round trip per chunk.
+        Args:
+            rows: Iterable of (keys, value) or (keys, value, expires_at) tuples, same
+                arguments as store
+            chunk_size: Optional number of rows per pipeline, defaults to fetch_chunk_size
+            transaction: Wrap every chunk in MULTI/EXEC
+            return_rows: Return created RedisRow objects, otherwise only the count is
+                returned and rows are released after each chunk
+        Returns:
+            List of RedisRow objects or number of stored rows
+        """
+        self.check_schema()
+        self.__flush_buffer()
+        stored_rows, stored_count = [], 0
+        with self.__controller.write_batch() as batch:
+            for chunk in chunked(rows, chunk_size or self.__fetch_chunk_size):
+                pipeline = batch.pipeline(transaction=transaction)
+                chunk_rows = []
+                for row in chunk:
+                    keys, value, expires_at = (tuple(row) + (None,))[:3]
+                    redis_row, key_dict = self.build_row(keys=keys, value=value)
+                    self.__queue_row(pipeline, redis_row, key_dict, expires_at)
+                    chunk_rows.append(redis_row)
+                if return_rows:
+                    stored_rows.extend(chunk_rows)
+                with get_registry().timer(
+                    "operation_seconds", operation="store_many", node="master"
+                ):
+                    pipeline.execute()
+                self.__count_written(chunk_rows)
+                self.__invalidate(chunk_rows)
+                stored_count += len(chunk)
+        return stored_rows if return_rows else stored_count
+
+    def delete(
+        self,
+        keys_dict: dict,
+        scan_count: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_rate: Optional[float] = None,
+    ) -> int:
+        """
+        Remove every row matching keys_dict with UNLINK, memory is freed in the
+        background so large values do not block the master. Index members of the
+        removed rows are dropped in the same pipeline.
+        Args:
+            keys_dict:  {
+                "DynamicKey": "KeyToDelete",
+            }, {} removes the whole category
+            scan_count: Optional COUNT hint for SCAN, defaults to client setting
+            batch_size: Optional number of keys per pipeline, defaults to fetch_chunk_size
+            max_rate: Optional maximum number of keys per second
+        Returns:
+            int: Number of removed rows
+        """
+
+        def queue(pipeline, json_keys: list) -> None:
+            pipeline.unlink(*json_keys)
+            self.__queue_index_removal(pipeline, json_keys)
+
+        return self.__apply(
+            "delete", keys_dict, queue, lambda results: results[0],
+            scan_count, batch_size, max_rate,
+        )
+
+    def expire(
+        self,
+        keys_dict: dict,
+        expires_at: dict,
+        scan_count: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_rate: Optional[float] = None,
+    ) -> int:
+        """
+        Set a new expiry on every row matching keys_dict, e.g. to refresh TTLs.
+        Args:
+            keys_dict:  {
+                "DynamicKey": "KeyToExpire",
+            }
+            expires_at: {"days": int, "hours": int, "minutes": int, "seconds": int}
+            scan_count: Optional COUNT hint for SCAN, defaults to client setting
+            batch_size: Optional number of keys per pipeline, defaults to fetch_chunk_size
+            max_rate: Optional maximum number of keys per second
+        Returns:
+            int: Number of rows whose expiry was set
+        """
+        expiry = self.get_expiry_time(expiry_kwargs=expires_at)
+        if expiry < 1:
+            raise RedisValueError("expires_at must be at least one second.")
+
+        def queue(pipeline, json_keys: list) -> None:
+            for json_key in json_keys:
+                pipeline.expire(json_key, expiry)
+
+        return self.__apply(
+            "expire", keys_dict, queue, lambda results: sum(map(bool, results)),
+            scan_count, batch_size, max_rate,
+        )
+
+    def persist(
+        self,
+        keys_dict: dict,
+        scan_count: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_rate: Optional[float] = None,
+    ) -> int:
+        """
+        Remove the expiry of every row matching keys_dict.
+        Args:
+            keys_dict:  {
+                "DynamicKey": "KeyToPersist",
+            }
+            scan_count: Optional COUNT hint for SCAN, defaults to client setting
+            batch_size: Optional number of keys per pipeline, defaults to fetch_chunk_size
+            max_rate: Optional maximum number of keys per second
+        Returns:
+            int: Number of rows that had an expiry
+        """
+
+        def queue(pipeline, json_keys: list) -> None:
+            for json_key in json_keys:
+                pipeline.persist(json_key)
+
+        return self.__apply(
+            "persist", keys_dict, queue, lambda results: sum(map(bool, results)),
+            scan_count, batch_size, max_rate,
+        )
+
+    def __apply(
+        self,
+        operation: str,
+        keys_dict: dict,
+        queue: Callable[[Any, list], None],
+        count: Callable[[list], int],
+        scan_count: Optional[int],
+        batch_size: Optional[int],
+        max_rate: Optional[float],
+    ) -> int:
+        """
+        Resolve keys matching keys_dict on the master, from the indexes when the
+        schema is indexed or by incremental SCAN otherwise, and run one pipeline
+        per batch. Batches are spaced by max_rate, so the master keeps serving
+        other clients while a whole category is processed.
         """
         self.check_schema()
+        self.__flush_buffer()
+        write_cli = self.__controller.write_cli
+        json_keys = self.__index_members(write_cli, keys_dict)
+        if json_keys is None:
+            json_keys = write_cli.scan_iter(
+                match=self.__schema.merge_key(key_dict=keys_dict),
+                count=scan_count or self.__scan_count,
+            )
+        limiter, total = RateLimiter(max_rate), 0
+        with self.__controller.write_batch() as write_batch:
+            for batch in chunked(json_keys, batch_size or self.__fetch_chunk_size):
+                pipeline = write_batch.pipeline(transaction=False)
+                queue(pipeline, batch)
+                with get_registry().timer(
+                    "operation_seconds", operation=operation, node="master"
+                ):
+                    total += count(pipeline.execute())
+                if self.__near_cache is not None:
+                    for json_key in batch:
+                        self.__near_cache.invalidate(json_key)
+                limiter.wait(len(batch))
+        return total
+
+    def build_row(
+        self, keys: Union[list[str], str], value: Union[dict, bytes, list, str]
+    ) -> Tuple[RedisRow, dict]:
+        """
+        Args:
+            keys: Dynamic key values in schema order
+            value: Value to store
+        Returns:
+            RedisRow with key and value set, and the dynamic key dictionary
+        """
         redis_row = RedisRow(schema=self.__schema, delimiter=self.__schema.delimiter)
-        redis_row.set_key(key_dict=self.dynamic_key_list_to_dict(dynamic_keys=keys))
+        key_dict = self.dynamic_key_list_to_dict(dynamic_keys=keys)
+        redis_row.set_key(key_dict=key_dict)
         redis_row.feed(value=value)
-        if expires_at:
-            self.__controller.write_cli.setex(
-                name=redis_row.key,
-                time=self.get_expiry_time(expiry_kwargs=expires_at),
-                value=redis_row.value,
+        return redis_row, key_dict
+
+    def __flush_buffer(self) -> None:
+        """
+        Write buffered rows before a direct write, so it is not overwritten by an
+        older buffered row of the same key.
+        """
+        if self.__write_buffer is not None and self.__write_buffer.pending:
+            self.__write_buffer.flush()
+
+    def __write_buffered(
+        self, rows: List[Tuple[RedisRow, dict, Optional[dict], Optional[WriteSession]]]
+    ) -> None:
+        """
+        Flush callback of the write buffer, every row of the batch in one pipeline.
+        Runs on the flush thread, the write is recorded in the sessions of the
+        callers that stored the rows.
+        """
+        sessions = {id(row[3]): row[3] for row in rows if row[3] is not None}
+        with self.__controller.write_batch(sessions=list(sessions.values())) as batch:
+            pipeline = batch.pipeline(transaction=False)
+            for redis_row, key_dict, expires_at, _ in rows:
+                self.__queue_row(pipeline, redis_row, key_dict, expires_at)
+            with get_registry().timer(
+                "operation_seconds", operation="flush", node="master"
+            ):
+                pipeline.execute()
+        redis_rows = [row[0] for row in rows]
+        self.__count_written(redis_rows)
+        self.__invalidate(redis_rows)
+
+    @staticmethod
+    def __count_written(redis_rows: List[RedisRow]) -> None:
+        registry = get_registry()
+        if registry.enabled:
+            registry.increment(
+                "bytes_written_total",
+                sum(payload_size(redis_row.value) for redis_row in redis_rows),
+                node="master",
             )
+
+    def __invalidate(self, redis_rows: List[RedisRow]) -> None:
+        """
+        Drop written keys from the near cache so this process reads its own writes
+        without waiting for the server invalidation message.
+        """
+        if self.__near_cache is None:
+            return
+        for redis_row in redis_rows:
+            self.__near_cache.invalidate(redis_row.key)
+
+    def __queue_row(
+        self,
+        pipeline,
+        redis_row: RedisRow,
+        key_dict: dict,
+        expires_at: Optional[dict] = None,
+    ) -> None:
+        """
+        Queue SET (with expiry) and index and range set maintenance of a row. Hash
+        rows replace the previous hash: DEL, HSET and EXPIRE.
+        """
+        expiry = self.get_expiry_time(expiry_kwargs=expires_at) if expires_at else None
+        if self.__schema.hashed:
+            pipeline.delete(redis_row.key)
+            pipeline.hset(name=redis_row.key, mapping=redis_row.value)
+            if expiry:
+                pipeline.expire(redis_row.key, expiry)
         else:
-            self.__controller.write_cli.set(name=redis_row.key, value=redis_row.value)
-        return redis_row
+            pipeline.set(name=redis_row.key, value=redis_row.value, ex=expiry or None)
+        if self.__schema.indexed:
+            for index_key in self.__schema.index_keys(key_dict):
+                pipeline.sadd(index_key, redis_row.key)
+        for range_key, score in self.__schema.range_entries(key_dict):
+            pipeline.zadd(range_key, {redis_row.key: score})
 
 
 redis_client = RedisClient(controller=redis_controller)
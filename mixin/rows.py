@@ -5,17 +5,20 @@ Redis key-value operations with structured data handling.
 This module provides a class for managing Redis key-value operations with support for:
     - Structured data storage and retrieval
     - Key pattern generation for searches
-    - JSON serialization/deserialization
+    - Pluggable serialization with lazy, memoized deserialization
     - Type-safe value handling
 """
 
 import json
 
-from typing import Union, Dict, List, Optional, Any
+from typing import Union, Dict, Iterable, Iterator, List, Optional, Tuple, Any
 from .errors import RedisKeyError, RedisValueError
 from .schemas import RedisSchema
 
 
+_UNSET = object()
+
+
 class RedisRow:
     """
     Handles Redis key-value operations with structured data.
@@ -23,53 +26,63 @@ class RedisRow:
     This class provides methods for:
     - Managing compound keys with delimiters
     - Converting between bytes and string formats
-    - JSON serialization/deserialization of values
+    - Serialization of values with the schema serializer, deserialized once on
+      first data access
     - Pattern generation for Redis key searches
 
+    Rows are slotted and share their schema, the delimiter is read from the schema,
+    so a row costs its raw key, raw payload and decoded data only.
+
     Attributes:
-        __key: The Redis key in bytes or string format
-        __value: The stored value (will be JSON serialized)
-        __expires_at: Optional expiration timestamp
+        __key: The Redis key in bytes
+        __value: The stored payload, raw bytes as written to or read from Redis
+        __data: Decoded payload, filled on first data access
+        __dynamic_values: Dynamic key values of the key, parsed on first access
     """
 
-    __schema: RedisSchema
-    __key: bytes
-    __value: str
-    __delimiter: str = ":"
-    __expires_at: Optional[dict] = {"seconds": 60 * 60 * 30}
+    __slots__ = ("__schema", "__key", "__value", "__data", "__dynamic_values")
 
-    def __init__(self, schema: RedisSchema, delimiter: str = ":"):
+    def __init__(self, schema: RedisSchema, delimiter: Optional[str] = None):
         """
         Initialize RedisRow with a static key/keys.
         Args:
             schema: Schema for Redis key which includes static and dynamic keys
-            delimiter: Delimiter for compound keys
+            delimiter: Kept for backwards compatibility, the schema delimiter is used
         """
         self.__schema = schema
-        self.__delimiter = delimiter
+        self.__data = _UNSET
+        self.__dynamic_values = None
 
     @property
-    def value(self) -> str:
+    def schema(self) -> RedisSchema:
+        return self.__schema
+
+    @property
+    def value(self) -> Union[bytes, Dict]:
         """
-        Get stored value in JSON format.
+        Get stored payload as serialized by the schema serializer.
 
         Returns:
-            str: JSON serialized data
+            bytes: Serialized data, a dict of serialized fields with hash storage
         """
         return self.__value
 
     @property
     def data(self) -> Union[Dict, List]:
         """
-        Get stored value as Python object.
+        Get stored value as Python object. The payload is deserialized on first
+        access and the result is reused afterwards.
 
         Returns:
-            Union[Dict, List]: Deserialized JSON data
+            Union[Dict, List]: Deserialized data, an instance of the schema model
+                when one is bound
         """
-        try:
-            return json.loads(self.__value)
-        except json.JSONDecodeError as e:
-            raise RedisValueError(f"Invalid JSON format in stored value: {str(e)}")
+        if self.__data is _UNSET:
+            try:
+                self.__data = self.__schema.decode_value(self.__value)
+            except (ValueError, TypeError) as e:
+                raise RedisValueError(f"Invalid format in stored value: {str(e)}")
+        return self.__data
 
     # @property
     # def expires_at(self):
@@ -98,23 +111,23 @@ class RedisRow:
         Returns:
             dict: Cleaned dictionary
         """
-        dynamic_key_dict = {}
-        for (
-            key_dyn
-        ) in key_dict.keys():  # Remove all items that are not included in schema
-            if str(key_dyn).upper() in list(
-                str(k).upper() for k in self.__schema.dynamics
-            ):
-                if str(self.__delimiter) in str(key_dict[key_dyn]):
-                    raise RedisKeyError(
-                        f"Key value cannot contain delimiter: {self.__delimiter}"
-                    )
-                dynamic_key_dict[str(key_dyn).upper()] = key_dict[key_dyn]
-        return dynamic_key_dict
+        return self.__schema.clean_key_dict_input(key_dict)
+
+    @property
+    def dynamic_values(self) -> Dict[str, str]:
+        """
+        Get dynamic key values of the row key, parsed once and reused afterwards.
+
+        Returns:
+            Dict[str, str]: {"DYNAMIC_KEY_1": "KeyToFind1", ...}
+        """
+        if self.__dynamic_values is None:
+            self.__dynamic_values = self.__schema.parse_key(self.__key)
+        return self.__dynamic_values
 
     def update_key(self, key_dict: dict) -> None:
         """
-        Set key by combining static and dynamic keys.
+        Replace some dynamic values of an already set key.
         Args:
             key_dict: {}
                 key_name (str): Redis key name
@@ -125,25 +138,14 @@ class RedisRow:
             dynamic = [Name, location, UUID]
             dynamic = aaaa:bbbb:cccc
         """
-        already_dyn_dict = {}
-        already_dyn_keys = list(set(self.key.split(":")) - set(self.__schema.statics))
-        if not len(already_dyn_keys) == len(self.__schema.dynamics):
+        try:
+            already_dyn_dict = self.dynamic_values
+        except (AttributeError, RedisKeyError):
             message = "|".join(self.__schema.dynamics)
             raise RedisKeyError(
                 f"Redis Dynamic Key must set before updating key/keys: {message}"
             )
-
-        for ix, already_dyn_key in enumerate(self.__schema.dynamics):
-            already_dyn_dict[already_dyn_key] = already_dyn_keys[ix]
-
-        dynamic_key_dict, dynamic_key = self.clean_key_dict_input(key_dict), ""
-        upper_dynamic_keys = [str(k).upper() for k in dynamic_key_dict.keys()]
-        for upper_dynamic_key in upper_dynamic_keys:
-            key_to_set = already_dyn_dict[upper_dynamic_key]
-            if upper_dynamic_key in key_dict:
-                key_to_set = key_dict[upper_dynamic_key]
-            dynamic_key += f"{key_to_set}{self.__delimiter}"
-        self.__key = str(dynamic_key[:-1]).encode()
+        self.set_key(dict(already_dyn_dict, **self.clean_key_dict_input(key_dict)))
 
     def set_key(self, key_dict: dict) -> None:
         """
@@ -160,52 +162,83 @@ class RedisRow:
             dynamic = [Name, location, UUID]
             dynamic = aaaa:bbbb:cccc
         """
-        dynamic_key_dict, dynamic_key = self.clean_key_dict_input(key_dict), ""
-        upper_dynamic_keys = [str(k).upper() for k in dynamic_key_dict.keys()]
-        if not len(dynamic_key_dict) == len(self.__schema.dynamics):
-            message = "|".join(self.__schema.dynamics)
-            raise RedisKeyError(
-                f"Redis Dynamic Key Dictionary must have all key/keys: {message}"
-            )
-        for upper_dynamic_key in upper_dynamic_keys:
-            dynamic_key += f"{key_dict[upper_dynamic_key]}{self.__delimiter}"
-        self.__key = (str(self.__schema.category) + ':' + str(dynamic_key[:-1])).encode()
+        self.__key = self.__schema.build_key(key_dict).encode()
+        self.__dynamic_values = None
 
-    def set_key_value(self, key: bytes) -> None:
-        self.__key = key
+    def set_key_value(self, key: Union[bytes, str]) -> None:
+        self.__key = key.encode() if isinstance(key, str) else key
+        self.__dynamic_values = None
+
+    @property
+    def raw_key(self) -> bytes:
+        return self.__key
 
     @property
     def key(self):
         return self.__key.decode()
 
-    def feed(self, value: Union[bytes, Dict, List, str]) -> None:
+    def feed(self, value: Union[bytes, Dict, List, str, Any]) -> None:
         """
-        Convert and store value in JSON format.
+        Convert and store value with the schema serializer.
 
         Args:
-            value: Value to store (bytes, dict, or list)
+            value: Value to store (bytes, dict, list or str, or an instance of the
+                schema model). bytes are stored as given and must already be in the
+                serializer format. str is a JSON payload, validated against the
+                schema model if there is one, otherwise stored as-is by text
+                serializers and converted by binary ones (msgpack)
 
         Raises:
-            RedisValueError: If value type is not supported
+            RedisValueError: If value type is not supported, a str is not valid
+                JSON for a binary serializer or a value does not match the model
 
         Example:
             >>> RedisRow.feed({"name": "John", "age": 30})
             >>> RedisRow.feed(["value1", "value2"])
             >>> RedisRow.feed(b"Some Value to Store")
             >>> value_from_redis = RedisRow.value # Call by property
-            '{"name": "John", "age": 30}'
+            b'{"name": "John", "age": 30}'
         """
-        try:
-            if isinstance(value, (dict, list)):
-                self.__value = json.dumps(value)
-            elif isinstance(value, bytes):
-                self.__value = json.dumps(json.loads(value.decode()))
-            elif isinstance(value, str):
-                self.__value = str(value)
-            else:
-                raise RedisValueError(f"Unsupported value type: {type(value)}")
-        except json.JSONDecodeError as e:
-            raise RedisValueError(f"Invalid JSON format: {str(e)}")
+        if self.__schema.hashed and not isinstance(value, dict):
+            raise RedisValueError("Hash storage requires a dict value.")
+        if isinstance(value, bytes):
+            # Kept as read from Redis, decoded lazily by data
+            self.__value = value
+        elif isinstance(value, str) and self.__schema.model is not None:
+            try:
+                self.__value = self.__schema.encode_value(
+                    self.__schema.validate_json(value)
+                )
+            except (ValueError, TypeError) as e:
+                raise RedisValueError(f"Value can not be serialized: {str(e)}")
+        elif isinstance(value, str) and self.__schema.serializer.text:
+            self.__value = self.__schema.compress_payload(value.encode())
+        elif isinstance(value, str):
+            try:
+                self.__value = self.__schema.encode_value(json.loads(value))
+            except (ValueError, TypeError) as e:
+                raise RedisValueError(
+                    f"str values are JSON payloads, {self.__schema.serializer.name} "
+                    f"can not convert it: {str(e)}"
+                )
+        elif isinstance(value, (dict, list)) or (
+            self.__schema.model is not None and isinstance(value, self.__schema.model)
+        ):
+            try:
+                self.__value = self.__schema.encode_value(value)
+            except (ValueError, TypeError) as e:
+                raise RedisValueError(f"Value can not be serialized: {str(e)}")
+        else:
+            raise RedisValueError(f"Unsupported value type: {type(value)}")
+        self.__data = _UNSET
+
+    def set_raw_value(self, value: Union[bytes, Dict]) -> None:
+        """
+        Set the payload exactly as read from Redis, a value from GET or a field dict
+        from HGETALL/HMGET. Decoded lazily by data.
+        """
+        self.__value = value
+        self.__data = _UNSET
 
 
 class MultipleRows:
@@ -215,24 +248,192 @@ class MultipleRows:
     This class provides methods for:
     - Managing multiple RedisRow objects
     - Bulk operations on RedisRow objects
-    """
+    - Lazy evaluation: given an iterator, rows are pulled only when consumed
+    - Columnar access to keys, payloads and decoded data
 
-    __rows: List[RedisRow] = []
+    Rows are kept as two parallel lists of raw keys and raw payloads, RedisRow
+    objects are created when a row is first accessed and kept, so their decoded
+    data is reused. Slices are views sharing the same lists.
+    """
 
-    def __init__(self, rows: List[RedisRow]):
+    __slots__ = (
+        "__schema",
+        "__keys",
+        "__values",
+        "__rows",
+        "__source",
+        "__start",
+        "__stop",
+    )
+
+    def __init__(
+        self,
+        rows: Optional[Iterable[RedisRow]] = None,
+        schema: Optional[RedisSchema] = None,
+        pairs: Optional[Iterable[Tuple[bytes, bytes]]] = None,
+    ):
         """
-        Initialize MultipleRows with a list of RedisRow objects.
+        Initialize MultipleRows with RedisRow objects or (key, payload) pairs.
         Args:
-            rows: List of RedisRow objects
+            rows: List of RedisRow objects, or any iterable (e.g. RedisClient.iter_find)
+                to evaluate lazily
+            schema: Schema of the rows, required when pairs are given
+            pairs: List or iterator of raw (key, payload) pairs as read from Redis
         """
-        self.__rows: List[RedisRow] = rows
+        self.__schema = schema
+        self.__keys: List[bytes] = []
+        self.__values: List[bytes] = []
+        self.__rows: List[Optional[RedisRow]] = []
+        self.__source: Optional[Iterator] = None
+        self.__start, self.__stop = 0, None
+        items = rows if rows is not None else pairs if pairs is not None else []
+        if isinstance(items, (list, tuple)):
+            for item in items:
+                self.__append(item)
+        else:
+            self.__source = iter(items)
+
+    def __append(self, item: Union[RedisRow, Tuple[bytes, bytes]]) -> None:
+        if isinstance(item, RedisRow):
+            if self.__schema is None:
+                self.__schema = item.schema
+            self.__keys.append(item.raw_key)
+            self.__values.append(item.value)
+            self.__rows.append(item)
+        else:
+            key, value = item
+            self.__keys.append(key.encode() if isinstance(key, str) else key)
+            self.__values.append(value)
+            self.__rows.append(None)
+
+    def __pull(self) -> bool:
+        """
+        Move one row from the lazy source to the materialized rows.
+        Returns:
+            bool: False if the source is exhausted
+        """
+        if self.__source is None:
+            return False
+        try:
+            self.__append(next(self.__source))
+            return True
+        except StopIteration:
+            self.__source = None
+            return False
+
+    def __drain(self) -> None:
+        while self.__pull():
+            pass
+
+    def __bounds(self) -> Tuple[int, int]:
+        self.__drain()
+        stop = len(self.__keys) if self.__stop is None else self.__stop
+        return self.__start, stop
+
+    def __row(self, index: int) -> RedisRow:
+        redis_row = self.__rows[index]
+        if redis_row is None:
+            redis_row = RedisRow(schema=self.__schema)
+            redis_row.set_key_value(key=self.__keys[index])
+            redis_row.set_raw_value(value=self.__values[index])
+            self.__rows[index] = redis_row
+        return redis_row
+
+    def __iter__(self) -> Iterator[RedisRow]:
+        index = self.__start
+        while True:
+            stop = len(self.__keys) if self.__stop is None else self.__stop
+            if index >= stop and (self.__stop is not None or not self.__pull()):
+                return
+            yield self.__row(index)
+            index += 1
+
+    def __len__(self) -> int:
+        start, stop = self.__bounds()
+        return stop - start
+
+    def __getitem__(self, item: Union[int, slice]) -> Union[RedisRow, "MultipleRows"]:
+        if isinstance(item, int) and item >= 0 and self.__stop is None:
+            # Pull only as far as the requested row
+            while len(self.__keys) <= self.__start + item and self.__pull():
+                pass
+            if self.__start + item < len(self.__keys):
+                return self.__row(self.__start + item)
+        start, stop = self.__bounds()
+        if isinstance(item, slice):
+            view_start, view_stop, step = item.indices(stop - start)
+            if step != 1:
+                return MultipleRows(
+                    schema=self.__schema,
+                    rows=[
+                        self.__row(start + ix)
+                        for ix in range(view_start, view_stop, step)
+                    ],
+                )
+            view = MultipleRows(schema=self.__schema)
+            view.__keys, view.__values = self.__keys, self.__values
+            view.__rows = self.__rows
+            view.__start = start + view_start
+            view.__stop = start + max(view_start, view_stop)
+            return view
+        if item < 0:
+            item += stop - start
+        if not 0 <= item < stop - start:
+            raise IndexError("MultipleRows index out of range")
+        return self.__row(start + item)
+
+    @property
+    def exhausted(self) -> bool:
+        """
+        Returns:
+            bool: True if every row has been fetched
+        """
+        return self.__source is None
 
     @property
     def all(self) -> List[RedisRow]:
-        return list(self.__rows)
+        return list(self)
 
     @property
     def first(self) -> RedisRow:
-        if not self.__rows:
+        stop = len(self.__keys) if self.__stop is None else self.__stop
+        if self.__start >= stop and (self.__stop is not None or not self.__pull()):
             raise Exception("No records has found to return first row.")
-        return list(self.__rows)[0]
+        return self.__row(self.__start)
+
+    @property
+    def raw_keys(self) -> List[bytes]:
+        start, stop = self.__bounds()
+        return self.__keys[start:stop]
+
+    @property
+    def keys(self) -> List[str]:
+        return [key.decode() for key in self.raw_keys]
+
+    @property
+    def dynamic_values(self) -> List[Dict[str, str]]:
+        """
+        Dynamic key values of all rows, in row order.
+        """
+        raw_keys = self.raw_keys
+        if not raw_keys:
+            return []
+        return [self.__schema.parse_key(key) for key in raw_keys]
+
+    @property
+    def values(self) -> List[bytes]:
+        start, stop = self.__bounds()
+        return self.__values[start:stop]
+
+    @property
+    def data(self) -> List[Any]:
+        """
+        Decoded payloads of all rows, in row order.
+        """
+        values = self.values
+        if not values:
+            return []
+        try:
+            return self.__schema.decode_values(values)
+        except (ValueError, TypeError) as e:
+            raise RedisValueError(f"Invalid format in stored value: {str(e)}")
@@ -1,5 +1,17 @@
-from typing import Union
-from .errors import RedisKeyError
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+from pydantic import BaseModel, TypeAdapter
+from .errors import RedisKeyError, RedisValueError
+from .serializers import Serializer, get_serializer
+from .compression import Compressor, decompress_payload
+from .metrics import get_registry
+from .utils import to_timestamp
+
+storages = ("string", "hash")
+range_types = ("number", "time")
+
+# SCAN MATCH glob characters, escaped when a value has to match literally
+_GLOB_ESCAPES = str.maketrans({c: "\\" + c for c in "*?[]\\"})
+_GLOB_CHARS = frozenset("*?[\\")
 
 
 class RedisSchema:
@@ -7,13 +19,50 @@ class RedisSchema:
     __static_keys: list = []
     __dynamic_keys: list = []
     __delimiter: str = ":"
+    __indexed: bool = False
+    index_prefix: str = "__index__"
+    range_prefix: str = "__range__"
 
-    def __init__(self, static_keys: list, dynamic_keys: list, delimiter: str = ":"):
+    def __init__(
+        self,
+        static_keys: list,
+        dynamic_keys: list,
+        delimiter: str = ":",
+        indexed: bool = False,
+        serializer: Union[str, Serializer] = "json",
+        compression: Optional[Union[str, Compressor]] = None,
+        compression_threshold: int = 1024,
+        storage: str = "string",
+        shard_keys: Optional[list] = None,
+        model: Optional[Type[BaseModel]] = None,
+        range_keys: Optional[Dict[str, str]] = None,
+    ):
         """
         Initialize RedisKeys with static keys. Set dynamic keys via set_keys method.
         Args:
             static_keys: STATIC_REDIS_KEY_1, STATIC_REDIS_KEY_2, STATIC_REDIS_KEY_3
             dynamic_keys: DYNAMIC_KEY_1, DYNAMIC_KEY_2, DYNAMIC_KEY_3
+            delimiter: Delimiter between dynamic keys
+            indexed: Maintain a set of full keys per dynamic key value on store, so
+                partial finds are resolved with SINTER instead of a keyspace SCAN
+            serializer: Value serializer, one of json, orjson, msgpack or a Serializer
+            compression: Optional codec (zlib, zstd, lz4) or Compressor applied to
+                serialized values of at least compression_threshold bytes
+            compression_threshold: Minimum payload size in bytes to compress
+            storage: string stores each row as one serialized value, hash stores a
+                dict row as a Redis HASH with every field serialized on its own, so
+                single fields can be read and written
+            shard_keys: Dynamic keys whose values pick the shard of a row with a
+                sharded controller, so rows sharing them co-locate. All dynamic keys
+                (the full key) when None
+            model: Optional pydantic model of the rows. Values are validated and
+                written with the model JSON dump and rows decode straight from the
+                raw bytes into model instances. Requires string storage and a JSON
+                serializer
+            range_keys: Dynamic keys kept in a sorted set per category on store, so
+                find_range can select rows by a number or time interval, e.g.
+                {"CREATED_AT": "time", "PRICE": "number"}. Time values are Unix
+                seconds or ISO 8601 without the delimiter (2024-05-01, 20240501T100000Z)
 
         Example:
             >>> redis_key = RedisSchema(
@@ -34,6 +83,60 @@ class RedisSchema:
 
         self.__static_keys = static_keys
         self.__dynamic_keys = dynamic_keys
+        self.__indexed = indexed
+        self.__serializer = get_serializer(serializer)
+        if isinstance(compression, str):
+            compression = Compressor(codec=compression, threshold=compression_threshold)
+        self.__compressor = compression
+        if storage not in storages:
+            raise RedisValueError(
+                f"Unknown storage: {storage}, choose one of {', '.join(storages)}"
+            )
+        self.__storage = storage
+        self.__shard_keys = [str(k).upper() for k in shard_keys] if shard_keys else None
+        self.__range_keys = {
+            str(k).upper(): kind for k, kind in (range_keys or {}).items()
+        }
+        unknown_types = [t for t in self.__range_keys.values() if t not in range_types]
+        if unknown_types:
+            raise RedisValueError(
+                f"Unknown range type: {unknown_types[0]}, "
+                f"choose one of {', '.join(range_types)}"
+            )
+        self.__model = model
+        self.__adapter: Optional[TypeAdapter] = None
+        self.__list_adapter: Optional[TypeAdapter] = None
+        if model is not None:
+            if self.hashed or not self.__serializer.text:
+                raise RedisValueError(
+                    "A model requires string storage and a JSON serializer."
+                )
+            # Validators are built once per schema, not per row
+            self.__adapter = TypeAdapter(model)
+            self.__list_adapter = TypeAdapter(List[model])
+        self.__compile()
+
+    def __compile(self) -> None:
+        """
+        Precompute everything key building and parsing needs, so store and find only
+        fill in values: the category prefix, dynamic key positions and the index set
+        prefix. Called again when dynamic keys change.
+        """
+        self.__upper_dynamics = [str(k).upper() for k in self.__dynamic_keys]
+        self.__positions = {k: ix for ix, k in enumerate(self.__upper_dynamics)}
+        self.__category = ":".join([str(_) for _ in self.__static_keys])
+        self.__prefix = self.__category + ":"
+        self.__prefix_bytes = self.__prefix.encode()
+        self.__index_set_prefix = f"{self.index_prefix}:{self.__category}:"
+        shard_keys = self.__shard_keys or self.__upper_dynamics
+        unknown = [k for k in shard_keys if k not in self.__positions]
+        if unknown:
+            raise RedisKeyError(f"Shard keys are not dynamic keys: {', '.join(unknown)}")
+        self.__shard_positions = [self.__positions[k] for k in shard_keys]
+        unknown = [k for k in self.__range_keys if k not in self.__positions]
+        if unknown:
+            raise RedisKeyError(f"Range keys are not dynamic keys: {', '.join(unknown)}")
+        self.__range_set_prefix = f"{self.range_prefix}:{self.__category}:"
 
     @property
     def delimiter(self):
@@ -44,6 +147,150 @@ class RedisSchema:
         """
         return self.__delimiter
 
+    @property
+    def indexed(self) -> bool:
+        """
+        Get index mode.
+        Returns:
+            bool: True if store maintains secondary indexes for dynamic keys
+        """
+        return self.__indexed
+
+    @property
+    def storage(self) -> str:
+        """
+        Get storage mode.
+        Returns:
+            str: string or hash
+        """
+        return self.__storage
+
+    @property
+    def hashed(self) -> bool:
+        """
+        Returns:
+            bool: True if rows are stored as Redis HASHes
+        """
+        return self.__storage == "hash"
+
+    @property
+    def serializer(self) -> Serializer:
+        """
+        Get value serializer.
+        Returns:
+            Serializer: Serializer used to encode and decode row values
+        """
+        return self.__serializer
+
+    @property
+    def model(self) -> Optional[Type[BaseModel]]:
+        """
+        Get row model.
+        Returns:
+            Type[BaseModel]: pydantic model rows decode into, None for plain data
+        """
+        return self.__model
+
+    @property
+    def compressor(self) -> Optional[Compressor]:
+        """
+        Get compressor.
+        Returns:
+            Compressor: Compression stage of stored values, None if disabled
+        """
+        return self.__compressor
+
+    def compress_payload(self, payload: bytes) -> bytes:
+        """
+        Compress a serialized payload if compression is enabled and it is large enough.
+        """
+        if self.__compressor is None:
+            return payload
+        return self.__compressor.compress(payload)
+
+    def encode_value(self, value: Any) -> Union[bytes, Dict[str, bytes]]:
+        """
+        Serialize a Python object into the payload stored in Redis. With hash storage
+        the value must be a dict and every field is serialized on its own.
+        """
+        if self.hashed:
+            if not isinstance(value, dict) or not value:
+                raise RedisValueError("Hash storage requires a non-empty dict value.")
+            return {str(field): self.encode_value_field(v) for field, v in value.items()}
+        return self.encode_value_field(value)
+
+    def __dumps(self, value: Any) -> bytes:
+        if self.__adapter is None:
+            return self.__serializer.dumps(value)
+        if not isinstance(value, self.__model):
+            value = self.__adapter.validate_python(value)
+        return self.__adapter.dump_json(value)
+
+    def validate_json(self, payload: Union[str, bytes]) -> Any:
+        """
+        Validate a JSON document into an instance of the row model.
+        """
+        if self.__adapter is None:
+            raise RedisValueError("The schema has no model to validate against.")
+        return self.__adapter.validate_json(payload)
+
+    @property
+    def __serializer_name(self) -> str:
+        return "pydantic" if self.__adapter is not None else self.__serializer.name
+
+    def encode_value_field(self, value: Any) -> bytes:
+        """
+        Serialize a single value, a whole row or one field of a hash row.
+        """
+        registry = get_registry()
+        if not registry.enabled:
+            return self.compress_payload(self.__dumps(value))
+        with registry.timer(
+            "serialization_seconds", direction="encode", serializer=self.__serializer_name
+        ):
+            return self.compress_payload(self.__dumps(value))
+
+    def decode_value(self, payload: Union[bytes, Dict[bytes, bytes]]) -> Any:
+        """
+        Deserialize a payload read from Redis, compressed or not. A dict payload is a
+        hash row as read by HGETALL/HMGET and is decoded field by field.
+        """
+        registry = get_registry()
+        if not registry.enabled:
+            return self.__decode(payload)
+        with registry.timer(
+            "serialization_seconds", direction="decode", serializer=self.__serializer_name
+        ):
+            return self.__decode(payload)
+
+    def decode_values(self, payloads: List[Union[bytes, Dict[bytes, bytes]]]) -> list:
+        """
+        Deserialize many payloads. With a model the JSON documents are joined into
+        one array and validated in a single call.
+        """
+        if self.__list_adapter is None or not payloads:
+            return [self.decode_value(payload) for payload in payloads]
+        document = b"[" + b",".join(decompress_payload(p) for p in payloads) + b"]"
+        registry = get_registry()
+        if not registry.enabled:
+            return self.__list_adapter.validate_json(document)
+        with registry.timer(
+            "serialization_seconds", direction="decode", serializer="pydantic"
+        ):
+            return self.__list_adapter.validate_json(document)
+
+    def __decode(self, payload: Union[bytes, Dict[bytes, bytes]]) -> Any:
+        if isinstance(payload, dict):
+            return {
+                field.decode() if isinstance(field, bytes) else field: (
+                    self.__serializer.loads(decompress_payload(value))
+                )
+                for field, value in payload.items()
+            }
+        if self.__adapter is not None:
+            return self.__adapter.validate_json(decompress_payload(payload))
+        return self.__serializer.loads(decompress_payload(payload))
+
     @property
     def dynamics(self):
         """
@@ -70,7 +317,7 @@ class RedisSchema:
             Returns a string of static keys separated by given delimiter
             STATIC_REDIS_KEY_1:STATIC_REDIS_KEY_2:STATIC_REDIS_KEY_3
         """
-        return ":".join([_ for _ in self.statics])
+        return self.__category
 
     @property
     def search_keys(self) -> str:
@@ -82,6 +329,14 @@ class RedisSchema:
         """
         return ":".join([_ for _ in self.dynamics])
 
+    @property
+    def prefix(self) -> str:
+        """
+        Returns:
+            Category followed by the separator every key of the schema starts with
+        """
+        return self.__prefix
+
     @property
     def redis_key(self) -> bytes:
         """
@@ -103,6 +358,7 @@ class RedisSchema:
             for _ in dynamic_keys:
                 if _ not in self.__dynamic_keys:
                     self.__dynamic_keys.append(_)
+        self.__compile()
 
     def clean_key_dict_input(self, key_dict: dict) -> dict:
         """
@@ -110,31 +366,236 @@ class RedisSchema:
         Args:
             key_dict: Dictionary of keys
         Returns:
-            dict: Cleaned dictionary
+            dict: Cleaned dictionary keyed by upper case dynamic key
         """
         dynamic_key_dict = {}
-        for (
-            key_dyn
-        ) in key_dict.keys():  # Remove all items that are not included in schema
-            if str(key_dyn).upper() in list(str(k).upper() for k in self.dynamics):
-                if str(self.__delimiter) in str(key_dict[key_dyn]):
-                    raise RedisKeyError(
-                        f"Key value cannot contain delimiter: {self.__delimiter}"
-                    )
-                dynamic_key_dict[str(key_dyn).upper()] = key_dict[key_dyn]
+        for key_dyn, value in key_dict.items():
+            upper_key = str(key_dyn).upper()
+            if upper_key not in self.__positions:
+                continue  # Remove all items that are not included in schema
+            if self.__delimiter in str(value):
+                raise RedisKeyError(
+                    f"Key value cannot contain delimiter: {self.__delimiter}"
+                )
+            dynamic_key_dict[upper_key] = value
         return dynamic_key_dict
 
+    def __ordered_values(self, key_dict: dict, missing: Optional[str]) -> list:
+        values = [missing] * len(self.__upper_dynamics)
+        for upper_key, value in self.clean_key_dict_input(key_dict).items():
+            values[self.__positions[upper_key]] = str(value)
+        return values
+
+    def build_key(self, key_dict: dict) -> str:
+        """
+        Build the full key of a row, every dynamic key must be given.
+        Args:
+            key_dict: {"DYNAMIC_KEY_1": "KeyToFind1", ...}
+        Returns:
+            STATIC_REDIS_KEY_1:...:KeyToFind1:KeyToFind2:KeyToFind3
+        """
+        values = self.__ordered_values(key_dict, missing=None)
+        if None in values:
+            message = "|".join(self.dynamics)
+            raise RedisKeyError(
+                f"Redis Dynamic Key Dictionary must have all key/keys: {message}"
+            )
+        return self.__prefix + self.__delimiter.join(values)
+
+    def build_pattern(self, key_dict: dict, escape: bool = True) -> str:
+        """
+        Build a SCAN MATCH pattern, dynamic keys not given match anything.
+        Args:
+            key_dict: {"DYNAMIC_KEY_2": "KeyToFind2"}
+            escape: Escape glob characters in the values so they match literally
+        Returns:
+            STATIC_REDIS_KEY_1:...:*:KeyToFind2:*
+        """
+        values = self.__ordered_values(key_dict, missing="*")
+        if escape:
+            values = [
+                value if value == "*" else value.translate(_GLOB_ESCAPES)
+                for value in values
+            ]
+        return self.__prefix + self.__delimiter.join(values)
+
+    def exact_key(self, key_dict: dict) -> Optional[str]:
+        """
+        Full key of a find that can only match one row.
+        Args:
+            key_dict: {"DYNAMIC_KEY_1": "KeyToFind1", ...}
+        Returns:
+            str: Full key if every dynamic key is given without glob characters,
+                None if the find must scan
+        """
+        values = self.__ordered_values(key_dict, missing=None)
+        if None in values or any(_GLOB_CHARS & set(value) for value in values):
+            return None
+        return self.__prefix + self.__delimiter.join(values)
+
+    def shard_key(self, key_dict: dict, literal: bool = False) -> Optional[str]:
+        """
+        Value a sharded controller hashes to place a row.
+        Args:
+            key_dict: Dictionary of keys
+            literal: Values are the key of a row, not a find pattern, so glob
+                characters are part of the value
+        Returns:
+            str: Shard key values joined by the delimiter, None if one of them is
+                missing or a glob pattern so the row may live on any shard
+        """
+        values = self.__ordered_values(key_dict, missing=None)
+        shard_values = [values[ix] for ix in self.__shard_positions]
+        if None in shard_values:
+            return None
+        if not literal and any(_GLOB_CHARS & set(value) for value in shard_values):
+            return None
+        return self.__delimiter.join(shard_values)
+
     def merge_key(self, key_dict: dict) -> str:
         """
-        Merge key with dynamic keys.
+        Merge key with dynamic keys. Values are taken as glob patterns.
+        Args:
+            key_dict: Dictionary of keys
+        """
+        return self.build_pattern(key_dict, escape=False)
+
+    @property
+    def index_pattern(self) -> str:
+        """
+        Pattern matching every index set of this schema's category.
+        Returns:
+            __index__:STATIC_REDIS_KEY_1:STATIC_REDIS_KEY_2:STATIC_REDIS_KEY_3:*
+        """
+        return f"{self.index_prefix}:{self.category}:*"
+
+    def index_key(self, dynamic_key: str, value) -> str:
+        """
+        Name of the set holding full keys whose dynamic key equals the value.
+        Index sets live outside the category prefix so they never match a find SCAN.
+        Args:
+            dynamic_key: DYNAMIC_KEY_2
+            value: KeyToFind2
+        Returns:
+            __index__:STATIC_REDIS_KEY_1:...:DYNAMIC_KEY_2=KeyToFind2
+        """
+        return f"{self.__index_set_prefix}{str(dynamic_key).upper()}={value}"
+
+    def index_keys(self, key_dict: dict) -> list[str]:
+        """
+        Index set names for every dynamic key given in key_dict.
         Args:
             key_dict: Dictionary of keys
+        Returns:
+            list[str]: Index set names, empty if no dynamic key is given
+        """
+        return [
+            self.index_key(dynamic_key=key, value=value)
+            for key, value in self.clean_key_dict_input(key_dict).items()
+        ]
+
+    def index_lookup(self, key_dict: dict) -> Tuple[List[str], Optional[str]]:
+        """
+        Index sets a find can intersect. Index sets hold literal values, so values
+        with glob characters are left out and matched against the members instead.
+        Args:
+            key_dict: {"DYNAMIC_KEY_1": "Key*", "DYNAMIC_KEY_2": "KeyToFind2"}
+        Returns:
+            Index set names of the literal values, empty if the find must scan, and
+            the glob pattern members must match, None if every value is literal
+        """
+        index_keys, match_key = [], None
+        for key, value in self.clean_key_dict_input(key_dict).items():
+            if _GLOB_CHARS & set(str(value)):
+                match_key = self.merge_key(key_dict)
+            else:
+                index_keys.append(self.index_key(dynamic_key=key, value=value))
+        return index_keys, match_key
+
+    @property
+    def range_keys(self) -> Dict[str, str]:
+        """
+        Returns:
+            dict: {"DYNAMIC_KEY": "number" or "time"} of range indexed dynamic keys
+        """
+        return dict(self.__range_keys)
+
+    @property
+    def ranged(self) -> bool:
+        """
+        Returns:
+            bool: True if store maintains sorted sets for range keys
+        """
+        return bool(self.__range_keys)
+
+    def range_key(self, dynamic_key: str) -> str:
+        """
+        Name of the sorted set holding full keys scored by a range key.
+        Args:
+            dynamic_key: CREATED_AT
+        Returns:
+            __range__:STATIC_REDIS_KEY_1:...:CREATED_AT
+        """
+        upper_key = str(dynamic_key).upper()
+        if upper_key not in self.__range_keys:
+            raise RedisKeyError(f"Not a range key: {dynamic_key}")
+        return f"{self.__range_set_prefix}{upper_key}"
+
+    def range_score(self, dynamic_key: str, value: Any) -> float:
+        """
+        Sorted set score of a range key value.
+        Args:
+            dynamic_key: CREATED_AT
+            value: Number, or time as datetime, Unix seconds or ISO 8601 string
+        Returns:
+            float: Score
+        """
+        upper_key = str(dynamic_key).upper()
+        if upper_key not in self.__range_keys:
+            raise RedisKeyError(f"Not a range key: {dynamic_key}")
+        try:
+            if self.__range_keys[upper_key] == "time":
+                return to_timestamp(value)
+            return float(value)
+        except (TypeError, ValueError) as e:
+            raise RedisValueError(f"Invalid value of range key {upper_key}: {value}") from e
+
+    def range_entries(self, key_dict: dict) -> list:
+        """
+        Sorted sets and scores of a row, every range key must be given.
+        Args:
+            key_dict: Dictionary of keys
+        Returns:
+            [(str, float)]: Sorted set names with the score of the row
+        """
+        values = self.clean_key_dict_input(key_dict)
+        return [
+            (self.range_key(key), self.range_score(key, values[key]))
+            for key in self.__range_keys
+            if key in values
+        ]
+
+    def parse_key(self, key: Union[bytes, str]) -> dict:
+        """
+        Recover dynamic key values from a full Redis key.
+        Args:
+            key: STATIC_REDIS_KEY_1:...:KeyToFind1:KeyToFind2:KeyToFind3
+        Returns:
+            dict: {"DYNAMIC_KEY_1": "KeyToFind1", ...}
+        """
+        if isinstance(key, bytes):
+            if not key.startswith(self.__prefix_bytes):
+                raise RedisKeyError(f"Key does not belong to category: {self.category}")
+            key = key.decode()
+        elif not key.startswith(self.__prefix):
+            raise RedisKeyError(f"Key does not belong to category: {self.category}")
+        dynamic_values = key[len(self.__prefix) :].split(self.__delimiter)
+        if len(dynamic_values) != len(self.__upper_dynamics):
+            raise RedisKeyError(f"Key does not match schema dynamics: {key}")
+        return dict(zip(self.__upper_dynamics, dynamic_values))
+
+    def split_key(self, key: Union[bytes, str]) -> dict:
+        """
+        Alias of parse_key.
         """
-        dynamic_key_dict, dynamic_key = self.clean_key_dict_input(key_dict), ""
-        upper_dynamic_keys = [str(k).upper() for k in dynamic_key_dict.keys()]
-        for upper_dynamic_key in self.dynamics:
-            key_to_set = "*"
-            if upper_dynamic_key in upper_dynamic_keys:
-                key_to_set = key_dict[upper_dynamic_key]
-            dynamic_key += f"{key_to_set}{self.__delimiter}"
-        return str(self.category) + ":" + str(dynamic_key[:-1])
+        return self.parse_key(key)
@@ -0,0 +1,157 @@
+"""
+Lua scripts
+Server-side scripts run by RedisClient through EVALSHA.
+
+This module provides:
+    - FILTER_SCRIPT: SCAN a bounded batch (or take the given keys), GET the values
+      and keep only rows whose top-level JSON fields match every filter
+    - encode_filters: validate filters and pack them for the script
+    - REMOVE_MISSING_SCRIPT: drop a full key from index and range sets only if its
+      row does not exist, checked and removed atomically on the master
+    - UPDATE_EXISTING_SCRIPT: write fields of a hash row only if the row exists
+"""
+
+import json
+
+from typing import Union
+
+from .errors import RedisValueError
+
+FILTER_OPERATORS = ("eq", "ne", "gt", "gte", "lt", "lte", "in", "exists")
+
+# Script flags are understood from Redis 7, older servers reject the shebang line
+NO_WRITES_FLAG = "#!lua flags=no-writes\n"
+
+# KEYS: full key of the row, then the index sets (SET) and range sets (ZSET) holding it
+# Returns: number of removed members, 0 if the row exists
+REMOVE_MISSING_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return 0
+end
+local removed = 0
+for ix = 2, #KEYS do
+    local kind = redis.call("TYPE", KEYS[ix])["ok"]
+    if kind == "set" then
+        removed = removed + redis.call("SREM", KEYS[ix], KEYS[1])
+    elseif kind == "zset" then
+        removed = removed + redis.call("ZREM", KEYS[ix], KEYS[1])
+    end
+end
+return removed
+"""
+
+# KEYS: full key of the hash row
+# ARGV: field1, value1, field2, value2, ...
+# Returns: number of fields that did not exist before, -1 if the row does not exist
+UPDATE_EXISTING_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return -1
+end
+local added = 0
+for ix = 1, #ARGV, 2 do
+    added = added + redis.call("HSET", KEYS[1], ARGV[ix], ARGV[ix + 1])
+end
+return added
+"""
+
+# ARGV: mode ("scan" or "keys"), filters (JSON), cursor, match, count
+# Returns: {next cursor, keys looked at, key1, value1, key2, value2, ...}
+FILTER_SCRIPT = """
+local filters = cjson.decode(ARGV[2])
+
+local function compare(actual, op, expected)
+    if op == "exists" then
+        return (actual ~= nil and actual ~= cjson.null) == expected
+    end
+    if op == "eq" then
+        return actual == expected
+    end
+    if op == "ne" then
+        return actual ~= expected
+    end
+    if op == "in" then
+        for _, candidate in ipairs(expected) do
+            if actual == candidate then
+                return true
+            end
+        end
+        return false
+    end
+    if type(actual) ~= type(expected) or type(actual) == "table" then
+        return false
+    end
+    if op == "gt" then
+        return actual > expected
+    elseif op == "gte" then
+        return actual >= expected
+    elseif op == "lt" then
+        return actual < expected
+    elseif op == "lte" then
+        return actual <= expected
+    end
+    return false
+end
+
+local function matches(payload)
+    local ok, document = pcall(cjson.decode, payload)
+    if not ok or type(document) ~= "table" then
+        return false
+    end
+    for _, filter in ipairs(filters) do
+        if not compare(document[filter[1]], filter[2], filter[3]) then
+            return false
+        end
+    end
+    return true
+end
+
+local cursor, keys = "0", KEYS
+if ARGV[1] == "scan" then
+    local scanned = redis.call("SCAN", ARGV[3], "MATCH", ARGV[4], "COUNT", ARGV[5])
+    cursor, keys = scanned[1], scanned[2]
+end
+
+local result = {cursor, #keys}
+for _, key in ipairs(keys) do
+    local ok, payload = pcall(redis.call, "GET", key)
+    if ok and payload and matches(payload) then
+        result[#result + 1] = key
+        result[#result + 1] = payload
+    end
+end
+return result
+"""
+
+
+def encode_filters(filters: Union[dict, list]) -> str:
+    """
+    Validate filters and pack them as the JSON argument of FILTER_SCRIPT.
+    Args:
+        filters: {"Location": "UK"} for equality, or a list of
+            (field, operator, value) tuples, operator one of FILTER_OPERATORS
+            e.g. [("Age", "gte", 18), ("Location", "in", ["UK", "DE"])]
+    Returns:
+        str: JSON array of [field, operator, value] triples
+    """
+    if isinstance(filters, dict):
+        filters = [(field, "eq", value) for field, value in filters.items()]
+    packed = []
+    for item in filters:
+        try:
+            field, operator, value = item
+        except (TypeError, ValueError):
+            raise RedisValueError(f"Filter must be (field, operator, value): {item}")
+        if operator not in FILTER_OPERATORS:
+            raise RedisValueError(
+                f"Unknown filter operator: {operator}, "
+                f"choose one of {', '.join(FILTER_OPERATORS)}"
+            )
+        if operator == "in" and not isinstance(value, (list, tuple)):
+            raise RedisValueError("Filter operator in requires a list of values.")
+        packed.append([str(field), operator, value])
+    if not packed:
+        raise RedisValueError("At least one filter is required.")
+    try:
+        return json.dumps(packed)
+    except (TypeError, ValueError) as e:
+        raise RedisValueError(f"Filter values must be JSON serializable: {str(e)}")
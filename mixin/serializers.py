@@ -0,0 +1,115 @@
+"""
+Redis Serializers
+Pluggable value serializers used by RedisSchema and RedisRow.
+
+This module provides:
+    - JsonSerializer: stdlib json, always available
+    - OrjsonSerializer: orjson, requires the optional orjson package
+    - MsgpackSerializer: msgpack, requires the optional msgpack package
+"""
+
+import json
+
+from typing import Any, Union
+from .errors import RedisValueError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+class Serializer:
+    """
+    Converts Python objects to the bytes stored in Redis and back.
+
+    Attributes:
+        name: Name used to select the serializer on RedisSchema
+        text: True if payloads are UTF-8 text, so str values can be stored as-is
+    """
+
+    name: str = ""
+    text: bool = True
+
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, payload: bytes) -> Any:
+        raise NotImplementedError
+
+
+class JsonSerializer(Serializer):
+    """
+    Standard library json.
+    """
+
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value).encode()
+
+    def loads(self, payload: bytes) -> Any:
+        return json.loads(payload)
+
+
+class OrjsonSerializer(Serializer):
+    """
+    orjson, same JSON payloads as JsonSerializer with faster encode and decode.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise RedisValueError("orjson serializer requires the orjson package.")
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    def loads(self, payload: bytes) -> Any:
+        return orjson.loads(payload)
+
+
+class MsgpackSerializer(Serializer):
+    """
+    MessagePack, compact binary payloads. Not readable by JSON consumers.
+    """
+
+    name = "msgpack"
+    text = False
+
+    def __init__(self):
+        if msgpack is None:
+            raise RedisValueError("msgpack serializer requires the msgpack package.")
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, payload: bytes) -> Any:
+        return msgpack.unpackb(payload, raw=False)
+
+
+serializers = {
+    JsonSerializer.name: JsonSerializer,
+    OrjsonSerializer.name: OrjsonSerializer,
+    MsgpackSerializer.name: MsgpackSerializer,
+}
+
+
+def get_serializer(serializer: Union[str, Serializer]) -> Serializer:
+    """
+    Args:
+        serializer: Serializer object or one of json, orjson, msgpack
+    Returns:
+        Serializer object
+    """
+    if isinstance(serializer, Serializer):
+        return serializer
+    if serializer not in serializers:
+        raise RedisValueError(f"Unknown serializer: {serializer}")
+    return serializers[serializer]()
@@ -0,0 +1,158 @@
+"""
+Sharded controller
+Several independent master/replica groups addressed as one keyspace.
+
+This module provides:
+    - HashRing: consistent hashing of shard keys onto named shards with virtual nodes
+    - ShardedRedisController: one RedisController per shard, rows are placed by the
+      ring so adding a shard only moves about 1/N of the keys
+"""
+
+import hashlib
+
+from bisect import bisect
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Union
+
+from .controller import RedisController
+
+
+class HashRing:
+    """
+    Consistent hash ring. Every shard owns `vnodes` points on a 64 bit ring, a key
+    belongs to the first point clockwise of its hash.
+    """
+
+    def __init__(self, names: List[str], vnodes: int = 160):
+        """
+        Args:
+            names: Unique shard names, e.g. host:port of the shard master
+            vnodes: Points per shard, more points spread keys more evenly
+        """
+        if not names:
+            raise Exception("A hash ring needs at least one shard.")
+        if len(set(names)) != len(names):
+            raise Exception("Shard names must be unique.")
+        if vnodes < 1:
+            raise ValueError("vnodes must be positive.")
+        points = sorted(
+            (self.hash(f"{name}#{ix}"), shard)
+            for shard, name in enumerate(names)
+            for ix in range(vnodes)
+        )
+        self.__hashes = [point for point, _ in points]
+        self.__shards = [shard for _, shard in points]
+
+    @staticmethod
+    def hash(value: Union[str, bytes]) -> int:
+        if isinstance(value, str):
+            value = value.encode()
+        return int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), "big")
+
+    def get_shard(self, key: Union[str, bytes]) -> int:
+        """
+        Args:
+            key: Shard key
+        Returns:
+            int: Index of the shard owning the key
+        """
+        ix = bisect(self.__hashes, self.hash(key))
+        return self.__shards[ix % len(self.__shards)]
+
+
+class ShardedRedisController:
+    """
+    Route rows over several master/replica groups without Redis Cluster. Every group
+    is a regular RedisController (lazy, balanced, health checked), the ring decides
+    which group owns a shard key.
+    """
+
+    def __init__(
+        self,
+        shards: List[Union[RedisController, Dict]],
+        vnodes: int = 160,
+        **controller_kwargs,
+    ):
+        """
+        Args:
+            shards: RedisController objects, or dicts with master and replicas
+                connection configs, reads go to the master of a shard without
+                replicas:
+                {"master": {"host": ..., "port": ...}, "replicas": [{...}, ...]}
+            vnodes: Points per shard on the hash ring
+            controller_kwargs: Passed to every RedisController built from a dict
+                (balancer, consistency, pool configs, ...)
+        """
+        if not shards:
+            raise Exception("No shards are given to create a sharded controller")
+        self.__controllers: List[RedisController] = [
+            shard
+            if isinstance(shard, RedisController)
+            else RedisController(
+                master_redis_config=shard["master"],
+                replica_redis_configs=shard["replicas"],
+                **controller_kwargs,
+            )
+            for shard in shards
+        ]
+        self.__names = [
+            self.shard_name(controller.master_redis_config)
+            for controller in self.__controllers
+        ]
+        self.__ring = HashRing(self.__names, vnodes=vnodes)
+
+    @staticmethod
+    def shard_name(master_redis_config: dict) -> str:
+        """
+        Args:
+            master_redis_config: Connection config of the shard master
+        Returns:
+            str: host:port of the master, host:port/db for a db other than 0 so
+                shards can share a server
+        """
+        name = f"{master_redis_config.get('host')}:{master_redis_config.get('port')}"
+        db = master_redis_config.get("db") or 0
+        return f"{name}/{db}" if db else name
+
+    @property
+    def controllers(self) -> List[RedisController]:
+        return list(self.__controllers)
+
+    @property
+    def names(self) -> List[str]:
+        """
+        Returns:
+            [str]: Name of every shard (see shard_name), in shard order
+        """
+        return list(self.__names)
+
+    def get_shard(self, shard_key: Union[str, bytes]) -> int:
+        """
+        Args:
+            shard_key: Value built by RedisSchema.shard_key
+        Returns:
+            int: Index of the shard owning the key
+        """
+        if len(self.__controllers) == 1:
+            return 0
+        return self.__ring.get_shard(shard_key)
+
+    def controller_for(self, shard_key: Union[str, bytes]) -> RedisController:
+        return self.__controllers[self.get_shard(shard_key)]
+
+    def connect(self) -> None:
+        """
+        Connect every shard concurrently, shards connect lazily otherwise.
+        """
+        with ThreadPoolExecutor(max_workers=len(self.__controllers)) as pool:
+            list(pool.map(lambda controller: controller.connect(), self.__controllers))
+
+    def pool_stats(self) -> dict:
+        """
+        Returns:
+            dict: {shard name: RedisController.pool_stats(), ...}
+        """
+        return {
+            name: controller.pool_stats()
+            for name, controller in zip(self.__names, self.__controllers)
+        }
@@ -0,0 +1,424 @@
+import json
+import base64
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Any, Callable, Union, Optional, Iterable, Iterator, List, Tuple
+
+from .mixins import RedisClient
+from .schemas import RedisSchema
+from .rows import MultipleRows, RedisRow
+from .sharded_controller import ShardedRedisController
+from .errors import RedisKeyError
+from .metrics import get_registry
+
+
+class ShardedRedisClient:
+    """
+    RedisClient over a ShardedRedisController. Every shard is served by its own
+    RedisClient, writes go to the shard owning schema.shard_key of the row, finds
+    go to that shard when keys_dict holds every shard key and to all shards in
+    parallel otherwise. Indexes live on the shard of their rows.
+
+    Example:
+        >>> controller = ShardedRedisController(shards=[
+        >>>     {"master": {"host": "redis-a", "port": 6379}, "replicas": []},
+        >>>     {"master": {"host": "redis-b", "port": 6379}, "replicas": []},
+        >>> ])
+        >>> client = ShardedRedisClient(controller=controller)
+        >>> client.set_schema(RedisSchema(
+        >>>     static_keys=["USERS"],
+        >>>     dynamic_keys=["Tenant", "UserId"],
+        >>>     shard_keys=["Tenant"],  # rows of a tenant live on one shard
+        >>> ))
+    """
+
+    __controller: ShardedRedisController = None
+    __schema: RedisSchema = None
+
+    def __init__(self, controller: ShardedRedisController, **client_kwargs):
+        """
+        Args:
+            controller: ShardedRedisController serving one RedisController per shard
+            client_kwargs: Passed to the RedisClient of every shard (scan_count,
+                fetch_chunk_size). A near cache must be set per shard via clients
+        """
+        self.__controller = controller
+        self.__clients: List[RedisClient] = [
+            RedisClient(controller=shard_controller, **client_kwargs)
+            for shard_controller in controller.controllers
+        ]
+
+    @property
+    def clients(self) -> List[RedisClient]:
+        """
+        Returns:
+            [RedisClient]: Client of every shard, in shard order
+        """
+        return list(self.__clients)
+
+    def set_schema(self, schema: RedisSchema) -> None:
+        """
+        Args:
+            schema: RedisSchema object to change schema of redis key pattern
+        """
+        self.__schema = schema
+        for client in self.__clients:
+            client.set_schema(schema)
+
+    def check_schema(self) -> None:
+        """
+        Check if schema is declared. If not raise an exception.
+        """
+        if not self.__schema:
+            raise Exception(
+                "Declare schema first. Redis Controller needs a schema to match key patterns."
+            )
+
+    def client_for(self, keys: Union[list[str], str, dict]) -> RedisClient:
+        """
+        Args:
+            keys: Dynamic key values in schema order, or a complete keys dict
+        Returns:
+            RedisClient of the shard owning the row
+        """
+        return self.__clients[self.__shard_of(keys)]
+
+    def __shard_of(self, keys: Union[list[str], str, dict]) -> int:
+        self.check_schema()
+        if not isinstance(keys, dict):
+            keys = self.__clients[0].dynamic_key_list_to_dict(dynamic_keys=keys)
+        shard_key = self.__schema.shard_key(
+            self.__schema.clean_key_dict_input(keys), literal=True
+        )
+        if shard_key is None:
+            raise RedisKeyError("Shard keys are missing to locate the row.")
+        return self.__controller.get_shard(shard_key)
+
+    def __shards_of(self, keys_dict: dict) -> List[RedisClient]:
+        """
+        Clients that may hold rows matching keys_dict, one when every shard key
+        is given.
+        """
+        shard_key = self.__schema.shard_key(
+            self.__schema.clean_key_dict_input(keys_dict)
+        )
+        if shard_key is not None:
+            return [self.__clients[self.__controller.get_shard(shard_key)]]
+        return self.__clients
+
+    def find(
+        self,
+        keys_dict: dict,
+        scan_count: Optional[int] = None,
+        fetch_chunk_size: Optional[int] = None,
+        lazy: bool = False,
+        fields: Optional[List[str]] = None,
+        filters: Optional[Union[dict, list]] = None,
+    ) -> Optional[MultipleRows]:
+        """
+        Args:
+            keys_dict:  {
+                "DynamicKey": "KeyToFind",
+            }
+            scan_count: Optional COUNT hint for SCAN, defaults to client setting
+            fetch_chunk_size: Optional number of keys per MGET, defaults to client setting
+            lazy: Return MultipleRows reading shards one after another as rows are
+                consumed, otherwise shards are read in parallel
+            fields: Hash storage only, read just these fields of every row (HMGET)
+            filters: Keep only rows matching the filters, evaluated in Redis
+        Returns:
+            Returns a MultipleRows object
+        """
+        self.check_schema()
+        clients = self.__shards_of(keys_dict)
+        kwargs = dict(
+            keys_dict=keys_dict,
+            scan_count=scan_count,
+            fetch_chunk_size=fetch_chunk_size,
+            fields=fields,
+            filters=filters,
+        )
+        if lazy:
+            return MultipleRows(
+                schema=self.__schema,
+                rows=chain.from_iterable(client.iter_find(**kwargs) for client in clients),
+            )
+        if len(clients) == 1:
+            return clients[0].find(**kwargs)
+        with get_registry().timer("operation_seconds", operation="sharded_find"):
+            with ThreadPoolExecutor(max_workers=len(clients)) as executor:
+                results = list(
+                    executor.map(lambda client: client.find(**kwargs), clients)
+                )
+        pairs = [
+            pair for result in results for pair in zip(result.raw_keys, result.values)
+        ]
+        return MultipleRows(schema=self.__schema, pairs=pairs)
+
+    def iter_find(
+        self,
+        keys_dict: dict,
+        scan_count: Optional[int] = None,
+        fetch_chunk_size: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        filters: Optional[Union[dict, list]] = None,
+    ) -> Iterator[RedisRow]:
+        """
+        Yield rows matching keys_dict, shard after shard.
+        """
+        self.check_schema()
+        for client in self.__shards_of(keys_dict):
+            yield from client.iter_find(
+                keys_dict=keys_dict,
+                scan_count=scan_count,
+                fetch_chunk_size=fetch_chunk_size,
+                fields=fields,
+                filters=filters,
+            )
+
+    def find_page(
+        self,
+        keys_dict: dict,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        scan_count: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Tuple[MultipleRows, Optional[str]]:
+        """
+        Return at most limit rows and an opaque cursor to resume from. Shards are
+        paged one after another, the cursor holds the shard and its own cursor.
+        Args:
+            keys_dict:  {
+                "DynamicKey": "KeyToFind",
+            }
+            cursor: Cursor returned by the previous page, None for the first page
+            limit: Maximum number of rows in the page
+            scan_count: Optional COUNT hint for SCAN, defaults to client setting
+            fields: Hash storage only, read just these fields of every row (HMGET)
+        Returns:
+            MultipleRows of the page and the next cursor, None when exhausted
+        """
+        self.check_schema()
+        if limit < 1:
+            raise ValueError("limit must be positive.")
+        clients = self.__shards_of(keys_dict)
+        shard_ix, shard_cursor = (0, None) if cursor is None else self.decode_cursor(cursor)
+        if not 0 <= shard_ix < len(clients):
+            raise RedisKeyError(f"Invalid cursor: {cursor}")
+        pairs = []
+        while True:
+            rows, shard_cursor = clients[shard_ix].find_page(
+                keys_dict=keys_dict,
+                cursor=shard_cursor,
+                limit=limit - len(pairs),
+                scan_count=scan_count,
+                fields=fields,
+            )
+            pairs.extend(zip(rows.raw_keys, rows.values))
+            if shard_cursor is None:
+                shard_ix += 1
+                if shard_ix == len(clients):
+                    return MultipleRows(schema=self.__schema, pairs=pairs), None
+            if len(pairs) >= limit:
+                next_cursor = self.encode_cursor(shard_ix, shard_cursor)
+                return MultipleRows(schema=self.__schema, pairs=pairs), next_cursor
+
+    @staticmethod
+    def encode_cursor(shard: int, shard_cursor: Optional[str]) -> str:
+        """
+        Pack shard index and the cursor of the shard client into a cursor.
+        """
+        payload = json.dumps([shard, shard_cursor]).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[int, Optional[str]]:
+        """
+        Unpack a cursor created by encode_cursor.
+        """
+        try:
+            shard, shard_cursor = json.loads(base64.urlsafe_b64decode(cursor))
+            return int(shard), shard_cursor
+        except (ValueError, TypeError) as e:
+            raise RedisKeyError(f"Invalid cursor: {cursor}") from e
+
+    def find_range(
+        self,
+        keys_dict: dict,
+        key: str,
+        min: Any = None,
+        max: Any = None,
+        limit: Optional[int] = None,
+        reverse: bool = False,
+        fetch_chunk_size: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        min_exclusive: bool = False,
+        max_exclusive: bool = False,
+    ) -> MultipleRows:
+        """
+        Rows whose range key lies between min and max, see RedisClient.find_range.
+        Shards are read in parallel and merged by the range key.
+        """
+        self.check_schema()
+        clients = self.__shards_of(keys_dict)
+        kwargs = dict(
+            keys_dict=keys_dict, key=key, min=min, max=max, limit=limit,
+            reverse=reverse, fetch_chunk_size=fetch_chunk_size, fields=fields,
+            min_exclusive=min_exclusive, max_exclusive=max_exclusive,
+        )
+        if len(clients) == 1:
+            return clients[0].find_range(**kwargs)
+        with ThreadPoolExecutor(max_workers=len(clients)) as executor:
+            results = list(executor.map(lambda client: client.find_range(**kwargs), clients))
+        upper_key = str(key).upper()
+        pairs = sorted(
+            (pair for result in results for pair in zip(result.raw_keys, result.values)),
+            key=lambda pair: self.__schema.range_score(
+                upper_key, self.__schema.parse_key(pair[0])[upper_key]
+            ),
+            reverse=reverse,
+        )
+        return MultipleRows(schema=self.__schema, pairs=pairs[:limit])
+
+    def get_many(
+        self,
+        keys_dicts: List[dict],
+        fetch_chunk_size: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> MultipleRows:
+        """
+        Read rows of many exact keys, one get_many per shard in parallel, see
+        RedisClient.get_many.
+        Returns:
+            MultipleRows of the existing rows, in the order of keys_dicts
+        """
+        groups = defaultdict(list)
+        for key_dict in keys_dicts:
+            groups[self.__shard_of(key_dict)].append(key_dict)
+        if not groups:
+            return MultipleRows(schema=self.__schema, pairs=[])
+
+        def get_group(shard: int) -> MultipleRows:
+            return self.__clients[shard].get_many(
+                groups[shard], fetch_chunk_size=fetch_chunk_size, fields=fields
+            )
+
+        with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+            results = list(executor.map(get_group, groups))
+        found = {
+            key: value
+            for result in results
+            for key, value in zip(result.raw_keys, result.values)
+        }
+        json_keys = [self.__schema.build_key(key_dict).encode() for key_dict in keys_dicts]
+        pairs = [(key, found[key]) for key in json_keys if key in found]
+        return MultipleRows(schema=self.__schema, pairs=pairs)
+
+    def exists(self, keys_dicts: List[dict]) -> List[bool]:
+        """
+        Check many exact keys on their shards, see RedisClient.exists.
+        Returns:
+            [bool]: Whether each row exists, in the order of keys_dicts
+        """
+        positions = defaultdict(list)
+        for ix, key_dict in enumerate(keys_dicts):
+            positions[self.__shard_of(key_dict)].append(ix)
+        found = [False] * len(keys_dicts)
+        for shard, indexes in positions.items():
+            results = self.__clients[shard].exists([keys_dicts[ix] for ix in indexes])
+            for ix, result in zip(indexes, results):
+                found[ix] = result
+        return found
+
+    def count(self, keys_dict: dict, scan_count: Optional[int] = None) -> int:
+        """
+        Count matching rows on every shard that may hold them, see RedisClient.count.
+        """
+        return self.__on_shards(
+            keys_dict, lambda client: client.count(keys_dict, scan_count=scan_count)
+        )
+
+    def store(
+        self,
+        keys: Union[list[str], str],
+        value: Union[dict, bytes, list, str],
+        expires_at: Optional[dict] = None,
+    ) -> RedisRow:
+        """
+        Store a row on the shard owning it, see RedisClient.store.
+        """
+        return self.client_for(keys).store(keys=keys, value=value, expires_at=expires_at)
+
+    def update_fields(self, keys: Union[list[str], str], fields: dict) -> int:
+        """
+        Write some fields of a hash row on the shard owning it, see
+        RedisClient.update_fields.
+        """
+        return self.client_for(keys).update_fields(keys=keys, fields=fields)
+
+    def delete(self, keys_dict: dict, **kwargs) -> int:
+        """
+        Remove matching rows on every shard that may hold them, see RedisClient.delete.
+        """
+        return self.__on_shards(keys_dict, lambda client: client.delete(keys_dict, **kwargs))
+
+    def expire(self, keys_dict: dict, expires_at: dict, **kwargs) -> int:
+        """
+        Set a new expiry on matching rows of every shard, see RedisClient.expire.
+        """
+        return self.__on_shards(
+            keys_dict, lambda client: client.expire(keys_dict, expires_at, **kwargs)
+        )
+
+    def persist(self, keys_dict: dict, **kwargs) -> int:
+        """
+        Remove the expiry of matching rows of every shard, see RedisClient.persist.
+        """
+        return self.__on_shards(keys_dict, lambda client: client.persist(keys_dict, **kwargs))
+
+    def __on_shards(self, keys_dict: dict, call: Callable[[RedisClient], int]) -> int:
+        self.check_schema()
+        clients = self.__shards_of(keys_dict)
+        with ThreadPoolExecutor(max_workers=len(clients)) as executor:
+            return sum(executor.map(call, clients))
+
+    def store_many(
+        self,
+        rows: Iterable[Tuple],
+        chunk_size: Optional[int] = None,
+        transaction: bool = False,
+        return_rows: bool = True,
+    ) -> Union[List[RedisRow], int]:
+        """
+        Group rows by shard and store every group with pipelined writes, shards are
+        written in parallel. Rows are returned grouped by shard.
+        Args:
+            rows: Iterable of (keys, value) or (keys, value, expires_at) tuples
+            chunk_size: Optional number of rows per pipeline
+            transaction: Wrap every chunk in MULTI/EXEC
+            return_rows: Return created RedisRow objects, otherwise only the count
+        Returns:
+            List of RedisRow objects or number of stored rows
+        """
+        self.check_schema()
+        groups = defaultdict(list)
+        for row in rows:
+            groups[self.__shard_of(row[0])].append(row)
+        if not groups:
+            return [] if return_rows else 0
+
+        def store_group(shard: int):
+            return self.__clients[shard].store_many(
+                rows=groups[shard],
+                chunk_size=chunk_size,
+                transaction=transaction,
+                return_rows=return_rows,
+            )
+
+        with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+            results = list(executor.map(store_group, groups))
+        if return_rows:
+            return [redis_row for result in results for redis_row in result]
+        return sum(results)
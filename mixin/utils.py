@@ -0,0 +1,144 @@
+"""
+Helpers shared by the blocking and asyncio clients.
+"""
+
+import os
+import time
+import weakref
+
+from datetime import date, datetime, timezone
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, Optional
+
+TIME_MULTIPLIERS = {"days": 86400, "hours": 3600, "minutes": 60, "seconds": 1}
+
+
+def get_expiry_time(expiry_kwargs: Dict[str, int]) -> int:
+    """Calculate expiry time in seconds from kwargs."""
+    return sum(
+        int(expiry_kwargs.get(unit, 0)) * multiplier
+        for unit, multiplier in TIME_MULTIPLIERS.items()
+    )
+
+
+def set_expiry_time(expiry_seconds: int) -> Dict[str, int]:
+    """Convert total seconds back into a dictionary of time units."""
+    result = {}
+    for unit, multiplier in TIME_MULTIPLIERS.items():
+        if expiry_seconds >= multiplier:
+            result[unit], expiry_seconds = divmod(expiry_seconds, multiplier)
+    return result
+
+
+def to_timestamp(value: Any) -> float:
+    """
+    Convert a time to Unix seconds. Naive times are taken as UTC.
+    Args:
+        value: datetime, date, Unix seconds or an ISO 8601 string
+            (e.g. 2024-05-01, 2024-05-01T10:00:00Z or 20240501T100000Z)
+    Returns:
+        float: Unix timestamp
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            value = datetime.fromisoformat(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if not isinstance(value, datetime):
+        raise TypeError(f"Unsupported time value: {value!r}")
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    """
+    Split an iterable into lists of at most given size without materializing it.
+    Args:
+        items: Any iterable (e.g. scan_iter generator)
+        size: Maximum length of each chunk
+    Returns:
+        Iterator of lists
+    """
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def achunked(items: AsyncIterable, size: int) -> AsyncIterator[list]:
+    """
+    Async counterpart of chunked for async iterators (e.g. redis.asyncio scan_iter).
+    Args:
+        items: Any async iterable
+        size: Maximum length of each chunk
+    Returns:
+        Async iterator of lists
+    """
+    chunk = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class RateLimiter:
+    """
+    Spread batches so no more than rate items are processed per second.
+    """
+
+    def __init__(self, rate: Optional[float] = None):
+        """
+        Args:
+            rate: Items per second, None or 0 disables limiting
+        """
+        if rate is not None and rate < 0:
+            raise ValueError("rate must not be negative.")
+        self.__rate = rate
+        self.__started = time.monotonic()
+        self.__count = 0
+
+    def delay(self, count: int) -> float:
+        """
+        Account count items and return seconds to wait before the next batch.
+        """
+        if not self.__rate:
+            return 0.0
+        self.__count += count
+        return max(0.0, self.__started + self.__count / self.__rate - time.monotonic())
+
+    def wait(self, count: int) -> None:
+        delay = self.delay(count)
+        if delay:
+            time.sleep(delay)
+
+
+_fork_handlers: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def register_fork_handler(instance) -> None:
+    """
+    Call instance.reset_after_fork() in the child process after os.fork(), e.g. in
+    pre-fork servers, so the child opens its own connections instead of sharing the
+    sockets of the parent. Instances are held weakly.
+    """
+    _fork_handlers.add(instance)
+
+
+def _reset_after_fork() -> None:
+    for instance in list(_fork_handlers):
+        instance.reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,410 @@
+"""
+Benchmark runner
+Store/find throughput and latency percentiles of RedisClient against a local Redis.
+
+Starts its own redis-server (and optional replicas) on free ports, an in-process
+fakeredis server with --fake, or uses a running server with --host/--port. Rows are
+seeded per RedisSchema with a fixed random seed, then every scenario runs in a
+single thread, a thread pool and asyncio.
+
+Usage (from the repository root):
+    python -m rtest.bench --keys 10000 --value-size 256 --output bench.json
+    python -m rtest.bench --replicas 2 --indexed --compare bench.json
+    python -m rtest.bench --fake
+    python -m rtest.bench --host localhost --port 6379
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+BENCH_PREFIX = "BENCH"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2) as sock:
+                sock.sendall(b"*1\r\n$4\r\nPING\r\n")
+                if sock.recv(16).startswith(b"+PONG"):
+                    return
+        except OSError:
+            time.sleep(0.05)
+    raise Exception(f"Redis server on port {port} did not start in {timeout}s")
+
+
+def start_servers(
+    redis_server: str, replicas: int, data_dir: str
+) -> Tuple[int, List[int], list]:
+    """
+    Start a throwaway master and replicas without persistence. Full syncs are
+    diskless and every server works in its own directory under data_dir, so no
+    dump.rdb is left in the working directory.
+    Returns:
+        Master port, replica ports and the processes to stop
+    """
+    processes, master_port = [], free_port()
+    common = ["--save", "", "--appendonly", "no", "--bind", "127.0.0.1"]
+    common += ["--repl-diskless-sync", "yes", "--repl-diskless-sync-delay", "0"]
+
+    def server_dir(port: int) -> List[str]:
+        path = os.path.join(data_dir, str(port))
+        os.makedirs(path, exist_ok=True)
+        return ["--dir", path]
+
+    processes.append(
+        subprocess.Popen(
+            [redis_server, "--port", str(master_port)] + common + server_dir(master_port),
+            stdout=subprocess.DEVNULL,
+        )
+    )
+    wait_for_server(master_port)
+    replica_ports = []
+    for _ in range(replicas):
+        port = free_port()
+        processes.append(
+            subprocess.Popen(
+                [redis_server, "--port", str(port), "--replicaof", "127.0.0.1"]
+                + [str(master_port)]
+                + common
+                + server_dir(port),
+                stdout=subprocess.DEVNULL,
+            )
+        )
+        wait_for_server(port)
+        replica_ports.append(port)
+    return master_port, replica_ports, processes
+
+
+def start_fake_server():
+    """
+    Serve fakeredis over TCP from this process.
+    """
+    try:
+        from fakeredis import TcpFakeServer
+    except ImportError:
+        raise Exception("--fake requires the fakeredis package.")
+    import threading
+
+    port = free_port()
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    wait_for_server(port)
+    return port, server
+
+
+def configure_env(host: str, master_port: int, replica_ports: List[int]) -> None:
+    """
+    Point the mixin Configs at the benchmark servers, must run before mixin is
+    imported as Configs are read from the environment on import.
+    """
+    # Configs expect two replicas, reuse the ports given or read from the master
+    replica_ports = ((replica_ports or [master_port]) * 2)[:2]
+    os.environ.update(
+        REDIS_HOST=host,
+        REDIS_PORT=str(master_port),
+        REDIS_REP_1_HOST=host,
+        REDIS_REP_1_PORT=str(replica_ports[0]),
+        REDIS_REP_2_HOST=host,
+        REDIS_REP_2_PORT=str(replica_ports[1]),
+    )
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest rank
+    rank = int(round(percent / 100 * len(sorted_values))) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, rank))]
+
+
+def summarize(name: str, mode: str, ops: int, seconds: float, latencies: List[float]) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "name": name,
+        "mode": mode,
+        "ops": ops,
+        "seconds": round(seconds, 4),
+        "ops_per_sec": round(ops / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round((latencies[-1] if latencies else 0.0) * 1000, 3),
+    }
+
+
+def timed(operation: Callable, *args) -> float:
+    started = time.perf_counter()
+    operation(*args)
+    return time.perf_counter() - started
+
+
+def run_single(name: str, operation: Callable, items: list) -> dict:
+    started = time.perf_counter()
+    latencies = [timed(operation, item) for item in items]
+    return summarize(name, "single", len(items), time.perf_counter() - started, latencies)
+
+
+def run_threads(name: str, operation: Callable, items: list, threads: int) -> dict:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(lambda item: timed(operation, item), items))
+    return summarize(
+        name, f"threads[{threads}]", len(items), time.perf_counter() - started, latencies
+    )
+
+
+async def run_async(name: str, operation: Callable, items: list, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed_async(item) -> float:
+        async with semaphore:
+            started = time.perf_counter()
+            await operation(item)
+            return time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*[timed_async(item) for item in items])
+    return summarize(
+        name, f"asyncio[{concurrency}]", len(items), time.perf_counter() - started, latencies
+    )
+
+
+def make_rows(args, rng: random.Random) -> List[tuple]:
+    """
+    Seed rows: (keys, value) with --keys rows spread over --groups groups.
+    """
+    rows = []
+    for ix in range(args.keys):
+        value = {
+            "ID": ix,
+            "Score": rng.random(),
+            "Name": f"user-{rng.randrange(10 ** 6)}",
+            "Payload": "".join(rng.choice("abcdefghij") for _ in range(args.value_size)),
+        }
+        rows.append(([str(ix), f"g{ix % args.groups}"], value))
+    return rows
+
+
+def run_benchmarks(args) -> dict:
+    from mixin.async_controller import AsyncRedisController
+    from mixin.async_mixins import AsyncRedisClient
+    from mixin.config import master_config, redis_replica_redis_configs
+    from mixin.controller import RedisController
+    from mixin.mixins import RedisClient
+    from mixin.schemas import RedisSchema
+
+    rng = random.Random(args.seed)
+    schema = RedisSchema(
+        static_keys=[BENCH_PREFIX, "ROWS"],
+        dynamic_keys=["ID", "GROUP"],
+        indexed=args.indexed,
+        serializer=args.serializer,
+        compression=args.compression,
+        storage=args.storage,
+    )
+    controller = RedisController(
+        master_redis_config=master_config,
+        replica_redis_configs=redis_replica_redis_configs,
+        master_pool_config=dict(max_connections=args.threads + 4),
+        replica_pool_config=dict(max_connections=args.threads + 4),
+    )
+    client = RedisClient(controller=controller)
+    client.set_schema(schema)
+    clean(controller.write_cli)
+
+    rows = make_rows(args, rng)
+    exact_keys = [
+        {"ID": keys[0], "GROUP": keys[1]}
+        for keys, _ in (rng.choice(rows) for _ in range(args.iterations))
+    ]
+    groups = [{"GROUP": f"g{rng.randrange(args.groups)}"} for _ in range(args.scan_iterations)]
+    results = []
+
+    def store(row):
+        client.store(keys=row[0], value=row[1])
+
+    def find_exact(keys_dict):
+        client.find(keys_dict=keys_dict)
+
+    def find_group(keys_dict):
+        client.find(keys_dict=keys_dict).data
+
+    results.append(run_single("store", store, rows))
+    results.append(run_threads("store", store, rows, args.threads))
+    chunks = [rows[ix : ix + args.chunk_size] for ix in range(0, len(rows), args.chunk_size)]
+    results.append(run_single("store_many", lambda chunk: client.store_many(chunk), chunks))
+    wait_replication(controller)
+    results.append(run_single("find_exact", find_exact, exact_keys))
+    results.append(run_threads("find_exact", find_exact, exact_keys, args.threads))
+    results.append(run_single("find_group", find_group, groups))
+    results.append(run_threads("find_group", find_group, groups, args.threads))
+
+    async def run_asyncio() -> List[dict]:
+        async_controller = AsyncRedisController(
+            master_redis_config=master_config,
+            replica_redis_configs=redis_replica_redis_configs,
+        )
+        async_client = AsyncRedisClient(controller=async_controller)
+        async_client.set_schema(schema)
+        await async_controller.connect()
+
+        async def async_store(row):
+            await async_client.store(keys=row[0], value=row[1])
+
+        async def async_find_exact(keys_dict):
+            await async_client.find(keys_dict=keys_dict)
+
+        async def async_find_group(keys_dict):
+            (await async_client.find(keys_dict=keys_dict)).data
+
+        async_results = [
+            await run_async("store", async_store, rows, args.concurrency),
+            await run_async("find_exact", async_find_exact, exact_keys, args.concurrency),
+            await run_async("find_group", async_find_group, groups, args.concurrency),
+        ]
+        await async_controller.close()
+        return async_results
+
+    results.extend(asyncio.run(run_asyncio()))
+    try:
+        redis_version = controller.write_cli.info("server").get("redis_version")
+    except Exception:  # In-process stand-ins may not implement INFO
+        redis_version = None
+    clean(controller.write_cli)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "redis_version": redis_version,
+            "arguments": {k: v for k, v in vars(args).items() if k != "output"},
+        },
+        "results": results,
+    }
+
+
+def wait_replication(controller, timeout: float = 10.0) -> None:
+    """
+    Let replicas catch up with the seeded rows before measuring reads.
+    """
+    try:
+        write_cli = controller.write_cli
+        replicas = write_cli.info("replication").get("connected_slaves", 0)
+        if replicas:
+            write_cli.wait(replicas, int(timeout * 1000))
+    except Exception as e:
+        print("Benchmark replication wait error : ", e)
+
+
+def clean(write_cli) -> None:
+    for pattern in (f"{BENCH_PREFIX}:*", f"__index__:{BENCH_PREFIX}:*"):
+        keys = list(write_cli.scan_iter(match=pattern, count=1000))
+        for ix in range(0, len(keys), 1000):
+            write_cli.delete(*keys[ix : ix + 1000])
+
+
+def print_results(report: dict, baseline: Optional[dict] = None) -> None:
+    previous: Dict[tuple, dict] = {
+        (r["name"], r["mode"]): r for r in (baseline or {}).get("results", [])
+    }
+    header = (
+        f"{'scenario':<14}{'mode':<14}{'ops':>8}{'ops/s':>12}"
+        f"{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    )
+    print(header + ("  vs baseline" if previous else ""))
+    for r in report["results"]:
+        line = (
+            f"{r['name']:<14}{r['mode']:<14}{r['ops']:>8}{r['ops_per_sec']:>12}"
+            f"{r['p50_ms']:>10}{r['p90_ms']:>10}{r['p99_ms']:>10}{r['max_ms']:>10}"
+        )
+        before = previous.get((r["name"], r["mode"]))
+        if before and before["ops_per_sec"]:
+            change = (r["ops_per_sec"] / before["ops_per_sec"] - 1) * 100
+            line += f"  {change:+.1f}%"
+        print(line)
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark RedisClient store/find.")
+    server = parser.add_argument_group("server")
+    server.add_argument("--host", help="Use a running server instead of starting one")
+    server.add_argument("--port", type=int, default=6379)
+    server.add_argument("--replica-port", type=int, action="append", default=[])
+    server.add_argument("--redis-server", default="redis-server", help="Binary to start")
+    server.add_argument("--replicas", type=int, default=0, help="Replicas to start (max 2)")
+    server.add_argument("--fake", action="store_true", help="In-process fakeredis server")
+    load = parser.add_argument_group("load")
+    load.add_argument("--keys", type=int, default=5000)
+    load.add_argument("--value-size", type=int, default=256)
+    load.add_argument("--groups", type=int, default=10)
+    load.add_argument("--iterations", type=int, default=2000, help="Exact finds")
+    load.add_argument("--scan-iterations", type=int, default=20, help="Group finds")
+    load.add_argument("--chunk-size", type=int, default=500)
+    load.add_argument("--threads", type=int, default=8)
+    load.add_argument("--concurrency", type=int, default=32)
+    load.add_argument("--seed", type=int, default=42)
+    schema = parser.add_argument_group("schema")
+    schema.add_argument("--indexed", action="store_true")
+    schema.add_argument("--serializer", default="json")
+    schema.add_argument("--compression", default=None)
+    schema.add_argument("--storage", default="string", choices=["string", "hash"])
+    output = parser.add_argument_group("output")
+    output.add_argument("--output", help="Write the JSON report to this file")
+    output.add_argument("--compare", help="JSON report of a previous run")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    args = parse_args(argv)
+    processes, fake_server = [], None
+    data_dir = tempfile.TemporaryDirectory(prefix="redis-bench-")
+    try:
+        if args.host:
+            configure_env(args.host, args.port, args.replica_port)
+        elif args.fake:
+            port, fake_server = start_fake_server()
+            configure_env("127.0.0.1", port, [])
+        else:
+            master_port, replica_ports, processes = start_servers(
+                args.redis_server, min(args.replicas, 2), data_dir.name
+            )
+            configure_env("127.0.0.1", master_port, replica_ports)
+        report = run_benchmarks(args)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+        if fake_server is not None:
+            fake_server.shutdown()
+        data_dir.cleanup()
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    print_results(report, baseline)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
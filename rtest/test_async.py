@@ -0,0 +1,112 @@
+import asyncio
+
+from mixin.async_controller import AsyncRedisController
+from mixin.async_mixins import AsyncRedisClient
+from mixin.config import master_config, redis_replica_redis_configs
+from mixin.schemas import RedisSchema
+
+
+def run(test):
+    # A controller per event loop, async clients are bound to the loop they connect on
+    async def main():
+        controller = AsyncRedisController(
+            master_redis_config=master_config,
+            replica_redis_configs=redis_replica_redis_configs,
+        )
+        await controller.connect()
+        try:
+            await test(controller)
+        finally:
+            await controller.close()
+
+    asyncio.run(main())
+
+
+async def wait_for_replicas(controller: AsyncRedisController) -> None:
+    await controller.write_cli.wait(len(redis_replica_redis_configs), 1000)
+
+
+async def clear(controller: AsyncRedisController, schema: RedisSchema) -> None:
+    for pattern in (schema.merge_key({}), schema.index_pattern):
+        keys = [key async for key in controller.write_cli.scan_iter(match=pattern)]
+        if keys:
+            await controller.write_cli.delete(*keys)
+
+
+def test_store_find_and_get_many():
+    schema = RedisSchema(
+        static_keys=["ASYNC_ROWS"], dynamic_keys=["FIRST", "SECOND"], indexed=True
+    )
+
+    async def test(controller):
+        client = AsyncRedisClient(controller=controller)
+        client.set_schema(schema)
+        await clear(controller, schema)
+        for first in ("alpha", "apex", "beta"):
+            await client.store(keys=[first, "x"], value={"First": first})
+        await wait_for_replicas(controller)
+
+        rows = await client.find(keys_dict={"FIRST": "a*"})
+        assert sorted(row.data["First"] for row in rows.all) == ["alpha", "apex"]
+        rows = await client.find(keys_dict={"FIRST": "beta", "SECOND": "x"})
+        assert [row.data["First"] for row in rows.all] == ["beta"]
+        rows = await client.get_many(
+            [{"FIRST": first, "SECOND": "x"} for first in ("beta", "gamma", "alpha")]
+        )
+        assert [row.data["First"] for row in rows.all] == ["beta", "alpha"]
+        await clear(controller, schema)
+
+    run(test)
+
+
+def test_store_many_keeps_writes_of_a_key_in_order():
+    schema = RedisSchema(static_keys=["ASYNC_MANY"], dynamic_keys=["ID"])
+    consumed = []
+
+    def rows():
+        for ix in range(200):
+            consumed.append(ix)
+            yield [str(ix % 5)], {"Ix": ix}
+
+    async def test(controller):
+        client = AsyncRedisClient(controller=controller, max_concurrency=4)
+        client.set_schema(schema)
+        await clear(controller, schema)
+        # One row per pipeline, every key is written 40 times by chunks in flight
+        stored = await client.store_many(rows(), chunk_size=1, return_rows=False)
+        assert stored == len(consumed) == 200
+        await wait_for_replicas(controller)
+
+        found = await client.find(keys_dict={})
+        assert sorted(row.data["Ix"] for row in found.all) == [195, 196, 197, 198, 199]
+        stored = await client.store_many(
+            [([str(ix)], {"Ix": ix}, {"seconds": 60}) for ix in range(1000)],
+            chunk_size=100,
+        )
+        assert [row.key for row in stored[:2]] == ["ASYNC_MANY:0", "ASYNC_MANY:1"]
+        assert await controller.write_cli.ttl("ASYNC_MANY:999") > 0
+        await clear(controller, schema)
+
+    run(test)
+
+
+def test_remove_from_indexes_keeps_rows_on_master():
+    schema = RedisSchema(static_keys=["ASYNC_INDEXED"], dynamic_keys=["ID"], indexed=True)
+
+    async def test(controller):
+        client = AsyncRedisClient(controller=controller)
+        client.set_schema(schema)
+        await clear(controller, schema)
+        await client.store_many([([str(ix)], {"Ix": ix}) for ix in range(3)])
+        write_cli = controller.write_cli
+        index_key = schema.index_key("ID", "0")
+        json_key = schema.build_key({"ID": "0"})
+
+        await client.remove_from_indexes(keys=[json_key])
+        assert await write_cli.sismember(index_key, json_key)
+        await write_cli.delete(json_key)
+        await client.remove_from_indexes(keys=[json_key])
+        assert not await write_cli.sismember(index_key, json_key)
+        await clear(controller, schema)
+
+    run(test)
@@ -0,0 +1,114 @@
+import threading
+import time
+
+from mixin.buffer import WriteBuffer
+from mixin.config import master_config, redis_replica_redis_configs
+from mixin.consistency import session
+from mixin.controller import RedisController
+from mixin.mixins import RedisClient
+from mixin.schemas import RedisSchema
+
+
+def consistent_client(consistency: str, **kwargs) -> tuple:
+    controller = RedisController(
+        master_redis_config=master_config,
+        replica_redis_configs=redis_replica_redis_configs,
+        consistency=consistency,
+        **kwargs,
+    )
+    client = RedisClient(controller=controller)
+    client.set_schema(
+        RedisSchema(static_keys=[f"CONSISTENCY_{consistency}"], dynamic_keys=["ID"])
+    )
+    return client, controller
+
+
+def count_info_calls(controller: RedisController) -> list:
+    # Direct INFO round trips, INFO queued in a write pipeline is not counted
+    calls = []
+    info = controller.write_cli.info
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return info(*args, **kwargs)
+
+    controller.write_cli.info = counted
+    return calls
+
+
+def test_master_window_reads_master_after_a_write():
+    client, controller = consistent_client("master_window", read_after_write_ms=300)
+    with session():
+        assert controller.select_replica() is not controller.master_node
+        client.store(keys=["1"], value={"Ix": 1})
+        assert controller.select_replica() is controller.master_node
+        assert client.find(keys_dict={"ID": "1"}).all[0].data == {"Ix": 1}
+        time.sleep(0.3)
+        assert controller.select_replica() is not controller.master_node
+    # Another session never wrote
+    with session():
+        assert controller.select_replica() is not controller.master_node
+    client.delete(keys_dict={})
+
+
+def test_offset_reads_replicas_that_reached_the_write():
+    client, controller = consistent_client("offset")
+    calls = count_info_calls(controller)
+    with session() as write_session:
+        client.store_many([([str(ix)], {"Ix": ix}) for ix in range(3)])
+        assert calls == []
+        master_offset = controller.write_cli.info("replication")["master_repl_offset"]
+        assert 0 < write_session.offset <= master_offset
+        assert write_session.last_write_at == 0
+        node = controller.select_replica()
+        assert node is controller.master_node or node.offset >= write_session.offset
+        assert len(client.find(keys_dict={}).all) == 3
+
+        # No replica is that far, reads fall back to master
+        write_session.offset = master_offset + 10**9
+        assert controller.select_replica() is controller.master_node
+    client.delete(keys_dict={})
+
+
+def test_wait_blocks_until_replicas_acknowledged():
+    client, controller = consistent_client("wait")
+    wait_calls = controller.write_cli.info("commandstats").get("cmdstat_wait", {})
+    with session() as write_session:
+        client.store(keys=["1"], value={"Ix": 1})
+        assert write_session.offset > 0 and write_session.last_write_at == 0
+        # The replicas acknowledged the write, they serve the reads
+        assert controller.select_replica() is not controller.master_node
+        assert client.find(keys_dict={"ID": "1"}).all[0].data == {"Ix": 1}
+    waited = controller.write_cli.info("commandstats")["cmdstat_wait"]
+    assert waited["calls"] == wait_calls.get("calls", 0) + 1
+
+    # More replicas than exist, the write times out and reads go to master
+    client, controller = consistent_client("wait", wait_replicas=5, wait_timeout_ms=50)
+    with session() as write_session:
+        started = time.monotonic()
+        client.store(keys=["2"], value={"Ix": 2})
+        assert 0.05 <= time.monotonic() - started < 1
+        assert write_session.last_write_at > 0
+        assert controller.select_replica() is controller.master_node
+    client.delete(keys_dict={})
+
+
+def test_buffered_write_is_recorded_in_the_session_of_the_caller():
+    client, controller = consistent_client("master_window", read_after_write_ms=60000)
+    write_buffer = WriteBuffer(max_rows=10, flush_interval=60)
+    client.set_write_buffer(write_buffer)
+    with session() as write_session:
+        client.store(keys=["1"], value={"Ix": 1})
+        assert write_session.last_write_at == 0
+        # The flush runs on another thread, outside the session of the writer
+        flusher = threading.Thread(target=write_buffer.flush)
+        flusher.start()
+        flusher.join()
+        assert write_session.last_write_at > 0
+        assert controller.select_replica() is controller.master_node
+    with session() as other_session:
+        assert controller.select_replica() is not controller.master_node
+        assert other_session.last_write_at == 0
+    write_buffer.close()
+    client.set_write_buffer(None)
+    client.delete(keys_dict={})
@@ -0,0 +1,68 @@
+import os
+import time
+
+import pytest
+
+from mixin.config import master_config, redis_replica_redis_configs
+from mixin.controller import RedisController
+
+# Nothing listens on port 1, connecting is refused
+UNREACHABLE = dict(master_config, port=1)
+
+
+def test_controller_connects_on_first_use():
+    controller = RedisController(
+        master_redis_config=master_config,
+        replica_redis_configs=redis_replica_redis_configs,
+    )
+    assert not controller.connected
+    assert controller.read_cli.ping()
+    assert controller.connected
+    assert controller.write_cli.ping()
+
+
+def test_forked_child_connects_again():
+    controller = RedisController(
+        master_redis_config=master_config,
+        replica_redis_configs=redis_replica_redis_configs,
+    )
+    parent_client = controller.write_cli
+    pid = os.fork()
+    if pid == 0:
+        # The child must not share the sockets of the parent
+        healthy = not controller.connected and controller.write_cli is not parent_client
+        os._exit(0 if healthy and controller.write_cli.ping() else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert controller.connected and controller.write_cli is parent_client
+
+
+def test_connect_does_not_wait_for_unreachable_nodes():
+    controller = RedisController(
+        master_redis_config=master_config,
+        replica_redis_configs=[UNREACHABLE, redis_replica_redis_configs[0]],
+    )
+    started = time.monotonic()
+    controller.connect()
+    assert time.monotonic() - started < 1
+    assert [node.client is not None for node in controller.nodes] == [False, True]
+    assert controller.read_cli.ping()
+
+
+def test_master_down_blocks_neither_reads_nor_every_write():
+    controller = RedisController(
+        master_redis_config=UNREACHABLE,
+        replica_redis_configs=redis_replica_redis_configs,
+        master_retry_interval=60,
+    )
+    started = time.monotonic()
+    assert controller.read_cli.ping()
+    assert time.monotonic() - started < 1
+
+    # The first write waits for the connect attempt, later ones fail fast
+    with pytest.raises(Exception, match="is not reachable"):
+        controller.write_cli
+    started = time.monotonic()
+    with pytest.raises(Exception, match="is not reachable"):
+        controller.write_cli
+    assert time.monotonic() - started < 0.1
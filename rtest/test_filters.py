@@ -0,0 +1,105 @@
+import operator
+
+from mixin.controller import redis_controller
+from mixin.mixins import RedisClient
+from mixin.schemas import RedisSchema
+
+COMPARE = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+FILTERS = [
+    {"Location": "UK"},
+    [("Age", "gte", 30)],
+    [("Age", "lt", 30), ("Location", "ne", "UK")],
+    [("Location", "in", ["DE", "FR"])],
+    [("Age", "exists", False)],
+    [("Age", "exists", True), ("Location", "eq", "UK")],
+]
+
+
+def matches(data: dict, filters) -> bool:
+    if isinstance(filters, dict):
+        filters = [(field, "eq", value) for field, value in filters.items()]
+    for field, op, expected in filters:
+        actual = data.get(field)
+        if op == "exists":
+            matched = (actual is not None) == expected
+        elif op == "in":
+            matched = actual in expected
+        elif op in ("eq", "ne"):
+            matched = COMPARE[op](actual, expected)
+        else:
+            matched = type(actual) is type(expected) and COMPARE[op](actual, expected)
+        if not matched:
+            return False
+    return True
+
+
+def store_people(client: RedisClient) -> None:
+    client.delete(keys_dict={})
+    locations = ["UK", "DE", "FR", None]
+    for ix in range(40):
+        value = {"Name": f"name-{ix}"}
+        if locations[ix % 4] is not None:
+            value["Location"] = locations[ix % 4]
+        if ix % 5:
+            value["Age"] = 18 + ix
+        client.store(keys=[str(ix % 3), str(ix)], value=value)
+    redis_controller.write_cli.wait(len(redis_controller.nodes), 1000)
+
+
+def test_filters_agree_with_client_side_filtering_across_batches():
+    for indexed in (False, True):
+        client = RedisClient(controller=redis_controller)
+        client.set_schema(
+            RedisSchema(
+                static_keys=[f"FILTERED_{indexed}"],
+                dynamic_keys=["GROUP", "ID"],
+                indexed=indexed,
+            )
+        )
+        store_people(client)
+        rows = client.find(keys_dict={}).all
+        for keys_dict in ({}, {"GROUP": "1"}):
+            for filters in FILTERS:
+                expected = sorted(
+                    row.key
+                    for row in rows
+                    if matches(row.data, filters)
+                    and (not keys_dict or row.key.split(":")[1] == keys_dict["GROUP"])
+                )
+                # One key per SCAN batch or script call, and one call for all
+                for batch in (1, 1000):
+                    found = client.find(
+                        keys_dict=keys_dict,
+                        filters=filters,
+                        scan_count=batch,
+                        fetch_chunk_size=batch,
+                    )
+                    assert sorted(row.key for row in found.all) == expected
+        assert len(client.find(keys_dict={}, filters=FILTERS[4])) == 8
+        one = client.find(
+            keys_dict={"GROUP": "1", "ID": "1"}, filters={"Location": "DE"}
+        )
+        assert [row.data["Name"] for row in one.all] == ["name-1"]
+        client.delete(keys_dict={})
+
+
+def test_filter_script_is_loaded_again_after_script_flush():
+    client = RedisClient(controller=redis_controller)
+    client.set_schema(
+        RedisSchema(static_keys=["FILTERED_FLUSH"], dynamic_keys=["GROUP", "ID"])
+    )
+    store_people(client)
+    before = client.find(keys_dict={}, filters={"Location": "UK"})
+    for node in [redis_controller.master_node] + redis_controller.nodes:
+        node.client.script_flush()
+    after = client.find(keys_dict={}, filters={"Location": "UK"})
+    assert sorted(before.keys) == sorted(after.keys) and len(after) == 10
+    assert redis_controller.server_version is redis_controller.server_version
+    client.delete(keys_dict={})
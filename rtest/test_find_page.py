@@ -0,0 +1,70 @@
+from mixin.controller import redis_controller
+from mixin.mixins import redis_client
+from mixin.schemas import RedisSchema
+
+
+def clear(schema: RedisSchema) -> None:
+    write_cli = redis_controller.write_cli
+    for pattern in (schema.merge_key({}), schema.index_pattern):
+        for key in write_cli.scan_iter(match=pattern):
+            write_cli.delete(key)
+
+
+def seed(indexed: bool, rows: int = 25) -> RedisSchema:
+    schema = RedisSchema(
+        static_keys=["PAGES_INDEXED" if indexed else "PAGES_SCAN"],
+        dynamic_keys=["GROUP", "ID"],
+        indexed=indexed,
+    )
+    redis_client.set_schema(schema=schema)
+    clear(schema)
+    for ix in range(rows):
+        redis_client.store(keys=["g", f"{ix:02d}"], value={"ID": ix})
+    # Pages read replicas, wait until they have every row
+    write_cli = redis_controller.write_cli
+    write_cli.wait(write_cli.info("replication")["connected_slaves"], 1000)
+    return schema
+
+
+def read_pages(keys_dict: dict, limit: int, scan_count: int = 10) -> list:
+    pages, cursor = [], None
+    while True:
+        page, cursor = redis_client.find_page(
+            keys_dict=keys_dict, cursor=cursor, limit=limit, scan_count=scan_count
+        )
+        pages.append([row.data["ID"] for row in page.all])
+        if cursor is None:
+            return pages
+
+
+def test_find_page_resumes_scan_cursor():
+    schema = seed(indexed=False)
+    # COUNT hints larger than the page make pages end inside a SCAN batch
+    for limit, scan_count in ((4, 10), (7, 3), (30, 5)):
+        pages = read_pages({"GROUP": "g"}, limit=limit, scan_count=scan_count)
+        found = [ix for page in pages for ix in page]
+        assert sorted(found) == list(range(25))
+        assert all(len(page) <= limit for page in pages)
+    clear(schema)
+
+
+def test_find_page_resumes_index_cursor():
+    schema = seed(indexed=True)
+    pages = read_pages({"GROUP": "g"}, limit=4)
+    assert [len(page) for page in pages] == [4, 4, 4, 4, 4, 4, 1]
+    assert sorted(ix for page in pages for ix in page) == list(range(25))
+    clear(schema)
+
+
+def test_find_page_ends_with_no_cursor():
+    for indexed in (False, True):
+        schema = seed(indexed=indexed, rows=6)
+        page, cursor = redis_client.find_page(keys_dict={"GROUP": "g"}, limit=10)
+        assert len(page.all) == 6 and cursor is None
+        page, cursor = redis_client.find_page(keys_dict={"GROUP": "missing"}, limit=10)
+        assert page.all == [] and cursor is None
+        page, cursor = redis_client.find_page(
+            keys_dict={"GROUP": "g", "ID": "03"}, limit=10
+        )
+        assert [row.data["ID"] for row in page.all] == [3] and cursor is None
+        clear(schema)
@@ -0,0 +1,73 @@
+import pytest
+
+from mixin.controller import redis_controller
+from mixin.errors import RedisKeyError, RedisValueError
+from mixin.mixins import RedisClient
+from mixin.schemas import RedisSchema
+
+
+def hash_client(name: str, **kwargs) -> RedisClient:
+    client = RedisClient(controller=redis_controller)
+    client.set_schema(
+        RedisSchema(
+            static_keys=[name], dynamic_keys=["USER_ID"], storage="hash", **kwargs
+        )
+    )
+    client.delete(keys_dict={})
+    return client
+
+
+def wait_for_replicas() -> None:
+    redis_controller.write_cli.wait(len(redis_controller.nodes), 1000)
+
+
+def test_hash_rows_round_trip_and_project_fields():
+    for compression in (None, "zlib"):
+        client = hash_client(
+            f"HASHED_{compression}", compression=compression, compression_threshold=8
+        )
+        profile = {"Name": "John", "Location": "UK", "Tags": ["a", "b"], "Age": 42}
+        client.store(keys=["42"], value=profile)
+        # A store replaces the whole hash, Tags is gone
+        client.store(keys=["43"], value={"Name": "Jane", "Tags": ["c"]})
+        client.store(keys=["43"], value={"Name": "Jane", "Location": "DE"})
+        wait_for_replicas()
+        assert redis_controller.write_cli.type(f"HASHED_{compression}:42") == b"hash"
+
+        rows = client.find(keys_dict={"USER_ID": "42"})
+        assert rows.all[0].data == profile
+        rows = client.find(keys_dict={}, fields=["Location", "Tags"])
+        assert sorted((row.key, row.data) for row in rows.all) == [
+            (f"HASHED_{compression}:42", {"Location": "UK", "Tags": ["a", "b"]}),
+            (f"HASHED_{compression}:43", {"Location": "DE"}),
+        ]
+        # Rows without any of the fields are left out
+        assert len(client.find(keys_dict={}, fields=["Missing"])) == 0
+        assert client.delete(keys_dict={}) == 2
+
+
+def test_update_fields_keeps_fields_and_expiry_of_existing_rows():
+    client = hash_client("HASHED_UPDATE")
+    client.store(
+        keys=["42"], value={"Name": "John", "Location": "UK"}, expires_at={"hours": 1}
+    )
+    assert client.update_fields(keys=["42"], fields={"Location": "DE", "Age": 42}) == 1
+    wait_for_replicas()
+    rows = client.find(keys_dict={"USER_ID": "42"})
+    assert rows.all[0].data == {"Name": "John", "Location": "DE", "Age": 42}
+    assert 0 < redis_controller.write_cli.ttl("HASHED_UPDATE:42") <= 3600
+
+    # A missing row is not created without its other fields and expiry
+    with pytest.raises(RedisKeyError):
+        client.update_fields(keys=["43"], fields={"Location": "DE"})
+    assert not redis_controller.write_cli.exists("HASHED_UPDATE:43")
+    client.delete(keys_dict={})
+
+
+def test_hash_only_operations_need_hash_storage():
+    client = RedisClient(controller=redis_controller)
+    client.set_schema(RedisSchema(static_keys=["NOT_HASHED"], dynamic_keys=["USER_ID"]))
+    with pytest.raises(RedisValueError):
+        client.update_fields(keys=["42"], fields={"Location": "DE"})
+    with pytest.raises(RedisValueError):
+        client.find(keys_dict={}, fields=["Location"])
@@ -0,0 +1,131 @@
+import time
+
+from mixin.controller import redis_controller
+from mixin.mixins import redis_client
+from mixin.schemas import RedisSchema
+
+
+def store_rows(schema: RedisSchema) -> None:
+    redis_client.set_schema(schema=schema)
+    redis_client.delete(keys_dict={})
+    for first in ("alpha", "apex", "beta"):
+        for second in ("x1", "x2"):
+            redis_client.store(keys=[first, second], value={"First": first})
+    # Finds read replicas, wait until they have every row
+    redis_controller.write_cli.wait(len(redis_controller.nodes), 1000)
+
+
+def found_keys(keys_dict: dict) -> dict:
+    rows = redis_client.find(keys_dict=keys_dict)
+    paged, cursor = [], None
+    while True:
+        page, cursor = redis_client.find_page(keys_dict=keys_dict, cursor=cursor, limit=2)
+        paged.extend(row.key for row in page.all)
+        if cursor is None:
+            break
+    return {
+        "find": sorted(row.key.split(":", 1)[1] for row in rows.all),
+        "page": sorted(key.split(":", 1)[1] for key in paged),
+        "count": redis_client.count(keys_dict=keys_dict),
+    }
+
+
+def test_glob_values_match_with_and_without_indexes():
+    plain = RedisSchema(static_keys=["GLOB_PLAIN"], dynamic_keys=["FIRST", "SECOND"])
+    indexed = RedisSchema(
+        static_keys=["GLOB_INDEXED"], dynamic_keys=["FIRST", "SECOND"], indexed=True
+    )
+    queries = [
+        {"FIRST": "a*"},
+        {"FIRST": "a*", "SECOND": "x1"},
+        {"FIRST": "beta", "SECOND": "x?"},
+        {"FIRST": "beta"},
+    ]
+    results = {}
+    for schema in (plain, indexed):
+        store_rows(schema)
+        results[schema.indexed] = [found_keys(query) for query in queries]
+    assert results[True] == results[False]
+    assert results[True][0]["count"] == 4
+    assert results[True][1]["find"] == ["alpha:x1", "apex:x1"]
+
+    deleted = {}
+    for schema in (plain, indexed):
+        redis_client.set_schema(schema=schema)
+        deleted[schema.indexed] = redis_client.delete(keys_dict={"FIRST": "a*"})
+        redis_client.delete(keys_dict={})
+    assert deleted[True] == deleted[False] == 4
+
+
+def test_index_cleanup_keeps_rows_that_exist_on_master():
+    schema = RedisSchema(
+        static_keys=["CLEANUP_INDEXED"], dynamic_keys=["FIRST", "SECOND"], indexed=True
+    )
+    store_rows(schema)
+    write_cli = redis_controller.write_cli
+    json_key = schema.build_key({"FIRST": "alpha", "SECOND": "x1"})
+    index_key = schema.index_key("FIRST", "alpha")
+
+    # A replica that missed the row must not drop it from the indexes
+    redis_client.remove_from_indexes(keys=[json_key])
+    assert write_cli.sismember(index_key, json_key)
+    assert redis_client.clean_indexes() == 0
+
+    write_cli.delete(json_key)
+    redis_client.remove_from_indexes(keys=[json_key])
+    assert not write_cli.sismember(index_key, json_key)
+    write_cli.delete(schema.build_key({"FIRST": "alpha", "SECOND": "x2"}))
+    assert redis_client.clean_indexes() == 2
+    assert write_cli.scard(index_key) == 0
+    redis_client.delete(keys_dict={})
+
+
+def test_range_keys_scores_bounds_and_cleanup():
+    schema = RedisSchema(
+        static_keys=["RANGE_ROWS"],
+        dynamic_keys=["USER", "AT", "SCORE"],
+        range_keys={"AT": "time", "SCORE": "number"},
+    )
+    redis_client.set_schema(schema=schema)
+    redis_client.delete(keys_dict={})
+    write_cli = redis_controller.write_cli
+    rows = [
+        ("u1", "20240501T100000Z", "1"),
+        ("u1", "20240501T120000Z", "2.5"),
+        ("u2", "20240502T100000Z", "10"),
+        ("u1", "20240503T100000Z", "-3"),
+    ]
+    for user, at, score in rows:
+        redis_client.store(keys=[user, at, score], value={"Score": float(score)})
+    write_cli.wait(len(redis_controller.nodes), 1000)
+
+    json_key = schema.build_key({"USER": "u1", "AT": "20240501T120000Z", "SCORE": "2.5"})
+    assert write_cli.zscore(schema.range_key("SCORE"), json_key) == 2.5
+    assert write_cli.zscore(schema.range_key("AT"), json_key) == 1714564800
+
+    def scores(**kwargs) -> list:
+        found = redis_client.find_range(keys_dict=kwargs.pop("keys_dict", {}), **kwargs)
+        return [row.data["Score"] for row in found.all]
+
+    assert scores(key="SCORE", min=1, max=10) == [1, 2.5, 10]
+    assert scores(key="SCORE", min=1, max=10, min_exclusive=True) == [2.5, 10]
+    assert scores(key="SCORE", min=1, max=10, max_exclusive=True) == [1, 2.5]
+    assert scores(key="SCORE", min=1, max=10, reverse=True, limit=2) == [10, 2.5]
+    assert scores(key="SCORE", keys_dict={"USER": "u1"}) == [-3, 1, 2.5]
+    assert scores(key="AT", min="2024-05-01", max="2024-05-02") == [1, 2.5]
+    assert scores(
+        key="AT", min="20240501T100000Z", max="2024-05-02T10:00:00Z", min_exclusive=True
+    ) == [2.5, 10]
+
+    # Deleting rows drops them from the sorted sets
+    assert redis_client.delete(keys_dict={"USER": "u2"}) == 1
+    assert write_cli.zcard(schema.range_key("SCORE")) == 3
+
+    # An expired row is dropped from the sorted sets when find_range meets it
+    write_cli.pexpire(json_key, 1)
+    time.sleep(0.05)
+    write_cli.wait(len(redis_controller.nodes), 1000)
+    assert scores(key="SCORE") == [-3, 1]
+    assert write_cli.zscore(schema.range_key("SCORE"), json_key) is None
+    assert write_cli.zscore(schema.range_key("AT"), json_key) is None
+    redis_client.delete(keys_dict={})
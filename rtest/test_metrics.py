@@ -0,0 +1,112 @@
+import threading
+import time
+
+from mixin.cache import NearCache
+from mixin.config import master_config, redis_replica_redis_configs
+from mixin.controller import RedisController
+from mixin.metrics import MetricsRegistry, set_registry
+from mixin.mixins import RedisClient
+from mixin.schemas import RedisSchema
+
+
+def counted_controller() -> tuple:
+    # Counts replica picks, a find served without reading must not make one
+    controller = RedisController(
+        master_redis_config=master_config,
+        replica_redis_configs=redis_replica_redis_configs,
+    )
+    picks = []
+    select_replica = controller.select_replica
+
+    def counted():
+        node = select_replica()
+        picks.append(node)
+        # Slow enough for a concurrent find to join the read
+        time.sleep(0.2)
+        return node
+
+    controller.select_replica = counted
+    return controller, picks
+
+
+def store_rows(client: RedisClient, controller: RedisController) -> None:
+    client.delete(keys_dict={})
+    for ix in range(10):
+        client.store(keys=[str(ix)], value={"Ix": ix, "Even": ix % 2 == 0})
+    controller.write_cli.wait(len(controller.nodes), 1000)
+
+
+def find_labels(registry: MetricsRegistry) -> list:
+    return sorted(
+        (series["labels"]["node"], series["count"])
+        for series in registry.snapshot()["histograms"]["operation_seconds"]
+        if series["labels"]["operation"] == "find"
+    )
+
+
+def counter(registry: MetricsRegistry, name: str, operation: str) -> float:
+    return sum(
+        series["value"]
+        for series in registry.snapshot()["counters"].get(name, [])
+        if series["labels"]["operation"] == operation
+    )
+
+
+def test_find_is_labeled_with_the_node_that_read_it():
+    registry = set_registry(MetricsRegistry())
+    try:
+        controller, picks = counted_controller()
+        client = RedisClient(
+            controller=controller, near_cache=NearCache(ttl=60), single_flight=True
+        )
+        client.set_schema(RedisSchema(static_keys=["METRICS_FIND"], dynamic_keys=["ID"]))
+        store_rows(client, controller)
+
+        # Two concurrent finds, the second joins the read of the first
+        results = []
+        finders = [
+            threading.Thread(target=lambda: results.append(client.find(keys_dict={})))
+            for _ in range(2)
+        ]
+        for finder in finders:
+            finder.start()
+            time.sleep(0.05)
+        for finder in finders:
+            finder.join()
+        client.find(keys_dict={})
+        assert [len(rows.all) for rows in results] == [10, 10]
+        assert len(picks) == 1
+        assert find_labels(registry) == sorted(
+            [(picks[0].name, 1), ("near_cache", 1), ("single_flight", 1)]
+        )
+        client.delete(keys_dict={})
+    finally:
+        set_registry(None)
+
+
+def test_rows_scanned_counts_keys_looked_at():
+    registry = set_registry(MetricsRegistry())
+    try:
+        controller, _ = counted_controller()
+        client = RedisClient(controller=controller)
+        client.set_schema(
+            RedisSchema(static_keys=["METRICS_SCANNED"], dynamic_keys=["ID"])
+        )
+        store_rows(client, controller)
+        registry.reset()
+
+        assert len(client.find(keys_dict={})) == 10
+        assert counter(registry, "rows_scanned_total", "find") == 10
+        assert counter(registry, "rows_returned_total", "find") == 10
+
+        even = client.find(keys_dict={}, filters={"Even": True}, scan_count=3)
+        assert len(even) == 5
+        assert counter(registry, "rows_scanned_total", "filter") == 10
+        assert counter(registry, "rows_returned_total", "filter") == 5
+
+        # Fetching known keys scans nothing
+        client.get_many([{"ID": "1"}, {"ID": "2"}])
+        assert counter(registry, "rows_scanned_total", "find") == 10
+        client.delete(keys_dict={})
+    finally:
+        set_registry(None)
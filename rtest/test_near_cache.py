@@ -0,0 +1,69 @@
+import json
+import time
+
+from mixin.cache import NearCache, track_nodes
+from mixin.controller import redis_controller
+from mixin.mixins import RedisClient
+from mixin.schemas import RedisSchema
+
+
+def test_find_result_is_one_near_cache_entry():
+    near_cache = NearCache(max_entries=5, ttl=60)
+    client = RedisClient(controller=redis_controller, near_cache=near_cache)
+    client.set_schema(
+        schema=RedisSchema(static_keys=["NEAR_CACHE_ROWS"], dynamic_keys=["ID"])
+    )
+    for ix in range(10):
+        client.store(keys=[str(ix)], value={"ID": ix})
+    redis_controller.write_cli.wait(len(redis_controller.nodes), 1000)
+
+    first = client.find(keys_dict={})
+    second = client.find(keys_dict={})
+    assert len(first.all) == len(second.all) == 10
+    assert near_cache.stats["hits"] == 1
+    assert near_cache.stats["size"] == 1
+    client.delete(keys_dict={})
+
+
+def test_invalidate_matches_patterns_of_the_key_category():
+    near_cache = NearCache(ttl=60)
+    generation = near_cache.generation
+    near_cache.set_pattern("USERS:*:1", [], generation)
+    near_cache.set_pattern("USERS:a*", [], generation)
+    near_cache.set_pattern("ORDERS:*", [], generation)
+    near_cache.set_pattern("USERS:b:1", [], generation)
+
+    near_cache.invalidate("USERS:a:1")
+    assert near_cache.get_pattern("USERS:*:1") is None
+    assert near_cache.get_pattern("USERS:a*") is None
+    assert near_cache.get_pattern("ORDERS:*") == []
+    assert near_cache.get_pattern("USERS:b:1") == []
+    near_cache.invalidate("USERS:b:1")
+    assert near_cache.get_pattern("USERS:b:1") is None
+    assert near_cache.stats["size"] == 1
+
+
+def test_replica_reads_are_invalidated_by_the_replica():
+    near_cache = NearCache(ttl=60)
+    schema = RedisSchema(static_keys=["NEAR_CACHE_TRACKED"], dynamic_keys=["ID"])
+    invalidators = track_nodes(near_cache, redis_controller, prefixes=["NEAR_CACHE_TRACKED"])
+    try:
+        client = RedisClient(controller=redis_controller, near_cache=near_cache)
+        client.set_schema(schema=schema)
+        client.store(keys=["1"], value={"Hits": 1})
+        write_cli = redis_controller.write_cli
+        write_cli.wait(len(redis_controller.nodes), 1000)
+        assert client.find(keys_dict={}).first.data == {"Hits": 1}
+
+        # A write this client did not make reaches the cache through tracking
+        write_cli.set(schema.build_key({"ID": "1"}), json.dumps({"Hits": 2}))
+        write_cli.wait(len(redis_controller.nodes), 1000)
+        deadline = time.monotonic() + 2
+        while near_cache.get_pattern(schema.merge_key({})) is not None:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert client.find(keys_dict={}).first.data == {"Hits": 2}
+        client.delete(keys_dict={})
+    finally:
+        for invalidator in invalidators:
+            invalidator.stop()
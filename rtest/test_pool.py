@@ -0,0 +1,26 @@
+import threading
+
+import pytest
+
+from redis.exceptions import ConnectionError
+
+from mixin.config import master_config
+from mixin.conn import RedisConn, StatsBlockingConnectionPool
+
+
+def test_blocking_pool_counts_only_the_wait_for_a_free_connection():
+    pool = RedisConn(master_config, pool_config=dict(max_connections=1, timeout=0.2)).pool
+    assert isinstance(pool, StatsBlockingConnectionPool)
+    connection = pool.get_connection()
+    assert pool.stats["wait_time_max"] < 0.05
+
+    # The pool is exhausted, the next caller waits until the connection is back
+    threading.Timer(0.1, pool.release, args=(connection,)).start()
+    pool.release(pool.get_connection())
+    assert 0.05 < pool.stats["wait_time_max"] < 0.2
+
+    connection = pool.get_connection()
+    with pytest.raises(ConnectionError):
+        pool.get_connection()
+    pool.release(connection)
+    assert pool.stats["acquired"] == 4
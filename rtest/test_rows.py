@@ -0,0 +1,59 @@
+import pytest
+
+from pydantic import BaseModel
+
+from mixin.errors import RedisValueError
+from mixin.rows import MultipleRows, RedisRow
+from mixin.schemas import RedisSchema
+
+
+def make_row(serializer: str) -> RedisRow:
+    schema = RedisSchema(
+        static_keys=["ROWS"], dynamic_keys=["ID"], serializer=serializer
+    )
+    return RedisRow(schema=schema, delimiter=schema.delimiter)
+
+
+def test_str_values_are_json_payloads_for_every_serializer():
+    for serializer in ("json", "msgpack"):
+        row = make_row(serializer)
+        row.feed('{"Name": "John", "Tags": ["a", "b"]}')
+        assert row.data == {"Name": "John", "Tags": ["a", "b"]}
+
+
+def test_str_value_not_json_is_rejected_by_binary_serializer():
+    row = make_row("msgpack")
+    with pytest.raises(RedisValueError):
+        row.feed("plain text")
+
+
+def test_multiple_rows_keep_row_objects_and_handle_no_rows():
+    schema = RedisSchema(static_keys=["ROWS"], dynamic_keys=["ID"])
+    rows = MultipleRows(
+        schema=schema, pairs=[(f"ROWS:{ix}", b'{"Ix": %d}' % ix) for ix in range(4)]
+    )
+    assert rows.first is rows.first is rows[0]
+    assert rows[1:3][0] is rows[1] and rows[::2][1] is rows[2]
+    assert list(rows)[3] is rows[-1]
+    assert rows.first.data is rows.first.data
+
+    for empty in (MultipleRows(rows=[]), MultipleRows(schema=schema, pairs=[])):
+        assert empty.data == empty.dynamic_values == empty.all == []
+
+
+class User(BaseModel):
+    Name: str
+    Age: int = 0
+
+
+def test_str_values_are_validated_by_the_schema_model():
+    schema = RedisSchema(static_keys=["ROWS"], dynamic_keys=["ID"], model=User)
+    row = RedisRow(schema=schema, delimiter=schema.delimiter)
+    row.feed('{"Name": "John", "Age": "30"}')
+    assert row.value == b'{"Name":"John","Age":30}'
+    assert row.data == User(Name="John", Age=30)
+    with pytest.raises(RedisValueError):
+        row.feed('{"Age": 30}')
+    with pytest.raises(RedisValueError):
+        row.feed("not json")
+
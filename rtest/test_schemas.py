@@ -0,0 +1,59 @@
+import pytest
+
+from mixin.errors import RedisKeyError
+from mixin.schemas import RedisSchema
+
+
+def make_schema() -> RedisSchema:
+    return RedisSchema(
+        static_keys=["STATIC_1", "STATIC_2"],
+        dynamic_keys=["Dynamic_1", "Dynamic_2", "Dynamic_3"],
+        delimiter=":",
+    )
+
+
+def test_build_and_parse_key_round_trip():
+    schema = make_schema()
+    key_dict = {"DYNAMIC_1": "a", "DYNAMIC_2": "b-c", "DYNAMIC_3": "42"}
+    key = schema.build_key({"dynamic_3": 42, "Dynamic_1": "a", "DYNAMIC_2": "b-c"})
+    assert key == "STATIC_1:STATIC_2:a:b-c:42"
+    assert schema.parse_key(key) == key_dict
+    assert schema.parse_key(key.encode()) == key_dict
+    assert schema.exact_key(key_dict) == key
+    assert schema.merge_key(key_dict) == key
+    assert schema.build_key(schema.parse_key(key)) == key
+
+
+def test_missing_dynamic_key():
+    schema = make_schema()
+    with pytest.raises(RedisKeyError):
+        schema.build_key({"DYNAMIC_1": "a", "DYNAMIC_3": "c"})
+    assert schema.exact_key({"DYNAMIC_1": "a", "DYNAMIC_3": "c"}) is None
+    assert schema.merge_key({"DYNAMIC_1": "a", "DYNAMIC_3": "c"}) == "STATIC_1:STATIC_2:a:*:c"
+    assert schema.merge_key({}) == "STATIC_1:STATIC_2:*:*:*"
+    with pytest.raises(RedisKeyError):
+        schema.parse_key("STATIC_1:STATIC_2:a:b")
+    with pytest.raises(RedisKeyError):
+        schema.parse_key("OTHER:STATIC_2:a:b:c")
+
+
+def test_value_containing_delimiter():
+    schema = make_schema()
+    key_dict = {"DYNAMIC_1": "a:b", "DYNAMIC_2": "c", "DYNAMIC_3": "d"}
+    for build in (schema.build_key, schema.merge_key, schema.exact_key):
+        with pytest.raises(RedisKeyError):
+            build(key_dict)
+    # A delimiter inside a value would shift every following value
+    with pytest.raises(RedisKeyError):
+        schema.parse_key("STATIC_1:STATIC_2:a:b:c:d")
+
+
+def test_glob_value():
+    schema = make_schema()
+    key_dict = {"DYNAMIC_1": "a*", "DYNAMIC_2": "b?", "DYNAMIC_3": "[cd]"}
+    assert schema.exact_key(key_dict) is None
+    assert schema.merge_key(key_dict) == "STATIC_1:STATIC_2:a*:b?:[cd]"
+    assert schema.build_pattern(key_dict) == "STATIC_1:STATIC_2:a\\*:b\\?:\\[cd\\]"
+    # Stored keys hold the characters literally and parse back unchanged
+    key = schema.build_key(key_dict)
+    assert schema.parse_key(key) == key_dict
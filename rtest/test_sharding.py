@@ -0,0 +1,64 @@
+from mixin.config import master_config
+from mixin.schemas import RedisSchema
+from mixin.sharded_controller import HashRing, ShardedRedisController
+from mixin.sharded_mixins import ShardedRedisClient
+
+SHARD_NAMES = ["redis-a:6379", "redis-b:6379", "redis-c:6379"]
+
+
+def test_hash_ring_places_keys_stably_and_evenly():
+    keys = [f"tenant-{ix}" for ix in range(3000)]
+    ring = HashRing(SHARD_NAMES)
+    placed = [ring.get_shard(key) for key in keys]
+    assert placed == [HashRing(SHARD_NAMES).get_shard(key) for key in keys]
+    assert ring.get_shard("tenant-1") == ring.get_shard(b"tenant-1")
+    for shard in range(len(SHARD_NAMES)):
+        assert 700 < placed.count(shard) < 1300
+
+    # A new shard only takes keys over, about 1/N of them
+    grown = HashRing(SHARD_NAMES + ["redis-d:6379"])
+    moved = [key for key, shard in zip(keys, placed) if grown.get_shard(key) != shard]
+    assert all(grown.get_shard(key) == 3 for key in moved)
+    assert 500 < len(moved) < 1000
+
+
+def test_master_only_shards_find_and_store_many_across_shards():
+    # Two shards on the test master, told apart by their db
+    controller = ShardedRedisController(
+        shards=[
+            {"master": dict(master_config, db=db), "replicas": []} for db in (1, 2)
+        ]
+    )
+    assert controller.names[0].endswith("/1")
+    client = ShardedRedisClient(controller=controller)
+    client.set_schema(
+        RedisSchema(
+            static_keys=["SHARDED"],
+            dynamic_keys=["TENANT", "USER_ID"],
+            shard_keys=["TENANT"],
+        )
+    )
+    client.delete(keys_dict={})
+    tenants = [f"tenant-{ix}" for ix in range(20)]
+    stored = client.store_many(
+        [([tenant, str(ix)], {"Ix": ix}) for tenant in tenants for ix in range(3)]
+    )
+    assert len(stored) == 60
+
+    # Every tenant lives on one shard and both shards got rows
+    per_shard = [
+        {row.key.split(":")[1] for row in shard_client.find(keys_dict={}).all}
+        for shard_client in client.clients
+    ]
+    assert all(per_shard) and not per_shard[0] & per_shard[1]
+    assert per_shard[0] | per_shard[1] == set(tenants)
+
+    assert len(client.find(keys_dict={}).all) == 60
+    assert len(client.find(keys_dict={"USER_ID": "1"}).all) == 20
+    rows = client.find(keys_dict={"TENANT": "tenant-7"})
+    assert sorted(row.data["Ix"] for row in rows.all) == [0, 1, 2]
+
+    keys = [{"TENANT": tenant, "USER_ID": "2"} for tenant in reversed(tenants)]
+    got = client.get_many(keys)
+    assert [row.key.split(":")[1] for row in got.all] == list(reversed(tenants))
+    assert client.delete(keys_dict={}) == 60
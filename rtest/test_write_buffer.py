@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from mixin.buffer import WriteBuffer, _flush_all
+from mixin.controller import redis_controller
+from mixin.mixins import RedisClient
+from mixin.schemas import RedisSchema
+
+
+def test_writes_of_a_key_coalesce():
+    flushed = []
+    write_buffer = WriteBuffer(max_rows=10, flush_interval=60).start(flushed.extend)
+    for value in (1, 2, 3):
+        write_buffer.put("a", ("a", value))
+    write_buffer.put("b", ("b", 1))
+    assert write_buffer.flush() == 2
+    assert flushed == [("a", 3), ("b", 1)]
+    assert write_buffer.stats["coalesced"] == 2
+    write_buffer.close()
+
+
+def test_full_buffer_blocks_writers():
+    release = threading.Event()
+    write_buffer = WriteBuffer(
+        max_rows=1, flush_interval=0.01, max_pending=1, put_timeout=0.1
+    ).start(lambda rows: release.wait())
+    write_buffer.put("a", 1)
+    # The flush thread is stuck writing a, b fills the buffer
+    while write_buffer.pending:
+        time.sleep(0.001)
+    write_buffer.put("b", 2)
+    with pytest.raises(Exception, match="Write buffer is full"):
+        write_buffer.put("c", 3)
+    release.set()
+    write_buffer.close()
+    assert write_buffer.stats["flushed"] == 2
+
+
+def test_failed_rows_are_queued_again_then_dropped():
+    failures, dropped = [2], []
+
+    def flush_rows(rows):
+        if failures[0]:
+            failures[0] -= 1
+            raise ConnectionError("master is down")
+
+    write_buffer = WriteBuffer(flush_interval=60, max_attempts=3, on_drop=dropped.extend)
+    write_buffer.start(flush_rows)
+    write_buffer.put("a", 1)
+    assert write_buffer.flush() == 0 and write_buffer.pending == 1
+    assert write_buffer.flush() == 0 and write_buffer.pending == 1
+    assert write_buffer.flush() == 1 and write_buffer.stats["errors"] == 2
+
+    # A row failing max_attempts flushes is handed to on_drop
+    failures[0] = 10
+    write_buffer.put("b", 2)
+    write_buffer.put("c", 3)
+    for _ in range(3):
+        write_buffer.flush()
+    assert dropped == [2, 3]
+    assert write_buffer.pending == 0 and write_buffer.stats["dropped"] == 2
+    write_buffer.close()
+
+
+def test_direct_writes_flush_the_buffer_first():
+    schema = RedisSchema(static_keys=["BUFFERED"], dynamic_keys=["ID"])
+    client = RedisClient(
+        controller=redis_controller, write_buffer=WriteBuffer(flush_interval=60)
+    )
+    client.set_schema(schema)
+    client.delete(keys_dict={})
+    write_cli = redis_controller.write_cli
+
+    client.store(keys=["1"], value={"Ix": 1})
+    assert not write_cli.exists("BUFFERED:1")
+    client.store_many([(["2"], {"Ix": 2})])
+    assert write_cli.exists("BUFFERED:1", "BUFFERED:2") == 2
+
+    client.store(keys=["3"], value={"Ix": 3})
+    assert client.delete(keys_dict={}) == 3
+
+    client.store(keys=["4"], value={"Ix": 4})
+    client.set_schema(RedisSchema(static_keys=["BUFFERED_OTHER"], dynamic_keys=["ID"]))
+    assert write_cli.exists("BUFFERED:4")
+    write_cli.delete("BUFFERED:4")
+    client.write_buffer.close()
+
+
+def test_buffers_flush_at_exit():
+    flushed = []
+    write_buffer = WriteBuffer(flush_interval=60).start(flushed.extend)
+    write_buffer.put("a", 1)
+    _flush_all()
+    assert flushed == [1] and not write_buffer.running